@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks du pipeline de génération.
+
+Mesure pour chaque profil de apps.json (et une configuration personnalisée):
+- transform_user_config_to_api_config
+- ScriptGenerator.generate_script
+ainsi que get_resolved_apps_config, _load_module (chaque module) et les endpoints
+catalogue via le client de test Flask.
+
+Chaque cas est chronométré (médiane et p95 sur plusieurs itérations), puis exécuté
+une fois sous tracemalloc pour le pic mémoire. Les résultats sont comparés à une
+référence JSON: le script échoue si un cas dépasse la référence de plus du seuil.
+
+Usage:
+    python benchmark.py                      # comparer à la référence
+    python benchmark.py --update-baseline    # enregistrer la référence
+    python benchmark.py --filter generate --repeat 50 --threshold 0.3
+
+La référence dépend de la machine: elle est conservée hors du dépôt
+(cache/benchmark_baseline.json par défaut).
+"""
+
+import sys
+import os
+import io
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import MODULE_FILES, app, generator, transform_user_config_to_api_config
+
+DEFAULT_BASELINE = Path(__file__).parent / 'cache' / 'benchmark_baseline.json'
+SCRIPT_TYPES = ['installation', 'optimizations']
+CATALOG_ENDPOINTS = ['/api/profiles', '/api/apps', '/api/modules', '/api/apps/all-with-categories']
+MODULES_CONFIG = {
+    'debloat': {'enabled': True},
+    'performance': {'enabled': True, 'PageFile': True, 'PowerPlan': True, 'StartupPrograms': True,
+                    'Network': True, 'VisualEffects': True},
+    'ui': {'enabled': True, 'DarkMode': True, 'ShowFileExtensions': True, 'ShowFullPath': True,
+           'ShowThisPC': True, 'ShowRecycleBin': True, 'TaskbarAlignLeft': True, 'HideWidgets': True}
+}
+# Écarts absolus ignorés (bruit de mesure) même au-delà du seuil relatif
+MIN_TIME_DELTA_MS = 0.5
+MIN_MEMORY_DELTA_KB = 64
+
+
+def user_configs() -> dict:
+    """Configuration utilisateur par profil, plus une configuration personnalisée (apps optionnelles)."""
+    apps_config = generator.get_resolved_apps_config()
+    configs = {}
+    for profile_id in apps_config.get('profiles', {}):
+        configs[profile_id] = {
+            'profile': profile_id,
+            'master_apps': [],
+            'profile_apps': [],
+            'optional_apps': [],
+            'modules': MODULES_CONFIG
+        }
+    configs['Custom+optional'] = {
+        'profile': 'Custom',
+        'custom_name': 'Custom',
+        'master_apps': [],
+        'profile_apps': [],
+        'optional_apps': [app.get('winget') or app.get('url') or app.get('name')
+                          for app in apps_config.get('optional', [])],
+        'modules': MODULES_CONFIG
+    }
+    return configs
+
+
+def build_cases(name_filter: str = '') -> dict:
+    """Cas mesurés: {nom: fonction sans argument}."""
+    cases = {
+        'get_resolved_apps_config': generator.get_resolved_apps_config,
+    }
+    for module_file in MODULE_FILES.values():
+        cases[f'load_module[{module_file}]'] = lambda module_file=module_file: generator._load_module(module_file)
+
+    for profile_id, user_config in user_configs().items():
+        api_config = transform_user_config_to_api_config(user_config, SCRIPT_TYPES)
+        cases[f'transform[{profile_id}]'] = \
+            lambda user_config=user_config: transform_user_config_to_api_config(user_config, SCRIPT_TYPES)
+        cases[f'generate_script[{profile_id}]'] = \
+            lambda api_config=api_config, profile_id=profile_id: generator.generate_script(api_config, profile_id)
+
+    client = app.test_client()
+    for endpoint in CATALOG_ENDPOINTS:
+        def request_endpoint(endpoint=endpoint):
+            response = client.get(endpoint)
+            if response.status_code != 200:
+                raise RuntimeError(f"{endpoint}: HTTP {response.status_code}")
+            return response.data
+        cases[f'GET {endpoint}'] = request_endpoint
+
+    return {name: func for name, func in cases.items() if name_filter in name}
+
+
+def measure(func, repeat: int) -> dict:
+    """Temps (médiane, p95, min en ms) sur `repeat` itérations, puis pic tracemalloc sur une exécution."""
+    func()  # Préchauffage (caches, imports paresseux)
+
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    # Mesure mémoire séparée: tracemalloc ralentit fortement l'exécution
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Régressions: médiane ou pic mémoire au-delà de la référence + seuil (et du bruit absolu)."""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        checks = (
+            ('median_ms', MIN_TIME_DELTA_MS, 'ms'),
+            ('peak_kb', MIN_MEMORY_DELTA_KB, 'KB'),
+        )
+        for metric, min_delta, unit in checks:
+            before, after = reference[metric], current[metric]
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append(f"{name}: {metric} {before} -> {after} {unit} (+{(after / before - 1) * 100:.0f} %)")
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks du pipeline de génération")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Fichier de référence JSON")
+    parser.add_argument('--update-baseline', action='store_true', help="Enregistrer les résultats comme référence")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Régression tolérée (0.25 = +25 %%)")
+    parser.add_argument('--repeat', type=int, default=20, help="Itérations chronométrées par cas")
+    parser.add_argument('--filter', default='', help="Ne mesurer que les cas contenant ce texte")
+    parser.add_argument('--output', type=Path, help="Écrire les résultats JSON dans ce fichier")
+    args = parser.parse_args()
+
+    # Les logs INFO de la génération faussent les mesures (écriture de generator.log)
+    logging.getLogger('app').setLevel(logging.WARNING)
+
+    print("="*60)
+    print("MICRO-BENCHMARKS DU PIPELINE DE GENERATION")
+    print("="*60)
+
+    cases = build_cases(args.filter)
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, max(1, args.repeat))
+        r = results[name]
+        print(f"  {name:<45} {r['median_ms']:>9.2f} ms (p95 {r['p95_ms']:>8.2f})  pic {r['peak_kb']:>9.1f} KB")
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if args.update_baseline or not args.baseline.exists():
+        # Une référence partielle (--filter) complète la référence existante
+        if args.baseline.exists():
+            previous = json.loads(args.baseline.read_text(encoding='utf-8'))
+            report['results'] = {**previous.get('results', {}), **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nReference enregistree: {args.baseline} ({len(report['results'])} cas)")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    if baseline.get('environment') != environment():
+        print(f"\n[ATTENTION] Reference mesuree sur un autre environnement: {baseline.get('environment')}")
+
+    regressions = compare(results, baseline.get('results', {}), args.threshold)
+    missing = sorted(set(results) - set(baseline.get('results', {})))
+    if missing:
+        print(f"\nCas sans reference (ignores): {', '.join(missing)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) au-dela de +{args.threshold * 100:.0f} %:")
+        for regression in regressions:
+            print(f"  [ECHEC] {regression}")
+        return 1
+
+    print(f"\nResultat: {len(results)} cas sans regression (seuil +{args.threshold * 100:.0f} %)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
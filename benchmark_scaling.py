@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de montée en charge du catalogue (catalogues synthétiques).
+
+Pour chaque taille de catalogue (synthetic_catalog.build_catalog), mesure:
+- _resolve_app_references (seul) et get_resolved_apps_config (copie + résolution)
+- GET /api/apps/all-with-categories (client de test Flask)
+- transform_user_config_to_api_config: profil standard et sélection manuelle
+- generate_script sur la configuration d'un profil standard
+
+Le rapport de complexité estime l'exposant de croissance de chaque cas: régression
+log-log du temps médian sur toutes les tailles, et exposant entre les deux plus
+grandes tailles (comportement asymptotique, moins sensible aux coûts fixes),
+utilisé pour la classification et l'extrapolation à une taille cible.
+
+Usage:
+    python benchmark_scaling.py
+    python benchmark_scaling.py --sizes 100,1000,10000 --target 20000 --output cache/scaling.json
+"""
+
+import sys
+import os
+import io
+import argparse
+import copy
+import json
+import logging
+import math
+import statistics
+import time
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import ScriptGenerator, app, generator, transform_user_config_to_api_config
+from synthetic_catalog import build_catalog, catalog_summary
+
+SCRIPT_TYPES = ['installation', 'optimizations']
+MODULES_CONFIG = {
+    'debloat': {'enabled': True},
+    'performance': {'enabled': True, 'PowerPlan': True},
+    'ui': {'enabled': True, 'DarkMode': True}
+}
+SELECTION_SIZE = 30
+
+
+def app_id(app_entry: dict) -> str:
+    return app_entry.get('winget') or app_entry.get('url') or app_entry.get('name')
+
+
+def profiles_for(apps: int) -> int:
+    """Nombre de profils associé à une taille de catalogue (quelques dizaines à grande échelle)."""
+    return max(5, apps // 100)
+
+
+def build_cases(catalog: dict) -> dict:
+    """Cas mesurés sur le catalogue chargé dans le générateur: {nom: fonction}."""
+    resolved = generator.get_resolved_apps_config()
+    profile_id = next(iter(catalog['profiles']))
+    profile_config = {
+        'profile': profile_id, 'master_apps': [], 'profile_apps': [], 'optional_apps': [], 'modules': MODULES_CONFIG
+    }
+
+    # Sélection manuelle de taille fixe: apps de profils et optionnelles, prises en fin de catalogue
+    profile_ids = [app_id(a) for profile in resolved['profiles'].values() for a in profile['apps']]
+    optional_ids = [app_id(a) for a in resolved['optional']]
+    selection_config = {
+        'profile': 'Custom', 'custom_name': 'Custom', 'master_apps': [],
+        'profile_apps': profile_ids[-SELECTION_SIZE // 2:],
+        'optional_apps': optional_ids[-SELECTION_SIZE // 2:],
+        'modules': MODULES_CONFIG
+    }
+    api_config = transform_user_config_to_api_config(profile_config, SCRIPT_TYPES)
+    client = app.test_client()
+
+    def resolve_only():
+        # Copie hors mesure: _resolve_app_references modifie le catalogue en place
+        data = copies.pop() if copies else copy.deepcopy(catalog)
+        start = time.perf_counter()
+        ScriptGenerator._resolve_app_references(data)
+        return time.perf_counter() - start
+
+    def categories_endpoint():
+        response = client.get('/api/apps/all-with-categories')
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    copies = []
+    return {
+        '_resolve_app_references': (resolve_only, copies),
+        'get_resolved_apps_config': (generator.get_resolved_apps_config, None),
+        'GET /api/apps/all-with-categories': (categories_endpoint, None),
+        'transform[profil]': (lambda: transform_user_config_to_api_config(profile_config, SCRIPT_TYPES), None),
+        'transform[selection]': (lambda: transform_user_config_to_api_config(selection_config, SCRIPT_TYPES), None),
+        'generate_script[profil]': (lambda: generator.generate_script(api_config, profile_id), None),
+    }
+
+
+def measure(func, repeat: int, copies=None, catalog=None) -> float:
+    """Temps médian en ms (la fonction peut retourner sa propre durée mesurée)."""
+    if copies is not None:
+        copies.extend(copy.deepcopy(catalog) for _ in range(repeat + 1))
+    func()  # Préchauffage
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        own = func()
+        timings.append(own if isinstance(own, float) else time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def fit_exponent(sizes: list, timings: list) -> float:
+    """Pente de la régression log(temps) = a + b.log(taille)."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-6)) for value in timings]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance if variance else 0.0
+
+
+def classify(exponent: float) -> str:
+    if exponent < 0.25:
+        return 'O(1)'
+    if exponent < 0.8:
+        return 'sous-linéaire'
+    if exponent < 1.25:
+        return 'O(n)'
+    if exponent < 1.7:
+        return 'O(n log n) à O(n^1.5)'
+    return 'O(n^2) ou pire'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de montée en charge du catalogue")
+    parser.add_argument('--sizes', default='100,300,1000,3000,10000', help="Tailles de catalogue (nombre d'applications)")
+    parser.add_argument('--repeat', type=int, default=5, help="Itérations chronométrées par cas et par taille")
+    parser.add_argument('--target', type=int, default=20000, help="Taille cible pour l'extrapolation")
+    parser.add_argument('--seed', type=int, default=0, help="Graine des catalogues synthétiques")
+    parser.add_argument('--output', type=Path, help="Écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+
+    # Les logs INFO de la génération faussent les mesures (écriture de generator.log)
+    logging.getLogger('app').setLevel(logging.WARNING)
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    original_catalog = generator.apps_config
+    results = {}
+    catalogs = {}
+
+    print("="*60)
+    print("BENCHMARKS DE MONTEE EN CHARGE DU CATALOGUE")
+    print("="*60)
+
+    try:
+        for size in sizes:
+            catalog = build_catalog(size, profiles_for(size), seed=args.seed)
+            catalogs[size] = catalog_summary(catalog)
+            generator.apps_config = catalog
+            print(f"\n  Catalogue {size} apps ({catalogs[size]['profiles']} profils, {catalogs[size]['refs']} références)")
+            for name, (func, copies) in build_cases(catalog).items():
+                median_ms = measure(func, max(1, args.repeat), copies, catalog)
+                results.setdefault(name, {})[size] = round(median_ms, 3)
+                print(f"    {name:<38} {median_ms:>10.2f} ms")
+    finally:
+        generator.apps_config = original_catalog
+
+    print(f"\n{'='*60}\nRAPPORT DE COMPLEXITE (exposant b: temps ~ n^b)\n{'='*60}")
+    report = {}
+    for name, timings in results.items():
+        exponent = fit_exponent(list(timings), list(timings.values()))
+        tail_sizes = sorted(timings)[-2:]
+        tail_exponent = fit_exponent(tail_sizes, [timings[size] for size in tail_sizes])
+        largest = tail_sizes[-1]
+        extrapolated = timings[largest] * (args.target / largest) ** tail_exponent
+        report[name] = {
+            'timings_ms': timings,
+            'exponent': round(exponent, 2),
+            'exponent_tail': round(tail_exponent, 2),
+            'complexity': classify(tail_exponent),
+            f'extrapolated_ms_at_{args.target}': round(extrapolated, 1),
+        }
+        print(f"  {name:<38} b = {exponent:>5.2f} (fin {tail_exponent:>5.2f})  {classify(tail_exponent):<22}"
+              f" ~{extrapolated:>9.1f} ms à {args.target} apps")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'sizes': sizes, 'catalogs': catalogs, 'target': args.target,
+                                           'results': report}, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nRapport: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Protection des endpoints d'administration
+
+Si la variable d'environnement ADMIN_TOKEN est définie, les endpoints
+d'administration et de diagnostic exigent l'en-tête X-Admin-Token
+correspondant. Sans ADMIN_TOKEN (développement, réseau interne), ils restent
+accessibles comme le reste de l'API.
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import jsonify, request
+
+ADMIN_TOKEN_ENV = 'ADMIN_TOKEN'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+
+def require_admin_token(view):
+    """Décorateur: refuse la requête (401) si le jeton d'administration est absent ou invalide."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = os.environ.get(ADMIN_TOKEN_ENV)
+        if expected:
+            provided = request.headers.get(ADMIN_TOKEN_HEADER, '')
+            if not hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+                return jsonify({'success': False, 'error': "Jeton d'administration requis"}), 401
+        return view(*args, **kwargs)
+    return wrapper
@@ -16,13 +16,29 @@ import json
 import uuid
 import hashlib
 import subprocess
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, redirect, send_file, stream_with_context, g
 from flask_cors import CORS
 import logging
 from typing import Dict, List, Optional, Tuple
 
+from artifact_store import ArtifactStoreError, create_artifact_store
+from catalog_search import CatalogSearch, create_search_blueprint
+from catalog_sync import CatalogHistory, create_catalog_blueprint
+from cache_proxy import InstallerCacheProxy, collect_installer_urls, create_proxy_blueprint
+from ps_literals import to_ps_literal
+from saved_profiles import SavedProfileStore, create_saved_profiles_blueprint
+from telemetry import TelemetryStore, create_telemetry_blueprint
+from winget_index import WingetIndex, create_winget_index_blueprint
+from cost_model import analyze_cost, parse_size_bytes
+from metrics import MetricsRegistry, create_metrics_blueprint
+from memory_tracing import MemoryTracer, create_memory_blueprint
+from log_pipeline import setup_logging
+from profiling import SlowRequestProfiler, create_profiling_blueprint, record_stage, server_timing_header
+
 # JSON Schema validation (optional dependency)
 try:
     import jsonschema
@@ -44,15 +60,12 @@ GENERATED_DIR = BASE_DIR / "generated"
 # Créer le dossier generated s'il n'existe pas
 GENERATED_DIR.mkdir(exist_ok=True)
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(BASE_DIR / 'generator.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configuration du logging: file en mémoire, écriture (JSON lignes avec rotation) par un thread dédié
+LOG_FILE = Path(os.environ.get('LOG_FILE', BASE_DIR / 'generator.log'))
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', '5'))
+log_pipeline = setup_logging(LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -60,8 +73,99 @@ MAX_APPS_PER_SCRIPT = 50
 MAX_SCRIPT_SIZE_MB = 10
 GENERATION_TIMEOUT_SECONDS = 60
 CACHE_RETENTION_HOURS = 24
+
+# Proxy cache LAN des installeurs (surchargeable par variables d'environnement)
+PROXY_CACHE_DIR = Path(os.environ.get('PROXY_CACHE_DIR', BASE_DIR / 'cache' / 'installers'))
+PROXY_CACHE_MAX_GB = float(os.environ.get('PROXY_CACHE_MAX_GB', '50'))
+# Délai (secondes) avant revalidation d'une entrée auprès de l'origine (0: à chaque accès)
+PROXY_CACHE_MAX_AGE = float(os.environ.get('PROXY_CACHE_MAX_AGE', '0'))
+
+# Télémétrie d'exécution des scripts (base SQLite locale)
+TELEMETRY_DB = Path(os.environ.get('TELEMETRY_DB', BASE_DIR / 'cache' / 'telemetry.db'))
 RATE_LIMIT_PER_IP = 20  # Générations par heure
 
+# Historique des versions du catalogue pour la synchronisation différentielle (/api/catalog?since=)
+CATALOG_HISTORY_DIR = Path(os.environ.get('CATALOG_HISTORY_DIR', BASE_DIR / 'cache' / 'catalog_history'))
+CATALOG_HISTORY_SIZE = int(os.environ.get('CATALOG_HISTORY_SIZE', '20'))
+
+# Profils personnalisés enregistrés (SQLite) et cache des scripts générés par identifiant
+SAVED_PROFILES_DB = Path(os.environ.get('SAVED_PROFILES_DB', BASE_DIR / 'cache' / 'saved_profiles.db'))
+SCRIPT_CACHE_TTL_SECONDS = int(os.environ.get('SCRIPT_CACHE_TTL_SECONDS', '3600'))
+
+# Copie locale de l'index de la source winget (index.db) pour valider les identifiants hors ligne
+WINGET_INDEX_DB = Path(os.environ.get('WINGET_INDEX_DB', BASE_DIR / 'cache' / 'winget' / 'index.db'))
+
+# Stockage des artefacts générés, partagé entre réplicas: répertoire (volume) ou bucket compatible S3
+ARTIFACT_STORE = os.environ.get('ARTIFACT_STORE', 'local').lower()
+ARTIFACT_DIR = Path(os.environ.get('ARTIFACT_DIR', BASE_DIR / 'cache' / 'artifacts'))
+ARTIFACT_URL_EXPIRES = int(os.environ.get('ARTIFACT_URL_EXPIRES', '300'))
+artifact_store = create_artifact_store(
+    ARTIFACT_STORE, ARTIFACT_DIR,
+    endpoint=os.environ.get('S3_ENDPOINT', ''),
+    bucket=os.environ.get('S3_BUCKET', ''),
+    access_key=os.environ.get('S3_ACCESS_KEY', ''),
+    secret_key=os.environ.get('S3_SECRET_KEY', ''),
+    region=os.environ.get('S3_REGION', 'us-east-1'),
+    prefix=os.environ.get('S3_PREFIX', ''),
+    virtual_host=os.environ.get('S3_VIRTUAL_HOST', '0').lower() in ('1', 'true', 'yes'),
+    public_endpoint=os.environ.get('S3_PUBLIC_ENDPOINT') or None,
+)
+
+# Métriques Prometheus: répertoire partagé entre les workers gunicorn
+METRICS_DIR = Path(os.environ.get('METRICS_DIR', BASE_DIR / 'cache' / 'metrics'))
+metrics_registry = MetricsRegistry(METRICS_DIR)
+
+# Profilage des requêtes lentes (échantillonneur de piles, désactivé par défaut)
+SLOW_REQUEST_PROFILING = os.environ.get('SLOW_REQUEST_PROFILING', '0').lower() in ('1', 'true', 'yes')
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '1000'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '1.0'))
+PROFILES_DIR = Path(os.environ.get('PROFILES_DIR', BASE_DIR / 'cache' / 'profiles'))
+
+# Diagnostic mémoire par requête (tracemalloc, désactivé par défaut) et budget par requête
+MEMORY_TRACING = os.environ.get('MEMORY_TRACING', '0').lower() in ('1', 'true', 'yes')
+MEMORY_BUDGET_KB = float(os.environ.get('MEMORY_BUDGET_KB', '16384'))
+MEMORY_TRACING_FRAMES = int(os.environ.get('MEMORY_TRACING_FRAMES', '1'))
+
+
+@contextmanager
+def timed_stage(name: str):
+    """Chronomètre une étape: histogramme Prometheus et en-tête Server-Timing de la requête."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics_registry.observe('postboot_stage_duration_seconds', elapsed, stage=name)
+        record_stage(name, elapsed)
+
+# Mapping nom module -> fichier .psm1
+MODULE_FILES = {
+    'debloat': 'Debloat-Windows',
+    'performance': 'Optimize-Performance',
+    'ui': 'Customize-UI'
+}
+
+
+def _source_fingerprint() -> str:
+    """Empreinte du code de génération (générateur, modules, paramètres): invalide les scripts en cache après un déploiement."""
+    digest = hashlib.sha256()
+    sources = [Path(__file__), CONFIG_DIR / 'settings.json'] + sorted(MODULES_DIR.glob('*.psm1'))
+    for path in sources:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(str(path).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+SOURCE_FINGERPRINT = _source_fingerprint()
+
+
+def parse_size_mb(size) -> Optional[float]:
+    """Convertit une taille annoncée du catalogue ("150 MB", "3 GB") en Mo, None si inconnue."""
+    size_bytes = parse_size_bytes(size)
+    return None if size_bytes is None else size_bytes / 1024 ** 2
+
 
 class ScriptGenerator:
     """Moteur de génération de scripts PowerShell autonomes."""
@@ -69,13 +173,16 @@ class ScriptGenerator:
     def __init__(self):
         self.apps_config = self._load_json(CONFIG_DIR / "apps.json")
         self.settings_config = self._load_json(CONFIG_DIR / "settings.json")
+        self.duration_history = self._load_duration_history()
+        self.telemetry_store = None
         # Template main_template.ps1 removed - scripts generated dynamically
 
     def get_resolved_apps_config(self) -> dict:
         """Retourne une copie du apps_config avec les références résolues."""
         import copy
-        resolved = copy.deepcopy(self.apps_config)
-        return self._resolve_app_references(resolved)
+        with timed_stage('catalog.resolve'):
+            resolved = copy.deepcopy(self.apps_config)
+            return self._resolve_app_references(resolved)
 
     @staticmethod
     def _resolve_app_references(data: dict) -> dict:
@@ -151,6 +258,7 @@ class ScriptGenerator:
                                     "name": {"type": "string"},
                                     "winget": {"type": "string"},
                                     "url": {"type": "string"},
+                                    "sha256": {"type": "string", "pattern": "^[A-Fa-f0-9]{64}$"},
                                     "plugins": {
                                         "type": "array",
                                         "items": {"type": "string"},
@@ -192,7 +300,7 @@ class ScriptGenerator:
         """Charge le contenu d'un module PowerShell."""
         try:
             filepath = MODULES_DIR / f"{module_name}.psm1"
-            with open(filepath, 'r', encoding='utf-8') as f:
+            with timed_stage('module_load'), open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
 
                 # Retirer le bloc Export-ModuleMember complet car le code sera inline
@@ -256,35 +364,138 @@ class ScriptGenerator:
         if not is_valid:
             raise ValueError(f"Configuration invalide: {error}")
 
+        # Chaque section est chronométrée (histogramme postboot_stage_duration_seconds)
+        def stage(name):
+            return timed_stage(f'generate.{name}')
+
+        # Coût estimé de chaque application (progression pondérée et ETA du script)
+        with stage('cost_estimates'):
+            user_config = self._attach_cost_estimates(user_config)
+
         # Construction du script
         script_parts = []
 
         # 1. En-tête avec métadonnées
-        header = self._generate_header(profile_name, user_config)
+        with stage('header'):
+            header = self._generate_header(profile_name, user_config)
         script_parts.append(header)
 
         # 2. Configuration embarquée (JSON inline)
-        embedded_config = self._generate_embedded_config(user_config)
+        with stage('embedded_config'):
+            embedded_config = self._generate_embedded_config(user_config)
         script_parts.append(embedded_config)
 
         # 3. Fonctions utilitaires communes
-        utilities = self._generate_utilities()
+        with stage('utilities'):
+            utilities = self._generate_utilities()
         script_parts.append(utilities)
 
         # 4. Modules PowerShell nécessaires (code inline)
-        modules_code = self._generate_modules_code(user_config)
+        with stage('modules'):
+            modules_code = self._generate_modules_code(user_config)
         script_parts.append(modules_code)
 
         # 5. Orchestrateur principal
-        orchestrator = self._generate_orchestrator(user_config)
+        with stage('orchestrator'):
+            orchestrator = self._generate_orchestrator(user_config)
         script_parts.append(orchestrator)
 
         # 6. Assembler le script complet
-        full_script = '\n\n'.join(script_parts)
+        with stage('assemble'):
+            full_script = '\n\n'.join(script_parts)
 
         logger.info(f"Script généré: {len(full_script)} caractères")
         return full_script
 
+    def analyze_cost(self, user_config: dict) -> dict:
+        """
+        Coût d'exécution estimé d'un script, sans le générer (modèle statique).
+
+        Args:
+            user_config: Configuration au même format que generate_script
+
+        Returns:
+            Totaux (winget, téléchargements, octets, ruches, AppX, services, explorateur),
+            détail par application et par module
+
+        Raises:
+            ValueError: configuration invalide
+        """
+        is_valid, error = self.validate_config(user_config)
+        if not is_valid:
+            raise ValueError(f"Configuration invalide: {error}")
+
+        # Debloat toujours inclus, comme dans le script généré
+        modules = list(user_config.get('modules', []))
+        if 'debloat' not in modules:
+            modules.insert(0, 'debloat')
+        config = {**user_config, 'modules': modules}
+
+        sources = {module: self._load_module(MODULE_FILES[module]) for module in modules if module in MODULE_FILES}
+        return analyze_cost(config, sources, self._estimate_app_seconds)
+
+    def _estimate_app_seconds(self, app: dict) -> int:
+        """
+        Estime la durée d'installation d'une application, en secondes.
+
+        Durée observée (médiane de l'historique) si disponible, sinon modèle
+        basé sur la taille annoncée: base + téléchargement + installation.
+        """
+        observed = self._observed_duration(app.get('name'))
+        if observed:
+            return int(observed)
+
+        progress = self.settings_config.get('progress', {})
+        size_mb = parse_size_mb(app.get('size'))
+        if size_mb is None:
+            return int(progress.get('defaultSeconds', 90))
+
+        return int(progress.get('baseSeconds', 20)
+                   + size_mb / progress.get('downloadMBps', 10)
+                   + size_mb * progress.get('installSecondsPerMB', 0.5))
+
+    def _observed_duration(self, name: str) -> Optional[float]:
+        """Durée médiane observée: télémétrie des exécutions, sinon fichier d'historique."""
+        if self.telemetry_store is not None:
+            try:
+                observed = self.telemetry_store.get_app_medians().get(name)
+                if observed:
+                    return observed
+            except Exception as e:
+                logger.warning(f"Télémétrie indisponible pour l'estimation: {e}")
+        return self.duration_history.get(name)
+
+    def _attach_cost_estimates(self, config: dict) -> dict:
+        """Retourne une copie de la configuration avec estimatedSeconds sur chaque application."""
+        import copy
+        config = copy.deepcopy(config)
+        for section in ('master', 'profile'):
+            for app in config.get('apps', {}).get(section, []):
+                if isinstance(app, dict):
+                    app['estimatedSeconds'] = self._estimate_app_seconds(app)
+        return config
+
+    def _load_duration_history(self) -> Dict[str, float]:
+        """
+        Charge les durées d'installation observées ({"apps": {"nom": secondes}}).
+
+        Fichier optionnel (settings.json > progress.historyFile), absent par défaut.
+        """
+        history_file = self.settings_config.get('progress', {}).get('historyFile')
+        if not history_file:
+            return {}
+        path = Path(history_file)
+        if not path.is_absolute():
+            path = BASE_DIR / path
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return {name: float(seconds) for name, seconds in json.load(f).get('apps', {}).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Historique des durées illisible ({path}): {e}")
+            return {}
+
     def _generate_header(self, profile_name: str, config: dict) -> str:
         """Génère l'en-tête du script avec métadonnées."""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -296,6 +507,34 @@ class ScriptGenerator:
         # Modules activés
         modules_enabled = config.get('modules', [])
 
+        # Cache local des installeurs (settings.json > installerCache)
+        cache_settings = self.settings_config.get('installerCache', {})
+        cache_disabled = '' if cache_settings.get('enabled', True) else '$true'
+        cache_path = cache_settings.get('path') or '$env:ProgramData\\PostBootSetup\\InstallerCache'
+        cache_max_gb = int(cache_settings.get('maxSizeGB', 20))
+        cache_seed = (cache_settings.get('seedPath') or '').replace("'", "''")
+        download_proxy = (cache_settings.get('proxyUrl') or '').replace("'", "''")
+
+        # Journal de reprise (settings.json > checkpoint)
+        checkpoint_settings = self.settings_config.get('checkpoint', {})
+        checkpoint_path = checkpoint_settings.get('path') or '$env:ProgramData\\PostBootSetup\\checkpoint.log'
+        resume_hook_disabled = '' if checkpoint_settings.get('resumeAfterReboot', True) else '$true'
+
+        # Optimisations en arrière-plan pendant les installations (settings.json > scheduling)
+        scheduling_settings = self.settings_config.get('scheduling', {})
+        sequential_default = '' if scheduling_settings.get('overlapOptimizations', True) else '$true'
+
+        # Surveillance des installeurs (settings.json > installWatchdog)
+        watchdog_settings = self.settings_config.get('installWatchdog', {})
+        watchdog_default = int(watchdog_settings.get('defaultTimeoutMinutes', 15))
+        watchdog_max = int(watchdog_settings.get('maxTimeoutMinutes', 120))
+        watchdog_mb_per_minute = int(watchdog_settings.get('mbPerMinute', 100))
+        watchdog_stall = int(watchdog_settings.get('stallMinutes', 10))
+
+        # Remontée des durées d'étapes (settings.json > telemetry), désactivée si l'URL est vide
+        telemetry_settings = self.settings_config.get('telemetry', {})
+        telemetry_url = (telemetry_settings.get('url') or '').replace("'", "''") if telemetry_settings.get('enabled') else ''
+
         header = f"""<#
 .SYNOPSIS
 PostBootSetup - Script généré automatiquement
@@ -323,7 +562,17 @@ https://tenorsolutions.com
 param(
     [switch]$Silent,
     [switch]$NoDebloat,
-    [string]$LogPath = "$env:TEMP\\PostBootSetup_$(Get-Date -Format 'yyyyMMdd_HHmmss').log"
+    [string]$LogPath = "$env:TEMP\\PostBootSetup_$(Get-Date -Format 'yyyyMMdd_HHmmss').log",
+    [switch]$NoInstallerCache{' = ' + cache_disabled if cache_disabled else ''},
+    [string]$InstallerCachePath = "{cache_path}",
+    [int]$InstallerCacheMaxGB = {cache_max_gb},
+    [string]$InstallerCacheSeedPath = '{cache_seed}',
+    [string]$DownloadProxyUrl = '{download_proxy}',
+    [switch]$Resume,
+    [switch]$SequentialOptimizations{' = ' + sequential_default if sequential_default else ''},
+    [switch]$NoResumeHook{' = ' + resume_hook_disabled if resume_hook_disabled else ''},
+    [string]$CheckpointPath = "{checkpoint_path}",
+    [string]$TelemetryUrl = '{telemetry_url}'
 )
 
 # Métadonnées du script
@@ -336,20 +585,28 @@ $Global:ScriptMetadata = @{{
 
 $Global:StartTime = Get-Date
 $Global:LogPath = $LogPath
+
+# Surveillance des installeurs (délais et détection de blocage)
+$Global:InstallWatchdog = @{{
+    DefaultTimeoutMinutes = {watchdog_default}
+    MaxTimeoutMinutes = {watchdog_max}
+    MBPerMinute = {watchdog_mb_per_minute}
+    StallMinutes = {watchdog_stall}
+    PollSeconds = 5
+}}
 """
         return header
 
     def _generate_embedded_config(self, config: dict) -> str:
         """Génère la section de configuration embarquée."""
-        config_json = json.dumps(config, indent=2, ensure_ascii=False)
+        # Littéraux PowerShell natifs: aucune analyse JSON à l'exécution
+        config_literal = to_ps_literal(config)
 
         embedded = f"""#region Configuration Embarquée
 # Cette configuration a été personnalisée via l'interface web
 # et est embarquée directement dans le script pour une autonomie totale
 
-$Global:EmbeddedConfig = @'
-{config_json}
-'@ | ConvertFrom-Json
+$Global:EmbeddedConfig = {config_literal}
 
 #endregion Configuration Embarquée
 """
@@ -359,9 +616,124 @@ $Global:EmbeddedConfig = @'
         """Génère les fonctions utilitaires communes avec fonctionnalités avancées."""
         utilities = """#region Fonctions Utilitaires
 
-# Initialiser le log JSON structuré
-$Global:LogEntries = @()
-$Global:JSONLogPath = $LogPath -replace '\\.log$', '.json'
+# Log JSON structuré: une ligne JSON par entrée (NDJSON), écrite au fil de l'eau
+$Global:JSONLogPath = $LogPath -replace '\\.log$', '.ndjson'
+
+# Journalisation bufferisée: fichiers ouverts une seule fois, vidés périodiquement
+$Global:LogWriter = $null
+$Global:JSONLogWriter = $null
+$Global:LogBuffer = [System.Collections.Generic.List[object]]::new()
+$Global:LogFlushTimer = $null
+$Global:LogFlushIntervalMs = 2000
+$Global:LogFlushMaxEntries = 50
+$Global:LogWriteFailed = $false
+
+# Cache local des installeurs (initialisé par Initialize-InstallerCache)
+$Global:InstallerCache = $null
+
+# Journal de reprise (initialisé par Initialize-Checkpoint)
+$Global:Checkpoint = $null
+$Global:ResumeTaskName = 'PostBootSetupResume'
+$Global:RebootPending = $false
+
+# Progression pondérée des installations (Start-InstallProgress)
+$Global:InstallProgress = $null
+
+# Installations interrompues par la surveillance (Wait-InstallProcess)
+$Global:TimedOutApps = [System.Collections.Generic.List[string]]::new()
+$Global:CurrentInstallApp = $null
+
+# Durées d'étapes envoyées en fin d'exécution (Send-ExecutionTelemetry)
+$Global:StepTimings = [System.Collections.Generic.List[object]]::new()
+
+# Optimisations en arrière-plan (Start-OptimizationSteps)
+$Global:OptimizationSync = $null
+$Global:BackgroundOptimizations = $null
+$Global:BackgroundStateCounters = $null
+
+# Conflits connus entre optimisations et installations: barrières explicites
+$Global:OptimizationBarriers = @(
+    @{
+        Step = 'module:debloat'
+        Reason = 'suppression des packages Appx/Store en cours'
+        # Web apps Edge, installations scriptées (Office, Teams, WSL) et App Installer (Appx)
+        AppliesTo = { param($App) $App.webApp -or $App.customInstall -or $App.winget -eq 'Microsoft.AppInstaller' }
+    }
+)
+
+function Open-ScriptLogWriter {
+    param([string]$Path)
+
+    # Partage en lecture/écriture: le log peut être suivi pendant l'exécution
+    $stream = [System.IO.FileStream]::new($Path, [System.IO.FileMode]::Append, [System.IO.FileAccess]::Write, [System.IO.FileShare]::ReadWrite)
+    $writer = [System.IO.StreamWriter]::new($stream, [System.Text.UTF8Encoding]::new($false))
+    $writer.AutoFlush = $false
+    return $writer
+}
+
+function Initialize-ScriptLog {
+    <#
+    .SYNOPSIS
+    Ouvre les fichiers de log texte et NDJSON (appelé au premier message).
+    #>
+    try {
+        $logDir = Split-Path -Path $Global:LogPath -Parent
+        if ($logDir -and -not (Test-Path $logDir)) {
+            New-Item -ItemType Directory -Path $logDir -Force | Out-Null
+        }
+        $Global:LogWriter = Open-ScriptLogWriter -Path $Global:LogPath
+        $Global:JSONLogWriter = Open-ScriptLogWriter -Path $Global:JSONLogPath
+
+        # Première ligne NDJSON: métadonnées d'exécution
+        $header = [ordered]@{
+            Type = 'start'
+            GeneratedDate = $Global:ScriptMetadata.GeneratedDate
+            ProfileName = $Global:ScriptMetadata.ProfileName
+            ExecutionStart = $Global:StartTime.ToString('yyyy-MM-dd HH:mm:ss')
+            Computer = $env:COMPUTERNAME
+        }
+        $Global:JSONLogWriter.WriteLine(($header | ConvertTo-Json -Compress))
+    } catch {
+        Write-Host "Impossible d'ouvrir le fichier de log: $_" -ForegroundColor Yellow
+    }
+    $Global:LogFlushTimer = [System.Diagnostics.Stopwatch]::StartNew()
+}
+
+function Sync-ScriptLog {
+    <#
+    .SYNOPSIS
+    Écrit les entrées en attente et vide les tampons sur disque.
+
+    .DESCRIPTION
+    Appelée aussi avant chaque attente longue (téléchargement, installeur, script
+    d'installation): les entrées précédentes sont sur disque si le poste redémarre.
+    En cas d'échec d'écriture, les entrées restent en mémoire et sont réécrites au
+    prochain vidage; l'erreur est signalée une fois à la console.
+    #>
+    if ($Global:LogBuffer.Count -gt 0) {
+        try {
+            foreach ($entry in $Global:LogBuffer) {
+                if ($Global:LogWriter) {
+                    $Global:LogWriter.WriteLine("[$($entry.Timestamp)] [$($entry.Level)] $($entry.Message)")
+                }
+                if ($Global:JSONLogWriter) {
+                    $Global:JSONLogWriter.WriteLine(($entry | ConvertTo-Json -Depth 5 -Compress))
+                }
+            }
+            if ($Global:LogWriter) { $Global:LogWriter.Flush() }
+            if ($Global:JSONLogWriter) { $Global:JSONLogWriter.Flush() }
+            $Global:LogBuffer.Clear()
+            $Global:LogWriteFailed = $false
+        } catch {
+            # Pas de Write-ScriptLog ici (récursion): signalement direct, entrées conservées
+            if (-not $Global:LogWriteFailed) {
+                Write-Host "[ATTENTION] Écriture du log impossible ($Global:LogPath): $($_.Exception.Message) - $($Global:LogBuffer.Count) entrée(s) conservée(s) en mémoire" -ForegroundColor Yellow
+                $Global:LogWriteFailed = $true
+            }
+        }
+    }
+    if ($Global:LogFlushTimer) { $Global:LogFlushTimer.Restart() }
+}
 
 function Write-ScriptLog {
     param(
@@ -371,20 +743,22 @@ function Write-ScriptLog {
         [hashtable]$Metadata = @{}
     )
 
-    $timestamp = Get-Date -Format 'yyyy-MM-dd HH:mm:ss'
-    $logMessage = "[$timestamp] [$Level] $Message"
-
-    # Log vers fichier texte
-    try {
-        Add-Content -Path $Global:LogPath -Value $logMessage -ErrorAction SilentlyContinue
-    } catch { }
+    if (-not $Global:LogFlushTimer) {
+        Initialize-ScriptLog
+    }
 
-    # Ajouter à la collection JSON
-    $Global:LogEntries += @{
-        Timestamp = $timestamp
+    $Global:LogBuffer.Add([ordered]@{
+        Timestamp = Get-Date -Format 'yyyy-MM-dd HH:mm:ss'
         Level = $Level
         Message = $Message
         Metadata = $Metadata
+    })
+
+    # Vidage périodique; immédiat pour les avertissements et erreurs (survit à un crash)
+    if ($Level -in @('WARNING', 'ERROR') -or
+        $Global:LogBuffer.Count -ge $Global:LogFlushMaxEntries -or
+        $Global:LogFlushTimer.ElapsedMilliseconds -ge $Global:LogFlushIntervalMs) {
+        Sync-ScriptLog
     }
 
     # Affichage console
@@ -402,23 +776,395 @@ function Write-ScriptLog {
 function Save-JSONLog {
     <#
     .SYNOPSIS
-    Sauvegarde le log structuré au format JSON.
+    Termine le log structuré (ligne de fin NDJSON) et ferme les fichiers de log.
     #>
+    Write-ScriptLog "Log JSON (NDJSON): $Global:JSONLogPath" -Level INFO
+    Sync-ScriptLog
+
     try {
-        $logData = @{
-            GeneratedDate = $Global:ScriptMetadata.GeneratedDate
-            ProfileName = $Global:ScriptMetadata.ProfileName
-            ExecutionStart = $Global:StartTime.ToString('yyyy-MM-dd HH:mm:ss')
-            ExecutionEnd = (Get-Date).ToString('yyyy-MM-dd HH:mm:ss')
-            Duration = ((Get-Date) - $Global:StartTime).ToString('hh\\:mm\\:ss')
-            Entries = $Global:LogEntries
+        if ($Global:JSONLogWriter) {
+            $footer = [ordered]@{
+                Type = 'end'
+                ExecutionEnd = (Get-Date).ToString('yyyy-MM-dd HH:mm:ss')
+                Duration = ((Get-Date) - $Global:StartTime).ToString('hh\\:mm\\:ss')
+            }
+            $Global:JSONLogWriter.WriteLine(($footer | ConvertTo-Json -Compress))
+        }
+    } catch {
+        Write-Host "Impossible de terminer le log JSON: $_" -ForegroundColor Yellow
+    }
+    finally {
+        foreach ($writer in @($Global:LogWriter, $Global:JSONLogWriter)) {
+            if ($writer) { $writer.Dispose() }
+        }
+        $Global:LogWriter = $null
+        $Global:JSONLogWriter = $null
+        # Un message ultérieur rouvre les fichiers en ajout
+        $Global:LogFlushTimer = $null
+    }
+}
+
+function Initialize-Checkpoint {
+    <#
+    .SYNOPSIS
+    Charge (avec -Resume) ou réinitialise le journal des étapes terminées.
+
+    .DESCRIPTION
+    Le journal contient une ligne d'identification du script puis une ligne par étape
+    terminée (module:debloat, app:<nom>...), ajoutée dès la fin de l'étape. Un journal
+    produit par un autre script (profil ou date de génération différents) est ignoré.
+    #>
+    $identity = "# $($Global:ScriptMetadata.ProfileName) | $($Global:ScriptMetadata.GeneratedDate)"
+    $done = [System.Collections.Generic.HashSet[string]]::new([System.StringComparer]::OrdinalIgnoreCase)
+
+    try {
+        $checkpointDir = Split-Path -Path $CheckpointPath -Parent
+        if ($checkpointDir -and -not (Test-Path $checkpointDir)) {
+            New-Item -ItemType Directory -Path $checkpointDir -Force | Out-Null
+        }
+
+        if ($Resume -and (Test-Path $CheckpointPath)) {
+            $lines = [System.IO.File]::ReadAllLines($CheckpointPath)
+            if ($lines.Count -gt 0 -and $lines[0] -eq $identity) {
+                for ($i = 1; $i -lt $lines.Count; $i++) {
+                    if ($lines[$i]) { [void]$done.Add($lines[$i]) }
+                }
+                Write-ScriptLog "[REPRISE] $($done.Count) étapes déjà terminées seront ignorées" -Level INFO
+            } else {
+                Write-ScriptLog "[ATTENTION] Journal de reprise d'un autre script, exécution complète" -Level WARNING
+            }
+        } elseif ($Resume) {
+            Write-ScriptLog "[REPRISE] Aucun journal trouvé, exécution complète" -Level INFO
+        }
+
+        if ($done.Count -eq 0) {
+            [System.IO.File]::WriteAllText($CheckpointPath, "$identity`r`n")
+        }
+    } catch {
+        Write-ScriptLog "[ATTENTION] Journal de reprise indisponible: $_" -Level WARNING
+        return
+    }
+
+    $Global:Checkpoint = @{
+        Path = $CheckpointPath
+        Done = $done
+    }
+}
+
+function Test-CheckpointStep {
+    param([string]$Step)
+
+    return [bool]($Global:Checkpoint -and $Global:Checkpoint.Done.Contains($Step))
+}
+
+function Complete-CheckpointStep {
+    <#
+    .SYNOPSIS
+    Ajoute une étape terminée au journal (une ligne, écrite immédiatement).
+    #>
+    param([string]$Step)
+
+    if (-not $Global:Checkpoint -or -not $Global:Checkpoint.Done.Add($Step)) {
+        return
+    }
+    try {
+        [System.IO.File]::AppendAllText($Global:Checkpoint.Path, "$Step`r`n")
+    } catch {
+        Write-ScriptLog "[ATTENTION] Étape non journalisée ($Step): $_" -Level WARNING
+    }
+}
+
+function Register-ResumeHook {
+    <#
+    .SYNOPSIS
+    Planifie la reprise automatique (-Resume) à la prochaine ouverture de session.
+
+    .DESCRIPTION
+    Tâche planifiée à l'ouverture de session de l'utilisateur courant (privilèges élevés),
+    avec repli sur la clé RunOnce. Supprimée en fin d'exécution réussie.
+    #>
+    if ($NoResumeHook) {
+        return
+    }
+    if (-not $PSCommandPath) {
+        Write-ScriptLog "[ATTENTION] Script non exécuté depuis un fichier, reprise automatique indisponible" -Level WARNING
+        return
+    }
+
+    $arguments = "-NoProfile -ExecutionPolicy Bypass -File `"$PSCommandPath`" -Resume -Silent"
+    $userId = "$env:USERDOMAIN\\$env:USERNAME"
+
+    try {
+        $action = New-ScheduledTaskAction -Execute 'powershell.exe' -Argument $arguments
+        $trigger = New-ScheduledTaskTrigger -AtLogOn -User $userId
+        $principal = New-ScheduledTaskPrincipal -UserId $userId -LogonType Interactive -RunLevel Highest
+        Register-ScheduledTask -TaskName $Global:ResumeTaskName -Action $action -Trigger $trigger -Principal $principal -Force -ErrorAction Stop | Out-Null
+        Write-ScriptLog "Reprise automatique après redémarrage planifiée (tâche $Global:ResumeTaskName)" -Level INFO
+    } catch {
+        try {
+            $runOnce = 'HKLM:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\RunOnce'
+            Set-ItemProperty -Path $runOnce -Name $Global:ResumeTaskName -Value "powershell.exe $arguments" -ErrorAction Stop
+            Write-ScriptLog "Reprise automatique après redémarrage planifiée (RunOnce)" -Level INFO
+        } catch {
+            Write-ScriptLog "[ATTENTION] Reprise automatique indisponible: $_" -Level WARNING
+        }
+    }
+}
+
+function Unregister-ResumeHook {
+    Unregister-ScheduledTask -TaskName $Global:ResumeTaskName -Confirm:$false -ErrorAction SilentlyContinue
+    Remove-ItemProperty -Path 'HKLM:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\RunOnce' -Name $Global:ResumeTaskName -ErrorAction SilentlyContinue
+}
+
+function Complete-Checkpoint {
+    <#
+    .SYNOPSIS
+    Exécution terminée: supprime le journal de reprise et la reprise automatique.
+    #>
+    Unregister-ResumeHook
+    if ($Global:Checkpoint) {
+        Remove-Item -Path $Global:Checkpoint.Path -Force -ErrorAction SilentlyContinue
+        $Global:Checkpoint = $null
+    }
+}
+
+function New-OptimizationSync {
+    <#
+    .SYNOPSIS
+    État partagé (thread-safe) entre l'orchestrateur et les étapes d'optimisation.
+    #>
+    return [hashtable]::Synchronized(@{
+        Completed = [System.Collections.ArrayList]::Synchronized([System.Collections.ArrayList]::new())
+        Failed = [System.Collections.ArrayList]::Synchronized([System.Collections.ArrayList]::new())
+        Errors = [System.Collections.ArrayList]::Synchronized([System.Collections.ArrayList]::new())
+        Durations = [hashtable]::Synchronized(@{})
+        Labels = @{}
+        Reported = @{}
+        UIChanged = $false
+        Counters = $null
+    })
+}
+
+function Invoke-OptimizationSteps {
+    <#
+    .SYNOPSIS
+    Exécute les étapes d'optimisation dans l'ordre (premier plan ou runspace).
+
+    .NOTES
+    Aucune dépendance à Write-ScriptLog: la fonction est aussi chargée dans le runspace
+    d'arrière-plan, dont l'affichage (Write-Host) est relayé par Sync-OptimizationSteps.
+    #>
+    param(
+        [object[]]$Steps,
+        [hashtable]$Sync
+    )
+
+    foreach ($step in $Steps) {
+        Write-Host "`n======== $($step.Label) ========" -ForegroundColor Cyan
+        $timer = [System.Diagnostics.Stopwatch]::StartNew()
+        $before = Get-DesiredStateCounters
+        $parameters = $step.Parameters
+
+        try {
+            & $step.Command @parameters | Out-Null
+            [void]$Sync.Completed.Add($step.Step)
+        } catch {
+            [void]$Sync.Errors.Add("$($step.Label): $($_.Exception.Message)")
+            [void]$Sync.Failed.Add($step.Step)
+        }
+
+        $Sync.Durations[$step.Step] = [math]::Round($timer.Elapsed.TotalSeconds, 1)
+        if ($step.Step -match '^(module:)?ui' -and (Get-DesiredStateCounters).Applied -gt $before.Applied) {
+            $Sync.UIChanged = $true
+        }
+    }
+
+    $Sync.Counters = Get-DesiredStateCounters
+}
+
+function Start-OptimizationSteps {
+    <#
+    .SYNOPSIS
+    Lance les optimisations: en arrière-plan pendant les installations, ou au premier plan.
+
+    .DESCRIPTION
+    Par défaut, les étapes s'exécutent dans un runspace dédié (mêmes modules, même processus)
+    pendant que la phase d'installation, limitée par le réseau, progresse. Les conflits connus
+    sont déclarés dans $Global:OptimizationBarriers (Wait-OptimizationStep). Les étapes marquées
+    Exclusive, et toutes les étapes avec -SequentialOptimizations, s'exécutent au premier plan.
+    #>
+    param(
+        [object[]]$Steps
+    )
+
+    $Global:OptimizationSync = New-OptimizationSync
+    foreach ($step in $Steps) {
+        $Global:OptimizationSync.Labels[$step.Step] = $step.Label
+    }
+
+    $foregroundSteps = @($Steps | Where-Object { $SequentialOptimizations -or $_.Exclusive })
+    $backgroundSteps = @($Steps | Where-Object { -not ($SequentialOptimizations -or $_.Exclusive) })
+
+    if ($foregroundSteps.Count -gt 0) {
+        Invoke-OptimizationSteps -Steps $foregroundSteps -Sync $Global:OptimizationSync
+        Sync-OptimizationSteps
+    }
+    if ($backgroundSteps.Count -eq 0) {
+        return
+    }
+
+    try {
+        $runspace = [runspacefactory]::CreateRunspace()
+        $runspace.ApartmentState = 'STA'
+        $runspace.Open()
+        $runspace.SessionStateProxy.SetVariable('OptimizationSteps', $backgroundSteps)
+        $runspace.SessionStateProxy.SetVariable('OptimizationSync', $Global:OptimizationSync)
+
+        $worker = @(
+            $Global:OptimizationModules.ToString()
+            "function Invoke-OptimizationSteps {$(${function:Invoke-OptimizationSteps}.ToString())}"
+            'Invoke-OptimizationSteps -Steps $OptimizationSteps -Sync $OptimizationSync'
+        ) -join "`n"
+
+        $powershell = [powershell]::Create()
+        $powershell.Runspace = $runspace
+        [void]$powershell.AddScript($worker)
+
+        $Global:BackgroundOptimizations = @{
+            PowerShell = $powershell
+            Runspace = $runspace
+            Handle = $powershell.BeginInvoke()
+            OutputIndex = 0
+            Timer = [System.Diagnostics.Stopwatch]::StartNew()
+        }
+        Write-ScriptLog "Optimisations en arrière-plan pendant les installations: $(($backgroundSteps | ForEach-Object { $_.Label }) -join ', ')" -Level INFO
+    } catch {
+        # Runspace indisponible: exécution au premier plan
+        Write-ScriptLog "[ATTENTION] Arrière-plan indisponible ($_), optimisations au premier plan" -Level WARNING
+        $Global:BackgroundOptimizations = $null
+        Invoke-OptimizationSteps -Steps $backgroundSteps -Sync $Global:OptimizationSync
+        Sync-OptimizationSteps
+    }
+}
+
+function Sync-OptimizationSteps {
+    <#
+    .SYNOPSIS
+    Relaie l'affichage du runspace et journalise les étapes terminées (appelé entre deux applications).
+    #>
+    $sync = $Global:OptimizationSync
+    if (-not $sync) {
+        return
+    }
+
+    $background = $Global:BackgroundOptimizations
+    if ($background) {
+        $records = $background.PowerShell.Streams.Information
+        while ($background.OutputIndex -lt $records.Count) {
+            $data = $records[$background.OutputIndex].MessageData
+            $background.OutputIndex++
+            if ($data -is [System.Management.Automation.HostInformationMessage]) {
+                $color = if ($null -ne $data.ForegroundColor) { $data.ForegroundColor } else { 'Gray' }
+                Write-Host $data.Message -ForegroundColor $color -NoNewline:$data.NoNewLine
+            } else {
+                Write-Host "$data" -ForegroundColor Gray
+            }
+        }
+    }
+
+    foreach ($step in @($sync.Completed)) {
+        if ($sync.Reported.ContainsKey($step)) { continue }
+        $sync.Reported[$step] = $true
+        Complete-CheckpointStep $step
+        Add-StepTiming -Kind module -Name $step -Phase total -Seconds $sync.Durations[$step]
+        Write-ScriptLog "[OK] $($sync.Labels[$step]) terminé ($($sync.Durations[$step]) s)" -Level SUCCESS -Metadata @{ Step = $step; Seconds = $sync.Durations[$step] }
+    }
+    foreach ($step in @($sync.Failed)) {
+        if ($sync.Reported.ContainsKey($step)) { continue }
+        $sync.Reported[$step] = $true
+        $message = @($sync.Errors | Where-Object { $_ -like "$($sync.Labels[$step]):*" }) -join '; '
+        Write-ScriptLog "[ERREUR] $message" -Level ERROR -Metadata @{ Step = $step }
+    }
+}
+
+function Wait-OptimizationStep {
+    <#
+    .SYNOPSIS
+    Barrière: attend la fin d'une étape d'arrière-plan (ou de toutes si -Step est omis).
+    #>
+    param(
+        [string]$Step,
+        [string]$Reason
+    )
+
+    $background = $Global:BackgroundOptimizations
+    $sync = $Global:OptimizationSync
+    if (-not $background) {
+        return
+    }
+
+    $timer = [System.Diagnostics.Stopwatch]::StartNew()
+    $waited = $false
+    while (-not $background.Handle.IsCompleted -and
+           -not ($Step -and ($sync.Completed.Contains($Step) -or $sync.Failed.Contains($Step)))) {
+        if (-not $waited) {
+            $target = if ($Step) { $sync.Labels[$Step] } else { 'toutes les optimisations' }
+            Write-ScriptLog "[BARRIÈRE] $Reason - attente de: $target" -Level INFO
+            $waited = $true
         }
+        Sync-OptimizationSteps
+        Start-Sleep -Milliseconds 250
+    }
+    Sync-OptimizationSteps
+
+    if ($waited) {
+        Write-ScriptLog "[BARRIÈRE] Levée après $([math]::Round($timer.Elapsed.TotalSeconds, 1)) s" -Level INFO
+    }
+}
 
-        $logData | ConvertTo-Json -Depth 5 | Out-File -FilePath $Global:JSONLogPath -Encoding UTF8
-        Write-ScriptLog "Log JSON sauvegardé: $Global:JSONLogPath" -Level INFO
+function Wait-OptimizationBarriers {
+    <#
+    .SYNOPSIS
+    Applique les barrières déclarées pour une application avant son installation.
+    #>
+    param($App)
+
+    foreach ($barrier in $Global:OptimizationBarriers) {
+        if (& $barrier.AppliesTo $App) {
+            Wait-OptimizationStep -Step $barrier.Step -Reason "$($App.name): $($barrier.Reason)"
+        }
+    }
+}
+
+function Complete-OptimizationSteps {
+    <#
+    .SYNOPSIS
+    Attend la fin du runspace d'arrière-plan, relaie la fin de l'affichage et libère le runspace.
+    #>
+    $background = $Global:BackgroundOptimizations
+    if (-not $background) {
+        return
+    }
+
+    Wait-OptimizationStep -Reason "Fin de l'exécution"
+    try {
+        $background.PowerShell.EndInvoke($background.Handle) | Out-Null
     } catch {
-        Write-ScriptLog "Impossible de sauvegarder le log JSON: $_" -Level WARNING
+        Write-ScriptLog "[ERREUR] Optimisations en arrière-plan: $($_.Exception.Message)" -Level ERROR
     }
+    Sync-OptimizationSteps
+
+    foreach ($record in $background.PowerShell.Streams.Error) {
+        Write-ScriptLog "[ATTENTION] Arrière-plan: $record" -Level WARNING
+    }
+
+    # Compteurs d'état désiré du runspace (ajoutés à ceux de l'orchestrateur dans le résumé)
+    $Global:BackgroundStateCounters = $Global:OptimizationSync.Counters
+    Write-ScriptLog "Optimisations en arrière-plan: $([math]::Round($background.Timer.Elapsed.TotalSeconds, 1)) s" -Level INFO
+
+    $background.PowerShell.Dispose()
+    $background.Runspace.Dispose()
+    $Global:BackgroundOptimizations = $null
 }
 
 function Test-IsAdministrator {
@@ -522,6 +1268,325 @@ function Get-FileHash-Safe {
     }
 }
 
+function Get-StringSha256 {
+    <#
+    .SYNOPSIS
+    Calcule le SHA256 (hexadécimal) d'une chaîne de caractères.
+    #>
+    param([string]$Text)
+
+    $sha = [System.Security.Cryptography.SHA256]::Create()
+    try {
+        $bytes = $sha.ComputeHash([System.Text.Encoding]::UTF8.GetBytes($Text))
+        return ([System.BitConverter]::ToString($bytes) -replace '-', '')
+    } finally {
+        $sha.Dispose()
+    }
+}
+
+function Initialize-InstallerCache {
+    <#
+    .SYNOPSIS
+    Initialise le cache local des installeurs (adressé par contenu) sous ProgramData.
+
+    .DESCRIPTION
+    Les installeurs sont stockés dans blobs\\<SHA256>\\<fichier> et indexés par
+    SHA256(URL|ETag) dans index.json. Le cache survit aux réexécutions et aux
+    changements de profil sur le même poste.
+    #>
+    if ($NoInstallerCache) {
+        Write-ScriptLog "Cache installeurs désactivé (-NoInstallerCache)" -Level INFO
+        return
+    }
+
+    try {
+        $blobDir = Join-Path $InstallerCachePath 'blobs'
+        if (-not (Test-Path $blobDir)) {
+            New-Item -ItemType Directory -Path $blobDir -Force | Out-Null
+        }
+
+        $indexPath = Join-Path $InstallerCachePath 'index.json'
+        $entries = @{}
+        if (Test-Path $indexPath) {
+            try {
+                $rawIndex = Get-Content -Path $indexPath -Raw -ErrorAction Stop | ConvertFrom-Json
+                foreach ($prop in $rawIndex.PSObject.Properties) {
+                    $entries[$prop.Name] = $prop.Value
+                }
+            } catch {
+                Write-ScriptLog "[ATTENTION] Index du cache illisible, réinitialisation" -Level WARNING
+            }
+        }
+
+        $Global:InstallerCache = @{
+            Root = $InstallerCachePath
+            BlobDir = $blobDir
+            IndexPath = $indexPath
+            MaxBytes = [int64]$InstallerCacheMaxGB * 1GB
+            Entries = $entries
+        }
+
+        Write-ScriptLog "Cache installeurs: $InstallerCachePath ($($entries.Count) entrée(s), max $InstallerCacheMaxGB GB)" -Level INFO
+    } catch {
+        Write-ScriptLog "[ATTENTION] Cache installeurs indisponible: $_" -Level WARNING
+        $Global:InstallerCache = $null
+    }
+}
+
+function Save-InstallerCacheIndex {
+    <#
+    .SYNOPSIS
+    Écrit l'index du cache de manière atomique (fichier temporaire + renommage).
+    #>
+    if (-not $Global:InstallerCache) { return }
+
+    try {
+        $tmpIndex = "$($Global:InstallerCache.IndexPath).tmp"
+        $Global:InstallerCache.Entries | ConvertTo-Json -Depth 3 | Set-Content -Path $tmpIndex -Encoding UTF8
+        Move-Item -Path $tmpIndex -Destination $Global:InstallerCache.IndexPath -Force
+    } catch {
+        Write-ScriptLog "[ATTENTION] Impossible d'écrire l'index du cache: $_" -Level WARNING
+    }
+}
+
+function Get-RemoteETag {
+    <#
+    .SYNOPSIS
+    Récupère l'ETag (ou Last-Modified) d'une URL via une requête HEAD.
+
+    .OUTPUTS
+    String - ETag, chaîne vide si le serveur n'en fournit pas, $null si injoignable
+    #>
+    param([string]$Url)
+
+    try {
+        $head = Invoke-WebRequest -Uri $Url -Method Head -UseBasicParsing -TimeoutSec 10 -MaximumRedirection 10 -ErrorAction Stop
+        $etag = $head.Headers['ETag']
+        if (-not $etag) { $etag = $head.Headers['Last-Modified'] }
+        if ($etag -is [array]) { $etag = $etag[0] }
+        return [string]$etag
+    } catch {
+        return $null
+    }
+}
+
+function Test-CachedBlob {
+    <#
+    .SYNOPSIS
+    Vérifie qu'un fichier du cache correspond toujours à son hash SHA256.
+    #>
+    param([string]$Path, [string]$Sha256)
+
+    if (-not $Path -or -not (Test-Path $Path)) { return $false }
+    $actual = Get-FileHash-Safe -FilePath $Path
+    return ($actual -and $actual -eq $Sha256)
+}
+
+function Get-CachedInstaller {
+    <#
+    .SYNOPSIS
+    Recherche un installeur dans le cache local puis dans les partages de pré-chargement.
+
+    .DESCRIPTION
+    Ordre de recherche:
+    1. Hash attendu connu (champ sha256 du catalogue) -> blob direct, sans réseau
+    2. Clé SHA256(URL|ETag) -> entrée d'index (ETag obtenu par HEAD)
+    3. Hors ligne (HEAD impossible) -> dernière entrée connue pour cette URL
+    4. Partages de pré-chargement (InstallerCacheSeedPath, networkPath de l'app)
+    Tout fichier servi est vérifié par hash avant utilisation. Sans hash attendu,
+    un fichier pré-chargé n'est reconnu que par son nom: il n'est utilisé que hors
+    ligne (clé URL sans ETag), l'origine joignable fournit la version courante.
+
+    .OUTPUTS
+    Hashtable @{ Path; Sha256; Key; ETag } - Path est $null en cas d'absence
+    #>
+    param(
+        [string]$Url,
+        [string]$FileName,
+        [string]$ExpectedHash,
+        [string[]]$SeedPaths = @()
+    )
+
+    $cache = $Global:InstallerCache
+    $result = @{ Path = $null; Sha256 = $null; Key = $null; ETag = $null }
+    if (-not $cache) { return $result }
+
+    $now = [DateTime]::UtcNow.ToString('o')
+
+    # 1. Hash attendu connu: adressage direct par contenu
+    if ($ExpectedHash) {
+        $ExpectedHash = $ExpectedHash.ToUpper()
+        $candidate = Join-Path (Join-Path $cache.BlobDir $ExpectedHash) $FileName
+        if (Test-CachedBlob -Path $candidate -Sha256 $ExpectedHash) {
+            foreach ($entry in $cache.Entries.Values) {
+                if ($entry.Sha256 -eq $ExpectedHash) { $entry.LastAccess = $now }
+            }
+            $result.Path = $candidate
+            $result.Sha256 = $ExpectedHash
+            return $result
+        }
+    }
+
+    # 2. Clé URL + ETag
+    $etag = Get-RemoteETag -Url $Url
+    $entry = $null
+    if ($null -ne $etag) {
+        $result.ETag = $etag
+        $result.Key = Get-StringSha256 -Text "$Url|$etag"
+        $entry = $cache.Entries[$result.Key]
+    } else {
+        # 3. Hors ligne: entrée la plus récente pour cette URL
+        $entry = $cache.Entries.Values | Where-Object { $_.Url -eq $Url } |
+                 Sort-Object -Property LastAccess -Descending | Select-Object -First 1
+        $result.Key = Get-StringSha256 -Text "$Url|"
+    }
+
+    if ($entry) {
+        $candidate = Join-Path (Join-Path $cache.BlobDir $entry.Sha256) $entry.FileName
+        if (Test-CachedBlob -Path $candidate -Sha256 $entry.Sha256) {
+            $entry.LastAccess = $now
+            $result.Path = $candidate
+            $result.Sha256 = $entry.Sha256
+            return $result
+        }
+
+        # Blob corrompu ou supprimé: invalider l'entrée
+        Write-ScriptLog "[ATTENTION] Entrée de cache invalide pour $Url, suppression" -Level WARNING
+        $staleKeys = @($cache.Entries.Keys | Where-Object { $cache.Entries[$_].Sha256 -eq $entry.Sha256 })
+        foreach ($staleKey in $staleKeys) { $cache.Entries.Remove($staleKey) }
+        Remove-Item (Join-Path $cache.BlobDir $entry.Sha256) -Recurse -Force -ErrorAction SilentlyContinue
+    }
+
+    # 4. Partages de pré-chargement (même arborescence blobs\\<SHA256>\\ ou fichier à la racine)
+    if (-not $ExpectedHash -and $null -ne $etag) {
+        # Version du fichier pré-chargé invérifiable: l'origine joignable sert la version courante
+        return $result
+    }
+    foreach ($seed in ($SeedPaths | Where-Object { $_ })) {
+        $seedCandidates = @()
+        if ($ExpectedHash) {
+            $seedCandidates += Join-Path (Join-Path (Join-Path $seed 'blobs') $ExpectedHash) $FileName
+        }
+        $seedCandidates += Join-Path $seed $FileName
+
+        foreach ($seedFile in $seedCandidates) {
+            if (-not (Test-Path $seedFile -ErrorAction SilentlyContinue)) { continue }
+
+            $seedHash = Get-FileHash-Safe -FilePath $seedFile
+            if ($ExpectedHash -and $seedHash -ne $ExpectedHash) {
+                Write-ScriptLog "[ATTENTION] Hash inattendu pour $seedFile (ignoré)" -Level WARNING
+                continue
+            }
+
+            $localCopy = Join-Path $env:TEMP $FileName
+            Copy-Item -Path $seedFile -Destination $localCopy -Force -ErrorAction SilentlyContinue
+            if (Test-Path $localCopy) {
+                Write-ScriptLog "[OK] Installeur pré-chargé depuis $seed" -Level SUCCESS
+                $added = Add-InstallerToCache -SourcePath $localCopy -Key $result.Key -Url $Url -ETag $result.ETag -FileName $FileName
+                if ($added) {
+                    $result.Path = $added.Path
+                    $result.Sha256 = $added.Sha256
+                    return $result
+                }
+            }
+        }
+    }
+
+    return $result
+}
+
+function Add-InstallerToCache {
+    <#
+    .SYNOPSIS
+    Déplace un installeur téléchargé dans le cache et met à jour l'index.
+
+    .OUTPUTS
+    Hashtable @{ Path; Sha256 } ou $null si le cache est indisponible
+    #>
+    param(
+        [string]$SourcePath,
+        [string]$Key,
+        [string]$Url,
+        [string]$ETag,
+        [string]$FileName
+    )
+
+    $cache = $Global:InstallerCache
+    if (-not $cache -or -not (Test-Path $SourcePath)) { return $null }
+
+    try {
+        $sha256 = Get-FileHash-Safe -FilePath $SourcePath
+        if (-not $sha256) { return $null }
+
+        $blobPath = Join-Path $cache.BlobDir $sha256
+        $targetPath = Join-Path $blobPath $FileName
+
+        if (Test-Path $targetPath) {
+            # Contenu déjà présent (autre URL ou autre ETag): dédupliquer
+            Remove-Item $SourcePath -Force -ErrorAction SilentlyContinue
+        } else {
+            New-Item -ItemType Directory -Path $blobPath -Force | Out-Null
+            Move-Item -Path $SourcePath -Destination $targetPath -Force -ErrorAction Stop
+        }
+
+        if (-not $Key) { $Key = Get-StringSha256 -Text "$Url|$ETag" }
+        $cache.Entries[$Key] = [PSCustomObject]@{
+            Url = $Url
+            ETag = $ETag
+            Sha256 = $sha256
+            FileName = $FileName
+            Size = (Get-Item $targetPath).Length
+            LastAccess = [DateTime]::UtcNow.ToString('o')
+        }
+
+        Invoke-InstallerCacheEviction -Keep $sha256
+        Save-InstallerCacheIndex
+
+        return @{ Path = $targetPath; Sha256 = $sha256 }
+    } catch {
+        Write-ScriptLog "[ATTENTION] Mise en cache impossible: $_" -Level WARNING
+        return $null
+    }
+}
+
+function Invoke-InstallerCacheEviction {
+    <#
+    .SYNOPSIS
+    Évince les blobs les moins récemment utilisés (LRU) jusqu'à respecter la taille maximale.
+    #>
+    param([string]$Keep)
+
+    $cache = $Global:InstallerCache
+    if (-not $cache) { return }
+
+    # Un blob peut être référencé par plusieurs clés: dernière utilisation = max des entrées
+    $blobs = @{}
+    foreach ($entry in $cache.Entries.Values) {
+        if (-not $blobs.ContainsKey($entry.Sha256)) {
+            $blobs[$entry.Sha256] = @{ Size = [int64]$entry.Size; LastAccess = $entry.LastAccess }
+        } elseif ($entry.LastAccess -gt $blobs[$entry.Sha256].LastAccess) {
+            $blobs[$entry.Sha256].LastAccess = $entry.LastAccess
+        }
+    }
+
+    $totalBytes = [int64]0
+    foreach ($blob in $blobs.Values) { $totalBytes += $blob.Size }
+    if ($totalBytes -le $cache.MaxBytes) { return }
+
+    $lruOrder = $blobs.GetEnumerator() | Sort-Object { $_.Value.LastAccess }
+    foreach ($blob in $lruOrder) {
+        if ($totalBytes -le $cache.MaxBytes) { break }
+        if ($blob.Key -eq $Keep) { continue }
+
+        Remove-Item (Join-Path $cache.BlobDir $blob.Key) -Recurse -Force -ErrorAction SilentlyContinue
+        $evictedKeys = @($cache.Entries.Keys | Where-Object { $cache.Entries[$_].Sha256 -eq $blob.Key })
+        foreach ($evictedKey in $evictedKeys) { $cache.Entries.Remove($evictedKey) }
+        $totalBytes -= $blob.Value.Size
+
+        Write-ScriptLog "Cache: éviction $($blob.Key.Substring(0, 12))... ($([math]::Round($blob.Value.Size / 1MB, 1)) MB)" -Level INFO
+    }
+}
+
 function Install-NotepadPlusPlusPlugins {
     <#
     .SYNOPSIS
@@ -623,6 +1688,379 @@ function Install-NotepadPlusPlusPlugins {
     return $true
 }
 
+function Add-StepTiming {
+    <#
+    .SYNOPSIS
+    Enregistre la durée d'une étape pour la télémétrie (app: download/verify/install/total, module: total).
+    #>
+    param(
+        [ValidateSet('app', 'module')]
+        [string]$Kind,
+        [string]$Name,
+        [ValidateSet('download', 'verify', 'install', 'total')]
+        [string]$Phase,
+        [double]$Seconds,
+        [bool]$Success = $true,
+        [bool]$Measured = $true
+    )
+
+    $Global:StepTimings.Add(@{
+        kind = $Kind
+        name = $Name
+        phase = $Phase
+        seconds = [math]::Round($Seconds, 2)
+        success = $Success
+        measured = $Measured
+    })
+}
+
+function Send-ExecutionTelemetry {
+    <#
+    .SYNOPSIS
+    Envoie les durées d'étapes à l'API du générateur (POST /api/telemetry), si -TelemetryUrl est défini.
+
+    .DESCRIPTION
+    Aucune donnée d'identification du poste: l'exécution est identifiée par un GUID aléatoire.
+    Un échec d'envoi est journalisé sans interrompre le script.
+    #>
+    param([bool]$Success = $true)
+
+    if (-not $TelemetryUrl -or $Global:StepTimings.Count -eq 0) {
+        return
+    }
+
+    $report = @{
+        runId = [guid]::NewGuid().ToString()
+        profile = $Global:ScriptMetadata.ProfileName
+        version = $Global:ScriptMetadata.Version
+        totalSeconds = [math]::Round(((Get-Date) - $Global:StartTime).TotalSeconds, 1)
+        success = $Success
+        steps = @($Global:StepTimings)
+    }
+
+    try {
+        $body = [System.Text.Encoding]::UTF8.GetBytes(($report | ConvertTo-Json -Depth 4 -Compress))
+        Invoke-RestMethod -Uri "$($TelemetryUrl.TrimEnd('/'))/api/telemetry" -Method Post -Body $body -ContentType 'application/json; charset=utf-8' -TimeoutSec 15 -ErrorAction Stop | Out-Null
+        Write-ScriptLog "Télémétrie envoyée ($($Global:StepTimings.Count) étapes)" -Level INFO
+    } catch {
+        Write-ScriptLog "[ATTENTION] Envoi de la télémétrie impossible: $($_.Exception.Message)" -Level WARNING
+    }
+}
+
+function Get-AppEstimatedSeconds {
+    param($App)
+
+    # Coût calculé par le générateur (taille annoncée ou durées observées)
+    if ($App.estimatedSeconds) {
+        return [double]$App.estimatedSeconds
+    }
+    return 90.0
+}
+
+function Start-InstallProgress {
+    <#
+    .SYNOPSIS
+    Initialise la progression pondérée: chaque application pèse son coût estimé (secondes).
+    #>
+    param([object[]]$Apps)
+
+    $total = 0.0
+    foreach ($app in $Apps) {
+        $total += Get-AppEstimatedSeconds -App $app
+    }
+
+    $Global:InstallProgress = @{
+        TotalWeight = [math]::Max($total, 1.0)
+        DoneWeight = 0.0
+        MeasuredWeight = 0.0
+        MeasuredSeconds = 0.0
+        Count = $Apps.Count
+        Index = 0
+        Current = $null
+        CurrentWeight = 0.0
+        CurrentTimer = [System.Diagnostics.Stopwatch]::new()
+        Durations = @{}
+    }
+    Write-ScriptLog "Durée estimée des installations: ~$([math]::Ceiling($total / 60)) min" -Level INFO -Metadata @{ EstimatedSeconds = [math]::Round($total) }
+}
+
+function Enter-InstallProgress {
+    param(
+        $App,
+        [int]$Index
+    )
+
+    $progress = $Global:InstallProgress
+    if (-not $progress) {
+        return
+    }
+    $progress.Current = $App.name
+    $progress.CurrentWeight = Get-AppEstimatedSeconds -App $App
+    $progress.Index = $Index
+    $progress.CurrentTimer.Restart()
+    Update-InstallProgress
+}
+
+function Complete-InstallProgress {
+    <#
+    .SYNOPSIS
+    Crédite le coût d'une application terminée et met à jour le débit mesuré.
+
+    .PARAMETER Skipped
+    Application ignorée (reprise): créditée sans influencer le débit mesuré.
+
+    .PARAMETER Success
+    Résultat de l'installation (durée remontée par la télémétrie)
+    #>
+    param(
+        $App,
+        [switch]$Skipped,
+        [bool]$Success = $true
+    )
+
+    $progress = $Global:InstallProgress
+    if (-not $progress) {
+        return
+    }
+
+    $weight = Get-AppEstimatedSeconds -App $App
+    $progress.DoneWeight += $weight
+
+    if (-not $Skipped) {
+        $seconds = $progress.CurrentTimer.Elapsed.TotalSeconds
+        $progress.Durations[$App.name] = [math]::Round($seconds, 1)
+        # Une application déjà présente se termine en quelques secondes: hors mesure du débit
+        $measured = $seconds -ge 30 -or $seconds -ge 0.15 * $weight
+        if ($measured) {
+            $progress.MeasuredWeight += $weight
+            $progress.MeasuredSeconds += $seconds
+        }
+        Add-StepTiming -Kind app -Name $App.name -Phase total -Seconds $seconds -Success $Success -Measured $measured
+    }
+    $progress.CurrentTimer.Reset()
+    $progress.Current = $null
+    $progress.CurrentWeight = 0.0
+    Update-InstallProgress
+}
+
+function Update-InstallProgress {
+    <#
+    .SYNOPSIS
+    Affiche la progression pondérée et l'ETA (appelé aussi pendant l'attente d'un installeur).
+
+    .DESCRIPTION
+    Le ratio secondes réelles / secondes estimées des applications terminées corrige
+    l'estimation du reste. L'application en cours est créditée au prorata du temps écoulé,
+    sans dépasser 95 % de son coût.
+    #>
+    $progress = $Global:InstallProgress
+    if (-not $progress) {
+        return
+    }
+
+    $ratio = if ($progress.MeasuredWeight -gt 0) { $progress.MeasuredSeconds / $progress.MeasuredWeight } else { 1.0 }
+    $ratio = [math]::Max($ratio, 0.05)
+    $partial = 0.0
+    if ($progress.Current) {
+        $partial = [math]::Min($progress.CurrentTimer.Elapsed.TotalSeconds / $ratio, 0.95 * $progress.CurrentWeight)
+    }
+
+    $done = [math]::Min($progress.DoneWeight + $partial, $progress.TotalWeight)
+    $percent = [int][math]::Floor(100 * $done / $progress.TotalWeight)
+    $remaining = [int][math]::Ceiling(($progress.TotalWeight - $done) * $ratio)
+
+    $status = if ($progress.Current) {
+        "$($progress.Current) ($($progress.Index)/$($progress.Count)) - reste ~$([math]::Ceiling($remaining / 60)) min"
+    } else {
+        "$($progress.Index)/$($progress.Count) - reste ~$([math]::Ceiling($remaining / 60)) min"
+    }
+    Write-Progress -Activity "Installation des applications" -Status $status -PercentComplete $percent -SecondsRemaining $remaining
+}
+
+function Get-AppInstallTimeout {
+    <#
+    .SYNOPSIS
+    Délai maximal d'installation d'une application, en minutes.
+
+    .DESCRIPTION
+    Champ timeoutMinutes du catalogue s'il est défini, sinon délai par défaut augmenté
+    selon la taille annoncée (size: "150 MB", "3 GB"), plafonné à MaxTimeoutMinutes.
+    #>
+    param($App)
+
+    $watchdog = $Global:InstallWatchdog
+    if ($App -and $App.timeoutMinutes) {
+        return [int]$App.timeoutMinutes
+    }
+
+    $minutes = $watchdog.DefaultTimeoutMinutes
+    if ($App -and "$($App.size)" -match '([\\d.,]+)\\s*(KB|MB|GB)') {
+        $sizeMB = [double]($Matches[1] -replace ',', '.') * @{ KB = 1 / 1024; MB = 1; GB = 1024 }[$Matches[2]]
+        $minutes += [math]::Ceiling($sizeMB / $watchdog.MBPerMinute)
+    }
+    return [int][math]::Min($minutes, $watchdog.MaxTimeoutMinutes)
+}
+
+function Get-ProcessTreeActivity {
+    <#
+    .SYNOPSIS
+    Activité cumulée (temps CPU, octets lus/écrits) d'un arbre de processus, en une requête CIM.
+
+    .PARAMETER WatchProcessNames
+    Processus hors arbre comptés aussi (service msiexec, OfficeClickToRun...), s'ils ont
+    démarré après l'installeur.
+    #>
+    param(
+        [int]$RootId,
+        [datetime]$Since,
+        [string[]]$WatchProcessNames = @()
+    )
+
+    $processes = @(Get-CimInstance -ClassName Win32_Process -Property ProcessId, ParentProcessId, Name, CreationDate, UserModeTime, KernelModeTime, ReadTransferCount, WriteTransferCount, OtherTransferCount -ErrorAction SilentlyContinue)
+
+    $byParent = @{}
+    foreach ($proc in $processes) {
+        $parentId = [int]$proc.ParentProcessId
+        if (-not $byParent.ContainsKey($parentId)) {
+            $byParent[$parentId] = [System.Collections.Generic.List[object]]::new()
+        }
+        $byParent[$parentId].Add($proc)
+    }
+
+    # Parcours de l'arbre (les PID réutilisés avant le démarrage sont ignorés)
+    $tree = @{}
+    $pending = [System.Collections.Generic.Queue[int]]::new()
+    $pending.Enqueue($RootId)
+    foreach ($proc in $processes) {
+        if ($proc.ProcessId -eq $RootId) { $tree[$RootId] = $proc }
+    }
+    while ($pending.Count -gt 0) {
+        $parentId = $pending.Dequeue()
+        if (-not $byParent.ContainsKey($parentId)) { continue }
+        foreach ($child in $byParent[$parentId]) {
+            if (-not $tree.ContainsKey([int]$child.ProcessId) -and $child.CreationDate -ge $Since) {
+                $tree[[int]$child.ProcessId] = $child
+                $pending.Enqueue([int]$child.ProcessId)
+            }
+        }
+    }
+    foreach ($proc in $processes) {
+        if ([System.IO.Path]::GetFileNameWithoutExtension($proc.Name) -in $WatchProcessNames -and $proc.CreationDate -ge $Since) {
+            $tree[[int]$proc.ProcessId] = $proc
+        }
+    }
+
+    $cpu = [int64]0
+    $io = [int64]0
+    foreach ($proc in $tree.Values) {
+        $cpu += [int64]$proc.UserModeTime + [int64]$proc.KernelModeTime
+        $io += [int64]$proc.ReadTransferCount + [int64]$proc.WriteTransferCount + [int64]$proc.OtherTransferCount
+    }
+
+    return @{
+        Cpu = $cpu
+        Io = $io
+        Ids = @($tree.Keys)
+    }
+}
+
+function Wait-InstallProcess {
+    <#
+    .SYNOPSIS
+    Attend la fin d'un installeur sous surveillance: délai maximal et détection de blocage.
+
+    .DESCRIPTION
+    L'activité (CPU et E/S) de l'arbre de processus de l'installeur est relevée toutes les
+    PollSeconds. Si le délai est dépassé ou si l'arbre reste inactif pendant StallMinutes
+    (installeur bloqué sur une fenêtre invisible), l'arbre est arrêté, l'application est
+    enregistrée comme interrompue et la fonction rend la main.
+
+    .PARAMETER TimeoutMinutes
+    Délai maximal; par défaut celui de l'application en cours (Get-AppInstallTimeout).
+
+    .OUTPUTS
+    Hashtable: ExitCode, TimedOut, Reason, Seconds.
+    #>
+    param(
+        [System.Diagnostics.Process]$Process,
+        [string]$Name,
+        [int]$TimeoutMinutes = 0,
+        [int]$StallMinutes = 0,
+        [string[]]$WatchProcessNames = @()
+    )
+
+    $watchdog = $Global:InstallWatchdog
+    if ($TimeoutMinutes -le 0) {
+        $TimeoutMinutes = Get-AppInstallTimeout -App $Global:CurrentInstallApp
+    }
+    if ($StallMinutes -le 0) {
+        $StallMinutes = if ($Global:CurrentInstallApp -and $Global:CurrentInstallApp.stallMinutes) { [int]$Global:CurrentInstallApp.stallMinutes } else { $watchdog.StallMinutes }
+    }
+    if (-not $Name) {
+        $Name = $Process.ProcessName
+    }
+
+    # Conserver le handle: le code de sortie reste lisible après la fin du processus
+    $null = $Process.Handle
+    Sync-ScriptLog
+    $since = $Process.StartTime.AddSeconds(-1)
+    $timer = [System.Diagnostics.Stopwatch]::StartNew()
+    $idleTimer = [System.Diagnostics.Stopwatch]::new()
+    $lastActivity = $null
+    $reason = $null
+    $nextReport = 60
+
+    while (-not $Process.WaitForExit($watchdog.PollSeconds * 1000)) {
+        $activity = Get-ProcessTreeActivity -RootId $Process.Id -Since $since -WatchProcessNames $WatchProcessNames
+
+        # Inactif: moins de 0,1 s de CPU et 64 Ko d'E/S sur l'intervalle
+        if ($lastActivity -and ($activity.Cpu - $lastActivity.Cpu) -lt 1000000 -and ($activity.Io - $lastActivity.Io) -lt 64KB) {
+            if (-not $idleTimer.IsRunning) { $idleTimer.Start() }
+        } else {
+            $idleTimer.Reset()
+        }
+        $lastActivity = $activity
+
+        if ($timer.Elapsed.TotalMinutes -ge $TimeoutMinutes) {
+            $reason = "délai de $TimeoutMinutes min dépassé"
+            break
+        }
+        if ($idleTimer.Elapsed.TotalMinutes -ge $StallMinutes) {
+            $reason = "aucune activité CPU/disque depuis $StallMinutes min"
+            break
+        }
+
+        if ($timer.Elapsed.TotalSeconds -ge $nextReport) {
+            Write-Host "    [$([math]::Floor($timer.Elapsed.TotalMinutes))/$TimeoutMinutes min] $Name : installation en cours..." -ForegroundColor Gray
+            $nextReport += 60
+        }
+
+        # Relayer l'affichage des optimisations en arrière-plan et actualiser l'ETA pendant l'attente
+        Sync-OptimizationSteps
+        Update-InstallProgress
+        if ($Global:LogBuffer.Count -gt 0) {
+            Sync-ScriptLog
+        }
+    }
+
+    $seconds = [math]::Round($timer.Elapsed.TotalSeconds, 1)
+    if (-not $reason) {
+        $Process.WaitForExit()
+        return @{ ExitCode = $Process.ExitCode; TimedOut = $false; Reason = $null; Seconds = $seconds }
+    }
+
+    # Arrêt de l'arbre de processus (installeur, processus enfants et surveillés)
+    $activity = Get-ProcessTreeActivity -RootId $Process.Id -Since $since -WatchProcessNames $WatchProcessNames
+    taskkill.exe /PID $Process.Id /T /F 2>&1 | Out-Null
+    foreach ($id in $activity.Ids) {
+        Stop-Process -Id $id -Force -ErrorAction SilentlyContinue
+    }
+
+    $Global:TimedOutApps.Add($Name)
+    Write-ScriptLog "[TIMEOUT] $Name : $reason, arrêt de $($activity.Ids.Count) processus" -Level ERROR -Metadata @{ App = $Name; Reason = $reason; Seconds = $seconds; TimeoutMinutes = $TimeoutMinutes }
+    return @{ ExitCode = $null; TimedOut = $true; Reason = $reason; Seconds = $seconds }
+}
+
 function Install-WingetApp {
     <#
     .SYNOPSIS
@@ -646,12 +2084,30 @@ function Install-WingetApp {
 
     $maxRetries = 3
     $retryCount = 0
+    $Global:CurrentInstallApp = $App
+    $outputPath = Join-Path $env:TEMP "PostBootSetup_winget_$PID.log"
 
     while ($retryCount -lt $maxRetries) {
         try {
-            $output = winget install --id $App.winget --silent --accept-package-agreements --accept-source-agreements 2>&1 | Out-String
+            # Processus surveillé (délai, blocage) au lieu d'un appel sans limite de durée
+            $process = Start-Process -FilePath 'winget.exe' -ArgumentList "install --id $($App.winget) --silent --accept-package-agreements --accept-source-agreements" -NoNewWindow -PassThru -RedirectStandardOutput $outputPath -ErrorAction Stop
+            $watch = Wait-InstallProcess -Process $process -Name $App.name -WatchProcessNames @('WindowsPackageManagerServer', 'msiexec')
+            Add-StepTiming -Kind app -Name $App.name -Phase install -Seconds $watch.Seconds -Success (-not $watch.TimedOut -and $watch.ExitCode -eq 0)
+            $output = Get-Content -Path $outputPath -Raw -ErrorAction SilentlyContinue
+            Remove-Item -Path $outputPath -Force -ErrorAction SilentlyContinue
+
+            if ($watch.TimedOut) {
+                # Installeur bloqué: pas de nouvelle tentative, passage à l'application suivante
+                return $false
+            }
+
+            if ($watch.ExitCode -eq -1978335212) {
+                # APPINSTALLER_CLI_ERROR_NO_APPLICATIONS_FOUND: identifiant absent de la source, réessayer est inutile
+                Write-ScriptLog "Identifiant winget introuvable: $($App.winget)" -Level WARNING
+                break
+            }
 
-            if ($LASTEXITCODE -eq 0 -or $output -match 'successfully installed') {
+            if ($watch.ExitCode -eq 0 -or $output -match 'successfully installed') {
                 Write-ScriptLog "[OK] $($App.name) installé" -Level SUCCESS -Metadata @{ Winget = $App.winget; Retries = $retryCount }
 
                 # Installer les plugins si c'est Notepad++ et qu'ils sont spécifiés
@@ -812,10 +2268,22 @@ function Install-CustomApp {
 
         $tempPath = Join-Path $env:TEMP $fileName
 
+        # Cache local: éviter le téléchargement si l'installeur est déjà connu
+        $cached = Get-CachedInstaller -Url $downloadUrl -FileName $fileName -ExpectedHash $App.sha256 -SeedPaths @($InstallerCacheSeedPath, $App.networkPath)
+        $isCached = [bool]$cached.Path
+        if ($isCached) {
+            $tempPath = $cached.Path
+            Write-ScriptLog "[OK] Installeur servi depuis le cache local" -Level SUCCESS -Metadata @{ Cache = 'HIT'; Sha256 = $cached.Sha256 }
+        }
+
         # Téléchargement avec retry
         $maxRetries = 3
         $retryCount = 0
-        $downloaded = $false
+        $downloaded = $isCached
+        $phaseTimer = [System.Diagnostics.Stopwatch]::StartNew()
+
+        # Proxy cache LAN: tenté en premier, téléchargement direct en cas d'échec
+        $useProxy = [bool]$DownloadProxyUrl
 
         while ($retryCount -lt $maxRetries -and -not $downloaded) {
             try {
@@ -826,7 +2294,14 @@ function Install-CustomApp {
                     Remove-Item $tempPath -Force -ErrorAction SilentlyContinue
                 }
 
-                Invoke-WebRequest -Uri $downloadUrl -OutFile $tempPath -UseBasicParsing -TimeoutSec 300 -MaximumRedirection 10 -ErrorAction Stop
+                $sourceUrl = $downloadUrl
+                if ($useProxy) {
+                    $sourceUrl = "$($DownloadProxyUrl.TrimEnd('/'))/api/proxy?url=$([uri]::EscapeDataString($downloadUrl))"
+                    Write-ScriptLog "Téléchargement via le proxy LAN: $DownloadProxyUrl" -Level INFO
+                }
+
+                Sync-ScriptLog
+                Invoke-WebRequest -Uri $sourceUrl -OutFile $tempPath -UseBasicParsing -TimeoutSec 300 -MaximumRedirection 10 -ErrorAction Stop
 
                 if (Test-Path $tempPath) {
                     $fileSize = (Get-Item $tempPath).Length
@@ -862,6 +2337,11 @@ function Install-CustomApp {
                     throw "Fichier non créé"
                 }
             } catch {
+                if ($useProxy) {
+                    Write-ScriptLog "[ATTENTION] Proxy LAN indisponible ($($_.Exception.Message)), téléchargement direct" -Level WARNING
+                    $useProxy = $false
+                    continue
+                }
                 $retryCount++
                 if ($retryCount -lt $maxRetries) {
                     Write-ScriptLog "Tentative $retryCount/$maxRetries échouée, nouvelle tentative..." -Level WARNING
@@ -872,40 +2352,73 @@ function Install-CustomApp {
             }
         }
 
-        # Calculer le hash pour validation
-        $fileHash = Get-FileHash-Safe -FilePath $tempPath
+        if (-not $isCached) {
+            Add-StepTiming -Kind app -Name $App.name -Phase download -Seconds $phaseTimer.Elapsed.TotalSeconds
+        }
+        $phaseTimer.Restart()
+
+        # Mettre en cache le téléchargement (le fichier est déplacé dans le cache)
+        if (-not $isCached -and $Global:InstallerCache) {
+            if ($App.sha256 -and (Get-FileHash-Safe -FilePath $tempPath) -ne $App.sha256.ToUpper()) {
+                throw "Hash SHA256 du téléchargement différent de celui du catalogue"
+            }
+            $added = Add-InstallerToCache -SourcePath $tempPath -Key $cached.Key -Url $downloadUrl -ETag $cached.ETag -FileName $fileName
+            if ($added) {
+                $tempPath = $added.Path
+                $cached.Sha256 = $added.Sha256
+                $isCached = $true
+            }
+        }
+
+        # Calculer le hash pour validation (déjà connu si servi par le cache)
+        $fileHash = if ($cached.Sha256) { $cached.Sha256 } else { Get-FileHash-Safe -FilePath $tempPath }
         if ($fileHash) {
             Write-ScriptLog "Hash SHA256: $fileHash" -Level INFO -Metadata @{ Hash = $fileHash }
         }
+        Add-StepTiming -Kind app -Name $App.name -Phase verify -Seconds $phaseTimer.Elapsed.TotalSeconds
 
         # Déterminer les arguments d'installation
         $installArgs = Get-InstallArguments -FilePath $tempPath -CustomArgs $App.installArgs
 
         if ($null -eq $installArgs) {
             Write-ScriptLog "[ATTENTION] Type de fichier non supporté pour installation automatique" -Level WARNING
-            Remove-Item $tempPath -ErrorAction SilentlyContinue
+            if (-not $isCached) { Remove-Item $tempPath -ErrorAction SilentlyContinue }
             return $false
         }
 
         Write-ScriptLog "Installation de $($App.name) avec args: $installArgs" -Level INFO
 
         # Pour les fichiers MSI, utiliser msiexec.exe
+        $Global:CurrentInstallApp = $App
         $extension = [System.IO.Path]::GetExtension($tempPath).ToLower()
         if ($extension -eq '.msi') {
-            $process = Start-Process -FilePath 'msiexec.exe' -ArgumentList "/i `"$tempPath`" $installArgs" -Wait -NoNewWindow -PassThru -ErrorAction Stop
+            $process = Start-Process -FilePath 'msiexec.exe' -ArgumentList "/i `"$tempPath`" $installArgs" -NoNewWindow -PassThru -ErrorAction Stop
+            $watch = Wait-InstallProcess -Process $process -Name $App.name -WatchProcessNames @('msiexec')
         } else {
-            $process = Start-Process -FilePath $tempPath -ArgumentList $installArgs -Wait -NoNewWindow -PassThru -ErrorAction Stop
+            $process = Start-Process -FilePath $tempPath -ArgumentList $installArgs -NoNewWindow -PassThru -ErrorAction Stop
+            $watch = Wait-InstallProcess -Process $process -Name $App.name
+        }
+
+        Add-StepTiming -Kind app -Name $App.name -Phase install -Seconds $watch.Seconds -Success (-not $watch.TimedOut -and ($watch.ExitCode -eq 0 -or $watch.ExitCode -eq 3010))
+
+        # Nettoyer le fichier temporaire (les installeurs en cache sont conservés)
+        if (-not $isCached) {
+            Remove-Item $tempPath -ErrorAction SilentlyContinue
         }
 
-        # Nettoyer le fichier temporaire
-        Remove-Item $tempPath -ErrorAction SilentlyContinue
+        if ($watch.TimedOut) {
+            return $false
+        }
 
         # Codes de sortie acceptables (0 = succès, 3010 = redémarrage requis)
-        if ($process.ExitCode -eq 0 -or $process.ExitCode -eq 3010) {
-            Write-ScriptLog "[OK] $($App.name) installé (code: $($process.ExitCode))" -Level SUCCESS -Metadata @{ ExitCode = $process.ExitCode; URL = $App.url }
+        if ($watch.ExitCode -eq 0 -or $watch.ExitCode -eq 3010) {
+            if ($watch.ExitCode -eq 3010) {
+                $Global:RebootPending = $true
+            }
+            Write-ScriptLog "[OK] $($App.name) installé (code: $($watch.ExitCode))" -Level SUCCESS -Metadata @{ ExitCode = $watch.ExitCode; URL = $App.url; Seconds = $watch.Seconds }
             return $true
         } else {
-            Write-ScriptLog "[ERREUR] $($App.name) - Code erreur: $($process.ExitCode)" -Level ERROR -Metadata @{ ExitCode = $process.ExitCode }
+            Write-ScriptLog "[ERREUR] $($App.name) - Code erreur: $($watch.ExitCode)" -Level ERROR -Metadata @{ ExitCode = $watch.ExitCode }
             return $false
         }
     } catch {
@@ -1025,8 +2538,10 @@ function Install-CustomScriptApp {
     try {
         Write-ScriptLog "Installation personnalisée: $($App.name)..." -Level INFO
 
-        # Exécuter le script d'installation fourni
+        # Exécuter le script d'installation fourni (Wait-InstallProcess y applique le délai de l'application)
+        $Global:CurrentInstallApp = $App
         $scriptBlock = [ScriptBlock]::Create($App.installScript)
+        Sync-ScriptLog
         & $scriptBlock
 
         # Installer les plugins si c'est Notepad++ et qu'ils sont spécifiés
@@ -1058,16 +2573,15 @@ function Install-CustomScriptApp {
         if 'debloat' not in modules_to_include:
             modules_to_include.insert(0, 'debloat')
 
-        # Mapping nom module -> fichier
-        module_files = {
-            'debloat': 'Debloat-Windows',
-            'performance': 'Optimize-Performance',
-            'ui': 'Customize-UI'
-        }
+        # Couches partagées (registre par lot, état désiré), utilisées par tous les modules: toujours incluses en premier
+        for shared_module in ('Registry-Batch', 'Desired-State'):
+            modules_code_parts.append(f"#region Module {shared_module}")
+            modules_code_parts.append(self._load_module(shared_module))
+            modules_code_parts.append(f"#endregion Module {shared_module}")
 
         for module_name in modules_to_include:
-            if module_name in module_files:
-                module_file = module_files[module_name]
+            if module_name in MODULE_FILES:
+                module_file = MODULE_FILES[module_name]
                 module_code = self._load_module(module_file)
 
                 if module_code:
@@ -1075,7 +2589,15 @@ function Install-CustomScriptApp {
                     modules_code_parts.append(module_code)
                     modules_code_parts.append(f"#endregion Module {module_file}")
 
-        return '\n\n'.join(modules_code_parts)
+        # Code des modules conservé dans un bloc: chargé ici (dot-source) et dans le runspace
+        # des optimisations en arrière-plan (Start-OptimizationSteps)
+        modules_code = '\n\n'.join(modules_code_parts)
+        return f"""#region Modules
+$Global:OptimizationModules = {{
+{modules_code}
+}}
+. $Global:OptimizationModules
+#endregion Modules"""
 
     def _generate_orchestrator(self, config: dict) -> str:
         """Génère l'orchestrateur principal qui exécute tout."""
@@ -1087,33 +2609,29 @@ function Install-CustomScriptApp {
             modules_calls.append("""
     # Debloat Windows (obligatoire)
     if (-not $NoDebloat) {
-        Write-ScriptLog "======== DEBLOAT WINDOWS ========" -Level INFO
-        Invoke-WindowsDebloat
+        $optimizationSteps.Add(@{ Step = 'module:debloat'; Label = 'DEBLOAT WINDOWS'; Command = 'Invoke-WindowsDebloat'; Parameters = @{} })
     }
 """)
 
         if 'performance' in config.get('modules', []):
             perf_options = config.get('performance_options', {})
-            perf_json = json.dumps(perf_options)
+            perf_literal = to_ps_literal(perf_options, level=1)
+            # Les réglages réseau (netsh, RSS) peuvent interrompre les téléchargements: premier plan
+            perf_exclusive = '$true' if perf_options.get('Network') else '$false'
             modules_calls.append(f"""
     # Optimisations de performance
-    Write-ScriptLog "======== OPTIMISATIONS PERFORMANCE ========" -Level INFO
-    $perfOptionsJson = '{perf_json}' | ConvertFrom-Json
-    $perfOptions = @{{}}
-    $perfOptionsJson.PSObject.Properties | ForEach-Object {{ $perfOptions[$_.Name] = $_.Value }}
-    Invoke-PerformanceOptimizations -Options $perfOptions
+    $perfOptions = {perf_literal}
+    $optimizationSteps.Add(@{{ Step = 'module:performance'; Label = 'OPTIMISATIONS PERFORMANCE'; Command = 'Invoke-PerformanceOptimizations'; Parameters = @{{ Options = $perfOptions }}; Exclusive = {perf_exclusive} }})
 """)
 
         if 'ui' in config.get('modules', []):
             ui_options = config.get('ui_options', {})
-            ui_json = json.dumps(ui_options)
+            ui_literal = to_ps_literal(ui_options, level=1)
             modules_calls.append(f"""
-    # Personnalisation interface
-    Write-ScriptLog "======== PERSONNALISATION UI ========" -Level INFO
-    $uiOptionsJson = '{ui_json}' | ConvertFrom-Json
-    $uiOptions = @{{}}
-    $uiOptionsJson.PSObject.Properties | ForEach-Object {{ $uiOptions[$_.Name] = $_.Value }}
-    Invoke-UICustomizations -Options $uiOptions -RestartExplorer $false
+    # Personnalisation interface, puis nettoyage de la barre des tâches
+    $uiOptions = {ui_literal}
+    $optimizationSteps.Add(@{{ Step = 'module:ui'; Label = 'PERSONNALISATION UI'; Command = 'Invoke-UICustomizations'; Parameters = @{{ Options = $uiOptions; RestartExplorer = $false }} }})
+    $optimizationSteps.Add(@{{ Step = 'ui:taskbar'; Label = 'NETTOYAGE BARRE DES TÂCHES'; Command = 'Clear-TaskbarPins'; Parameters = @{{}} }})
 """)
 
         modules_execution = '\n'.join(modules_calls)
@@ -1149,6 +2667,9 @@ try {{
 
     Write-ScriptLog "[OK] Droits administrateur validés" -Level SUCCESS
 
+    # Cache local des installeurs (ProgramData)
+    Initialize-InstallerCache
+
     # Vérification Winget
     try {{
         $null = winget --version
@@ -1182,32 +2703,43 @@ try {{
         Write-Host ""
     }}
 
-{modules_execution}
+    # Journal de reprise (-Resume) et reprise automatique après redémarrage
+    Initialize-Checkpoint
+    Register-ResumeHook
 
-    # Nettoyer la barre des tâches avant installation
-    if ('ui' -in $Global:EmbeddedConfig.modules) {{
-        Clear-TaskbarPins
-    }}
+    # Étapes d'optimisation, dans l'ordre: debloat, performance, UI
+    $optimizationSteps = [System.Collections.Generic.List[hashtable]]::new()
+{modules_execution}
+    # Étapes déjà terminées (reprise), puis lancement en arrière-plan pendant les installations
+    $optimizationSteps = @($optimizationSteps | Where-Object {{ -not (Test-CheckpointStep $_.Step) }})
+    Start-OptimizationSteps -Steps $optimizationSteps
 
     # Installation des applications
     Write-ScriptLog "======== INSTALLATION APPLICATIONS ========" -Level INFO
 
     $stats = @{{ Success = 0; Failed = 0; Skipped = 0 }}
     $currentApp = 0
+    $installTimer = [System.Diagnostics.Stopwatch]::StartNew()
+    Start-InstallProgress -Apps (@($Global:EmbeddedConfig.apps.master) + @($Global:EmbeddedConfig.apps.profile))
 
     # Applications master
     foreach ($app in $Global:EmbeddedConfig.apps.master) {{
         $currentApp++
-        $percentComplete = [math]::Round(($currentApp / $totalApps) * 100)
 
-        # Message spécial pour Office 365 (installation longue)
-        $statusMessage = if ($app.name -match "Office" -or $app.winget -match "Office") {{
-            "Installation: $($app.name) ($currentApp/$totalApps) - Téléchargement 3 GB, peut prendre 15-30 min..."
-        }} else {{
-            "Installation: $($app.name) ($currentApp/$totalApps)"
+        $appStep = "app:$($app.name)"
+        if (Test-CheckpointStep $appStep) {{
+            Write-ScriptLog "[REPRISE] $($app.name) déjà installé" -Level INFO
+            $stats.Skipped++
+            Complete-InstallProgress -App $app -Skipped
+            continue
         }}
 
-        Write-Progress -Activity "Installation des applications" -Status $statusMessage -PercentComplete $percentComplete
+        # Progression pondérée par le coût estimé, ETA mise à jour pendant l'installation
+        Enter-InstallProgress -App $app -Index $currentApp
+
+        # Affichage des optimisations en arrière-plan et barrières déclarées
+        Sync-OptimizationSteps
+        Wait-OptimizationBarriers -App $app
 
         if ($app.webApp) {{
             $success = Install-EdgeWebApp -App $app
@@ -1219,22 +2751,34 @@ try {{
             $success = Install-CustomApp -App $app
         }}
 
-        if ($success) {{ $stats.Success++ }} else {{ $stats.Failed++ }}
+        Complete-InstallProgress -App $app -Success $success
+
+        if ($success) {{
+            $stats.Success++
+            Complete-CheckpointStep $appStep
+        }} else {{
+            $stats.Failed++
+        }}
     }}
 
     # Applications profil
     foreach ($app in $Global:EmbeddedConfig.apps.profile) {{
         $currentApp++
-        $percentComplete = [math]::Round(($currentApp / $totalApps) * 100)
 
-        # Message spécial pour Office 365 (installation longue)
-        $statusMessage = if ($app.name -match "Office" -or $app.winget -match "Office") {{
-            "Installation: $($app.name) ($currentApp/$totalApps) - Téléchargement 3 GB, peut prendre 15-30 min..."
-        }} else {{
-            "Installation: $($app.name) ($currentApp/$totalApps)"
+        $appStep = "app:$($app.name)"
+        if (Test-CheckpointStep $appStep) {{
+            Write-ScriptLog "[REPRISE] $($app.name) déjà installé" -Level INFO
+            $stats.Skipped++
+            Complete-InstallProgress -App $app -Skipped
+            continue
         }}
 
-        Write-Progress -Activity "Installation des applications" -Status $statusMessage -PercentComplete $percentComplete
+        # Progression pondérée par le coût estimé, ETA mise à jour pendant l'installation
+        Enter-InstallProgress -App $app -Index $currentApp
+
+        # Affichage des optimisations en arrière-plan et barrières déclarées
+        Sync-OptimizationSteps
+        Wait-OptimizationBarriers -App $app
 
         if ($app.webApp) {{
             $success = Install-EdgeWebApp -App $app
@@ -1246,18 +2790,35 @@ try {{
             $success = Install-CustomApp -App $app
         }}
 
-        if ($success) {{ $stats.Success++ }} else {{ $stats.Failed++ }}
+        Complete-InstallProgress -App $app -Success $success
+
+        if ($success) {{
+            $stats.Success++
+            Complete-CheckpointStep $appStep
+        }} else {{
+            $stats.Failed++
+        }}
     }}
 
-    Write-ScriptLog "Applications: $($stats.Success) installées, $($stats.Failed) échouées" -Level INFO
+    Write-Progress -Activity "Installation des applications" -Completed
+    Write-ScriptLog "Applications: $($stats.Success) installées, $($stats.Failed) échouées, $($stats.Skipped) déjà installées (reprise) - $([math]::Round($installTimer.Elapsed.TotalSeconds, 1)) s" -Level INFO -Metadata @{{ EstimatedSeconds = $Global:InstallProgress.TotalWeight; Durations = $Global:InstallProgress.Durations }}
+
+    # Fin des optimisations (barrière: épinglages et redémarrage de l'explorateur après l'UI)
+    Complete-OptimizationSteps
 
     # Configurer les épinglages personnalisés (barre des tâches)
-    if ('ui' -in $Global:EmbeddedConfig.modules) {{
+    $pinsStateBefore = Get-DesiredStateCounters
+    if ('ui' -in $Global:EmbeddedConfig.modules -and -not (Test-CheckpointStep 'ui:pins')) {{
         Set-CustomPinnedApps
+        Complete-CheckpointStep 'ui:pins'
     }}
 
     # Redémarrer l'explorateur une seule fois à la fin (si des modifications UI ont été faites)
-    if ('ui' -in $Global:EmbeddedConfig.modules) {{
+    $uiChanged = ($Global:OptimizationSync -and $Global:OptimizationSync.UIChanged) -or
+        ((Get-DesiredStateCounters).Applied -gt $pinsStateBefore.Applied)
+    if ('ui' -in $Global:EmbeddedConfig.modules -and -not $uiChanged) {{
+        Write-ScriptLog "Interface déjà conforme, redémarrage de l'explorateur ignoré" -Level INFO
+    }} elseif ('ui' -in $Global:EmbeddedConfig.modules) {{
         Write-Host "`n[UI] Redémarrage de l'explorateur Windows pour appliquer les changements..." -ForegroundColor Cyan
         try {{
             Stop-Process -Name "explorer" -Force -ErrorAction Stop
@@ -1272,6 +2833,18 @@ try {{
     # Résumé final
     $duration = (Get-Date) - $Global:StartTime
     $durationFormatted = $duration.ToString("hh\\:mm\\:ss")
+    $stateCounters = Get-DesiredStateCounters
+    if ($Global:BackgroundStateCounters) {{
+        foreach ($counter in @('Applied', 'Compliant', 'Failed')) {{
+            $stateCounters[$counter] += $Global:BackgroundStateCounters[$counter]
+        }}
+    }}
+    if ($Global:TimedOutApps.Count -gt 0) {{
+        Write-ScriptLog "Installations interrompues (délai dépassé ou blocage): $($Global:TimedOutApps -join ', ')" -Level WARNING
+    }}
+    Write-ScriptLog "Optimisations: $($stateCounters.Applied) appliquées, $($stateCounters.Compliant) déjà conformes, $($stateCounters.Failed) échecs" -Level INFO -Metadata $stateCounters
+    $appsFailed = ($stats.Failed -gt 0) -or ($Global:TimedOutApps.Count -gt 0)
+    $summaryColor = if ($appsFailed) {{ 'Yellow' }} else {{ 'Green' }}
 
     Write-Host @"
 
@@ -1279,7 +2852,8 @@ try {{
                       RÉSUMÉ FINAL
 ================================================================
   Applications installées: $($stats.Success)
-  Applications échouées: $($stats.Failed)
+  Applications échouées: $($stats.Failed) (dont interrompues: $($Global:TimedOutApps.Count))
+  Optimisations appliquées: $($stateCounters.Applied) (déjà conformes: $($stateCounters.Compliant))
   Durée totale: $durationFormatted
 
   Log complet: $Global:LogPath
@@ -1287,9 +2861,28 @@ try {{
   Support: it@tenorsolutions.com
 ================================================================
 
-"@ -ForegroundColor Green
+"@ -ForegroundColor $summaryColor
+
+    if ($appsFailed) {{
+        # Applications échouées non journalisées: le journal est conservé pour que -Resume les retente
+        # (sans reprise automatique, pour ne pas relancer en boucle un échec persistant)
+        Write-ScriptLog "Exécution terminée avec $($stats.Failed) application(s) en échec" -Level WARNING
+        Unregister-ResumeHook
+        if ($Global:Checkpoint) {{
+            Write-ScriptLog "Relancez le script avec -Resume pour retenter uniquement les applications échouées" -Level WARNING
+        }}
+    }} else {{
+        Write-ScriptLog "Exécution terminée avec succès" -Level SUCCESS
+
+        # Toutes les étapes sont terminées: plus rien à reprendre
+        Complete-Checkpoint
+    }}
+    if ($Global:RebootPending) {{
+        Write-ScriptLog "[ATTENTION] Redémarrage requis pour finaliser certaines installations" -Level WARNING
+    }}
 
-    Write-ScriptLog "Exécution terminée avec succès" -Level SUCCESS
+    # Remonter les durées d'étapes (optionnel, -TelemetryUrl)
+    Send-ExecutionTelemetry -Success $true
 
     # Sauvegarder le log JSON
     Save-JSONLog
@@ -1311,7 +2904,14 @@ try {{
     Write-ScriptLog "ERREUR CRITIQUE: $($_.Exception.Message)" -Level ERROR
     Write-Host "`nUne erreur critique est survenue. Consultez le log: $Global:LogPath" -ForegroundColor Red
 
-    # Sauvegarder le log JSON même en cas d'erreur
+    # Pas de reprise automatique en boucle; le journal reste disponible pour -Resume
+    Unregister-ResumeHook
+    if ($Global:Checkpoint) {{
+        Write-Host "Relancez le script avec -Resume pour reprendre les étapes restantes" -ForegroundColor Yellow
+    }}
+
+    # Remonter les durées d'étapes déjà mesurées, puis sauvegarder le log JSON même en cas d'erreur
+    Send-ExecutionTelemetry -Success $false
     Save-JSONLog
 
     # Échec
@@ -1377,7 +2977,16 @@ class PS2EXECompiler:
             return False, "PS2EXE non disponible sur ce système"
 
         metadata = metadata or {}
+        metrics_registry.add('postboot_compile_queue_depth', 1)
+        try:
+            with timed_stage('compile_to_exe'):
+                return PS2EXECompiler._run_compiler(ps1_path, exe_path, metadata)
+        finally:
+            metrics_registry.add('postboot_compile_queue_depth', -1)
 
+    @staticmethod
+    def _run_compiler(ps1_path: Path, exe_path: Path, metadata: dict) -> Tuple[bool, Optional[str]]:
+        """Exécute le wrapper PS2EXE (pwsh) et retourne (success, error_message)."""
         # Utiliser notre wrapper personnalisé compatible Linux
         wrapper_path = Path(__file__).parent.parent / 'compile_ps_to_exe.ps1'
 
@@ -1423,6 +3032,98 @@ class PS2EXECompiler:
 # Instance globale du générateur
 generator = ScriptGenerator()
 
+# Proxy cache LAN: relaie uniquement les URLs d'installeurs du catalogue
+installer_proxy = InstallerCacheProxy(
+    PROXY_CACHE_DIR,
+    int(PROXY_CACHE_MAX_GB * 1024 ** 3),
+    collect_installer_urls(generator.apps_config),
+    metrics=metrics_registry,
+    max_age_seconds=PROXY_CACHE_MAX_AGE
+)
+app.register_blueprint(create_proxy_blueprint(installer_proxy))
+
+# Télémétrie: durées d'étapes remontées par les scripts, utilisées pour les estimations
+telemetry_store = TelemetryStore(TELEMETRY_DB)
+generator.telemetry_store = telemetry_store
+app.register_blueprint(create_telemetry_blueprint(telemetry_store))
+
+# Recherche indexée dans le catalogue (/api/apps/search), index reconstruit si le catalogue change
+catalog_search = CatalogSearch(lambda: generator.apps_config, generator.get_resolved_apps_config)
+app.register_blueprint(create_search_blueprint(catalog_search))
+
+# Versions du catalogue: la version courante est enregistrée au démarrage de chaque worker
+catalog_history = CatalogHistory(CATALOG_HISTORY_DIR, CATALOG_HISTORY_SIZE)
+catalog_history.record(generator.apps_config)
+app.register_blueprint(create_catalog_blueprint(catalog_history, lambda: generator.apps_config))
+
+# Index winget local: identifiants du catalogue vérifiés au chargement, puis à chaque génération
+winget_index = WingetIndex(WINGET_INDEX_DB)
+winget_index.check_catalog(generator.apps_config)
+app.register_blueprint(create_winget_index_blueprint(winget_index, lambda: generator.apps_config))
+
+# Profils personnalisés enregistrés (/api/saved-profiles), générés par identifiant via /api/generate
+saved_profile_store = SavedProfileStore(SAVED_PROFILES_DB)
+app.register_blueprint(create_saved_profiles_blueprint(
+    saved_profile_store,
+    lambda user_config, script_types: prepare_api_config(user_config, script_types),
+    lambda: catalog_history.record(generator.apps_config)
+))
+
+# Métriques Prometheus (/api/metrics), agrégées entre les workers
+app.register_blueprint(create_metrics_blueprint(metrics_registry))
+
+# Profils des requêtes lentes (/api/debug/profiles)
+slow_profiler = SlowRequestProfiler(
+    PROFILES_DIR,
+    SLOW_REQUEST_THRESHOLD_MS,
+    sample_rate=SLOW_REQUEST_SAMPLE_RATE,
+    enabled=SLOW_REQUEST_PROFILING
+)
+app.register_blueprint(create_profiling_blueprint(slow_profiler))
+
+# Diagnostic mémoire (/api/admin/memory)
+memory_tracer = MemoryTracer(MEMORY_TRACING, MEMORY_BUDGET_KB, MEMORY_TRACING_FRAMES, metrics=metrics_registry)
+app.register_blueprint(create_memory_blueprint(memory_tracer))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiled = slow_profiler.begin()
+    g.memory_start = memory_tracer.begin()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Compteur et latence par endpoint (règle de routage, pas l'URL: cardinalité bornée),
+    en-tête Server-Timing, mesure mémoire (mode diagnostic) et profil de la requête si elle dépasse le seuil.
+    """
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics_registry.inc('postboot_http_requests_total', endpoint=endpoint,
+                         method=request.method, status=response.status_code)
+    if 'request_start' not in g:
+        return response
+
+    elapsed = time.perf_counter() - g.request_start
+    metrics_registry.observe('postboot_http_request_duration_seconds', elapsed, endpoint=endpoint, method=request.method)
+
+    memory_tracer.end(endpoint, g.get('memory_start'))
+
+    timings = g.get('server_timing', {})
+    response.headers['Server-Timing'] = server_timing_header(timings, elapsed)
+    if g.get('profiled'):
+        slow_profiler.end(request.method, request.full_path.rstrip('?'), response.status_code, elapsed, timings)
+        g.profiled = False
+    return response
+
+
+@app.teardown_request
+def stop_request_profiling(exc):
+    # Requête interrompue avant after_request: ne pas laisser le thread suivi par l'échantillonneur
+    if g.get('profiled'):
+        slow_profiler.cancel()
+
 
 #region API Endpoints
 
@@ -1610,7 +3311,8 @@ def transform_user_config_to_api_config(user_config: dict, script_types: list) -
                         'installScript': app.get('installScript'),
                         'filePattern': app.get('filePattern'),
                         'networkPath': app.get('networkPath'),
-                        'plugins': app.get('plugins')
+                        'plugins': app.get('plugins'),
+                        'sha256': app.get('sha256')
                     }
 
     master_apps = list(master_apps_dict.values())
@@ -1636,7 +3338,8 @@ def transform_user_config_to_api_config(user_config: dict, script_types: list) -
                         'installScript': app.get('installScript'),
                         'filePattern': app.get('filePattern'),
                         'networkPath': app.get('networkPath'),
-                        'plugins': app.get('plugins')
+                        'plugins': app.get('plugins'),
+                        'sha256': app.get('sha256')
                     }
 
         # 1. Si un profil standard est sélectionné (ex: "profile": "DEV_DOTNET"),
@@ -1674,7 +3377,8 @@ def transform_user_config_to_api_config(user_config: dict, script_types: list) -
                             'installScript': app.get('installScript'),
                             'filePattern': app.get('filePattern'),
                             'networkPath': app.get('networkPath'),
-                            'plugins': app.get('plugins')
+                            'plugins': app.get('plugins'),
+                            'sha256': app.get('sha256')
                         }
 
         # Apps optionnelles
@@ -1695,7 +3399,8 @@ def transform_user_config_to_api_config(user_config: dict, script_types: list) -
                         'installScript': app.get('installScript'),
                         'filePattern': app.get('filePattern'),
                         'networkPath': app.get('networkPath'),
-                        'plugins': app.get('plugins')
+                        'plugins': app.get('plugins'),
+                        'sha256': app.get('sha256')
                     }
 
     # Convertir le dictionnaire en liste
@@ -1779,6 +3484,123 @@ def transform_user_config_to_api_config(user_config: dict, script_types: list) -
     }
 
 
+def prepare_api_config(user_config: dict, script_types: list) -> dict:
+    """Config API validée pour un profil enregistré (ValueError si la configuration est invalide)."""
+    api_config = transform_user_config_to_api_config(user_config, script_types)
+    if 'installation' in script_types:
+        apps = api_config.get('apps', {})
+        if not apps.get('master') and not apps.get('profile'):
+            raise ValueError('Vous devez sélectionner au moins une application')
+    is_valid, error = generator.validate_config(api_config)
+    if not is_valid:
+        raise ValueError(error)
+    return api_config
+
+
+def build_script_content(api_config: dict, profile_name: str, script_types: list) -> str:
+    """Script complet: génération et module de diagnostic éventuel."""
+    script_content = generator.generate_script(api_config, profile_name)
+
+    # Gérer diagnostic (à implémenter plus tard)
+    if 'diagnostic' in script_types:
+        diagnostic_module = generator._load_template("diagnostic_module.ps1") if hasattr(generator, '_load_template') else "# Diagnostic module à implémenter"
+        script_content += f"\n\n# === MODULE DIAGNOSTIC ===\n{diagnostic_module}"
+    return script_content
+
+
+def script_download_name(profile_name: str) -> str:
+    """Nom de fichier basé sur le profil (ex: PostBootSetup-TENOR.ps1)."""
+    if profile_name:
+        # Nettoyer le nom du profil (retirer espaces, caractères spéciaux)
+        safe_profile_name = profile_name.replace(' ', '-').replace('_', '-')
+        return f"PostBootSetup-{safe_profile_name}.ps1"
+    return "PostBootSetup-Custom.ps1"
+
+
+def check_winget_ids(api_config: dict, response=None) -> List[dict]:
+    """
+    Identifiants winget du script absents de l'index local (liste vide sans index).
+    Si response est fournie, ajoute l'en-tête X-Winget-Warnings (identifiants séparés par des virgules).
+    """
+    apps = api_config.get('apps', {})
+    warnings = winget_index.check((app.get('name', ''), app.get('winget'))
+                                  for app in apps.get('master', []) + apps.get('profile', []))
+    if warnings:
+        logger.warning(f"Identifiants winget inconnus de l'index: {', '.join(w['winget'] for w in warnings)}")
+        if response is not None:
+            response.headers['X-Winget-Warnings'] = ', '.join(w['winget'] for w in warnings)
+    return warnings
+
+
+def publish_artifact(path: Path, ref_name: str, download_name: str, content_type: str) -> dict:
+    """Envoie un fichier généré dans le stockage partagé et le référence sous ref_name."""
+    with timed_stage('artifact_store'):
+        artifact = artifact_store.put_file(path, path.suffix.lower(), content_type)
+        return artifact_store.put_ref(ref_name, artifact, download_name, content_type)
+
+
+def artifact_response(ref: dict) -> Response:
+    """Téléchargement d'un artefact du stockage: fichier local, ou flux lu par blocs."""
+    path = artifact_store.local_path(ref['key'])
+    if path is not None:
+        return send_file(path, as_attachment=True, download_name=ref['filename'], mimetype=ref['content_type'])
+    response = Response(stream_with_context(artifact_store.open(ref['key'])), mimetype=ref['content_type'])
+    response.headers['Content-Disposition'] = f'attachment; filename="{ref["filename"]}"'
+    response.headers['Content-Length'] = str(ref['size'])
+    return response
+
+
+def generate_saved_profile(profile_id: str):
+    """
+    Génération d'un profil enregistré: config API précalculée (pas de transformation),
+    script réutilisé depuis le cache tant que catalogue et code de génération sont inchangés.
+    """
+    profile = saved_profile_store.get(profile_id)
+    if profile is None:
+        return jsonify({'success': False, 'error': 'Profil enregistré introuvable'}), 404
+
+    logger.info(f"Requête génération - Profil enregistré: {profile_id} ({profile['name']}) - IP: {request.remote_addr}")
+
+    catalog_version = catalog_history.record(generator.apps_config)
+    api_config = profile['api_config']
+    if profile['catalog_version'] != catalog_version:
+        # Catalogue modifié depuis l'enregistrement: recalculer une fois la config API
+        with timed_stage('transform'):
+            api_config = prepare_api_config(profile['user_config'], profile['script_types'])
+        saved_profile_store.update_api_config(profile_id, api_config, catalog_version)
+        logger.info(f"Profil enregistré {profile_id} mis à jour pour le catalogue {catalog_version}")
+
+    # Cache dans le stockage partagé: un script généré par un réplica sert à tous les autres
+    cache_key = hashlib.sha256(f"{catalog_version}|{SOURCE_FINGERPRINT}".encode('utf-8')).hexdigest()[:12]
+    ref_name = f"saved-{profile_id}-{cache_key}"
+    ref = artifact_store.get_ref(ref_name)
+    cache_hit = ref is not None and time.time() - ref['created_at'] < SCRIPT_CACHE_TTL_SECONDS
+
+    if not cache_hit:
+        script_content = build_script_content(api_config, profile['name'], profile['script_types'])
+        # Fichier de travail propre à la requête: requêtes concurrentes du même profil
+        script_path = GENERATED_DIR / f"{ref_name}.{uuid.uuid4().hex[:8]}.ps1"
+        try:
+            with timed_stage('file_write'):
+                with open(script_path, 'w', encoding='utf-8-sig') as f:
+                    f.write(script_content)
+            metrics_registry.observe('postboot_output_size_bytes', script_path.stat().st_size, kind='ps1')
+            ref = publish_artifact(script_path, ref_name, script_download_name(profile['name']),
+                                   'text/plain; charset=utf-8')
+        finally:
+            script_path.unlink(missing_ok=True)
+        logger.info(f"[OK] Script généré: {ref_name} ({len(script_content)} chars)")
+
+    metrics_registry.inc('postboot_cache_requests_total', cache='saved_script', result='hit' if cache_hit else 'miss')
+    saved_profile_store.mark_used(profile_id)
+
+    response = artifact_response(ref)
+    response.headers['X-Saved-Profile'] = profile_id
+    check_winget_ids(api_config, response)
+    response.headers['X-Script-Cache'] = 'HIT' if cache_hit else 'MISS'
+    return response
+
+
 @app.route('/api/generate', methods=['POST'])
 def generate():
     """
@@ -1787,6 +3609,11 @@ def generate():
     """
     try:
         request_data = request.json
+
+        # Profil enregistré: {"saved_profile": "<id>"}
+        if request_data.get('saved_profile'):
+            return generate_saved_profile(str(request_data['saved_profile']))
+
         user_config = request_data.get('config', {})
         script_types = request_data.get('scriptTypes', ['installation', 'optimizations'])
 
@@ -1795,12 +3622,18 @@ def generate():
         profile_name = user_config.get('profile') or user_config.get('custom_name') or 'Custom'
 
         logger.info(f"Requête génération - Profil: {profile_name} - Types: {script_types} - IP: {request.remote_addr}")
-        logger.debug(f"User config reçue: master_apps={len(user_config.get('master_apps', []))}, profile_apps={len(user_config.get('profile_apps', []))}, optional_apps={len(user_config.get('optional_apps', []))}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("User config reçue: master_apps=%d, profile_apps=%d, optional_apps=%d",
+                         len(user_config.get('master_apps', [])), len(user_config.get('profile_apps', [])),
+                         len(user_config.get('optional_apps', [])))
 
         # Transformer la config utilisateur en config pour le générateur
-        api_config = transform_user_config_to_api_config(user_config, script_types)
+        with timed_stage('transform'):
+            api_config = transform_user_config_to_api_config(user_config, script_types)
 
-        logger.debug(f"API config générée: master={len(api_config.get('apps', {}).get('master', []))}, profile={len(api_config.get('apps', {}).get('profile', []))}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("API config générée: master=%d, profile=%d",
+                         len(api_config.get('apps', {}).get('master', [])), len(api_config.get('apps', {}).get('profile', [])))
 
         # Validation supplémentaire : au moins 1 app si 'installation' est demandé
         if 'installation' in script_types:
@@ -1809,39 +3642,36 @@ def generate():
                 logger.warning(f"Aucune application sélectionnée pour le profil {profile_name}")
                 return jsonify({'success': False, 'error': 'Vous devez sélectionner au moins une application'}), 400
 
-        # Gérer diagnostic (à implémenter plus tard)
-        include_diagnostic = 'diagnostic' in script_types
-
         # Générer le script
-        script_content = generator.generate_script(api_config, profile_name)
+        script_content = build_script_content(api_config, profile_name, script_types)
+
+        script_filename = script_download_name(profile_name)
+        script_id = str(uuid.uuid4())
+        # Fichier de travail propre à la requête: deux générations du même profil ne s'écrasent pas
+        work_path = GENERATED_DIR / f".{script_id}.ps1.tmp"
 
-        # Si diagnostic demandé, ajouter le module de diagnostic
-        if include_diagnostic:
-            diagnostic_module = generator._load_template("diagnostic_module.ps1") if hasattr(generator, '_load_template') else "# Diagnostic module à implémenter"
-            script_content += f"\n\n# === MODULE DIAGNOSTIC ===\n{diagnostic_module}"
+        try:
+            # Sauvegarder le script
+            with timed_stage('file_write'):
+                with open(work_path, 'w', encoding='utf-8-sig') as f:
+                    f.write(script_content)
+            metrics_registry.observe('postboot_output_size_bytes', work_path.stat().st_size, kind='ps1')
 
-        # Nom de fichier basé sur le profil (ex: PostBootSetup-TENOR.ps1)
-        # Nettoyer le nom du profil (retirer espaces, caractères spéciaux)
-        if profile_name:
-            safe_profile_name = profile_name.replace(' ', '-').replace('_', '-')
-            script_filename = f"PostBootSetup-{safe_profile_name}.ps1"
-        else:
-            script_filename = "PostBootSetup-Custom.ps1"
-        script_path = GENERATED_DIR / script_filename
+            # Publier le script dans le stockage partagé: téléchargeable ensuite depuis n'importe quel réplica
+            ref = publish_artifact(work_path, script_id, script_filename, 'text/plain; charset=utf-8')
 
-        # Sauvegarder le script
-        with open(script_path, 'w', encoding='utf-8-sig') as f:
-            f.write(script_content)
+            # Copie nommée par profil (recherche locale de /api/download), remplacée atomiquement
+            os.replace(work_path, GENERATED_DIR / script_filename)
+        finally:
+            work_path.unlink(missing_ok=True)
 
         logger.info(f"[OK] Script généré: {script_filename} ({len(script_content)} chars)")
 
         # Retourner directement le contenu du script pour téléchargement
-        return send_file(
-            script_path,
-            as_attachment=True,
-            download_name=script_filename,
-            mimetype='text/plain; charset=utf-8'
-        )
+        response = artifact_response(ref)
+        response.headers['X-Script-ID'] = script_id
+        check_winget_ids(api_config, response)
+        return response
 
     except ValueError as e:
         logger.warning(f"Configuration invalide: {e}")
@@ -1855,6 +3685,9 @@ def generate():
     except PermissionError as e:
         logger.error(f"Permission refusée: {e}")
         return jsonify({'success': False, 'error': 'Permission refusée lors de l\'écriture du fichier'}), 500
+    except ArtifactStoreError as e:
+        logger.error(f"Stockage des artefacts indisponible: {e}")
+        return jsonify({'success': False, 'error': 'Stockage des fichiers indisponible'}), 503
     except Exception as e:
         logger.critical(f"Erreur inattendue lors de la génération: {e}", exc_info=True)
         return jsonify({'success': False, 'error': 'Erreur interne du serveur'}), 500
@@ -1863,6 +3696,32 @@ def generate():
 # Legacy endpoint /api/generate/script removed - use /api/generate instead
 
 
+@app.route('/api/generate/preview', methods=['POST'])
+def generate_preview():
+    """
+    Coût d'exécution estimé du script, sans le générer.
+    Même corps de requête que /api/generate.
+    """
+    try:
+        request_data = request.json or {}
+        user_config = request_data.get('config', {})
+        script_types = request_data.get('scriptTypes', ['installation', 'optimizations'])
+        profile_name = user_config.get('profile') or user_config.get('custom_name') or 'Custom'
+
+        api_config = transform_user_config_to_api_config(user_config, script_types)
+        cost = generator.analyze_cost(api_config)
+
+        logger.info(f"Aperçu du coût - Profil: {profile_name} - IP: {request.remote_addr}")
+        return jsonify({'success': True, 'profile': profile_name, 'cost': cost,
+                        'winget_warnings': check_winget_ids(api_config)})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erreur aperçu du coût: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': 'Erreur interne du serveur'}), 500
+
+
 @app.route('/api/generate/executable', methods=['POST'])
 def generate_executable():
     """Génère un exécutable Windows (.exe) via PS2EXE."""
@@ -1891,8 +3750,9 @@ def generate_executable():
         exe_path = GENERATED_DIR / exe_filename
 
         # Sauvegarder le script temporaire
-        with open(ps1_path, 'w', encoding='utf-8-sig') as f:
-            f.write(script_content)
+        with timed_stage('file_write'):
+            with open(ps1_path, 'w', encoding='utf-8-sig') as f:
+                f.write(script_content)
 
         # Compiler en EXE
         metadata = {
@@ -1909,13 +3769,22 @@ def generate_executable():
 
         if success:
             logger.info(f"[OK] EXE généré: {exe_filename}")
+            metrics_registry.observe('postboot_output_size_bytes', exe_path.stat().st_size, kind='exe')
+
+            # L'exécutable vit ensuite dans le stockage partagé (téléchargement depuis tout réplica)
+            try:
+                ref = publish_artifact(exe_path, script_id, exe_filename, 'application/octet-stream')
+            finally:
+                exe_path.unlink(missing_ok=True)
 
             return jsonify({
                 'success': True,
                 'script_id': script_id,
                 'filename': exe_filename,
-                'size': exe_path.stat().st_size,
-                'download_url': f'/api/download/{script_id}'
+                'size': ref['size'],
+                'sha256': ref['sha256'],
+                'download_url': f'/api/download/{script_id}',
+                'winget_warnings': check_winget_ids(user_config)
             })
         else:
             return jsonify({
@@ -1933,9 +3802,20 @@ def generate_executable():
 
 @app.route('/api/download/<script_id>', methods=['GET'])
 def download_file(script_id):
-    """Télécharge un fichier généré (.ps1 ou .exe)."""
+    """
+    Télécharge un fichier généré (.ps1 ou .exe) depuis le stockage partagé.
+    Stockage S3: redirection (302) vers une URL présignée, le fichier ne transite pas par l'API.
+    """
     try:
-        # Chercher le fichier correspondant à l'ID
+        ref = artifact_store.get_ref(script_id)
+        if ref is not None:
+            logger.info(f"Téléchargement: {ref['filename']} ({script_id}) - IP: {request.remote_addr}")
+            url = artifact_store.presigned_url(ref['key'], ref['filename'], ARTIFACT_URL_EXPIRES)
+            if url:
+                return redirect(url, code=302)
+            return artifact_response(ref)
+
+        # Fichiers hors stockage partagé (scripts nommés par profil): recherche locale par identifiant
         matching_files = list(GENERATED_DIR.glob(f"*{script_id[:8]}*"))
 
         if not matching_files:
@@ -1952,6 +3832,9 @@ def download_file(script_id):
             mimetype='text/plain; charset=utf-8'
         )
 
+    except ArtifactStoreError as e:
+        logger.error(f"Stockage des artefacts indisponible: {e}")
+        return jsonify({'success': False, 'error': 'Stockage des fichiers indisponible'}), 503
     except Exception as e:
         logger.error(f"Erreur téléchargement: {e}")
         return jsonify({'success': False, 'error': 'Erreur lors du téléchargement'}), 500
@@ -1975,7 +3858,9 @@ def cleanup_old_files():
                 if file_mtime < cutoff_time:
                     file_path.unlink()
                     deleted_count += 1
-                    logger.debug(f"Supprimé: {file_path.name} (ancien)")
+                    logger.debug("Supprimé: %s (ancien)", file_path.name)
+
+        deleted_count += artifact_store.cleanup(CACHE_RETENTION_HOURS * 3600)
 
         if deleted_count > 0:
             logger.info(f"Nettoyage: {deleted_count} fichiers supprimés")
@@ -1995,6 +3880,9 @@ if __name__ == '__main__':
     logger.info(f"Dossier modules: {MODULES_DIR}")
     logger.info(f"Dossier templates: {TEMPLATES_DIR}")
     logger.info(f"Dossier generated: {GENERATED_DIR}")
+    logger.info(f"Stockage des artefacts: {ARTIFACT_STORE}")
+    logger.info(f"Cache proxy installeurs: {PROXY_CACHE_DIR} ({PROXY_CACHE_MAX_GB} GB max)")
+    logger.info(f"Base télémétrie: {TELEMETRY_DB}")
     logger.info(f"PS2EXE disponible: {PS2EXECompiler.is_available()}")
     logger.info("="*60)
 
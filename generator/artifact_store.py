@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Stockage des artefacts générés (scripts, exécutables)
+
+Les fichiers produits par un réplica de l'API doivent être téléchargeables
+depuis n'importe quel autre (plusieurs réplicas derrière Traefik, sans
+affinité de session). Deux implémentations d'une même interface:
+- LocalArtifactStore: répertoire local (ou volume partagé entre réplicas)
+- S3ArtifactStore: stockage compatible S3 (AWS, MinIO...), signature SigV4
+  implémentée avec la bibliothèque standard, URLs présignées pour que le client
+  télécharge directement depuis le stockage
+
+Les objets sont adressés par contenu (objects/<sha256[:2]>/<sha256><ext>): un
+même script n'est stocké qu'une fois. Des références nommées (refs/<nom>.json:
+clé de l'objet, nom de fichier, taille, date) relient un identifiant de
+téléchargement ou une entrée de cache à l'objet. Envoi et lecture se font par
+blocs, sans charger le fichier en mémoire.
+"""
+
+import datetime
+import email.utils
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+DEFAULT_URL_EXPIRES = 300
+# Âge au-delà duquel un objet S3 déjà présent est renvoyé (expiration par règle de cycle de vie)
+S3_REFRESH_AFTER_SECONDS = 6 * 3600
+S3_TIMEOUT_SECONDS = 30
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+_REF_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$')
+_SUFFIX_PATTERN = re.compile(r'^(\.[a-z0-9]{1,8})?$')
+
+
+class ArtifactStoreError(Exception):
+    """Erreur d'accès au stockage des artefacts."""
+
+
+def _iter_chunks(stream) -> Iterator[bytes]:
+    with stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            yield chunk
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Interface commune: objets adressés par contenu et références nommées."""
+
+    kind = 'abstract'
+
+    def put_file(self, path: Path, suffix: str = '', content_type: str = 'application/octet-stream') -> dict:
+        """
+        Stocke un fichier sous une clé dérivée de son contenu (sans nouvel envoi s'il existe déjà).
+
+        Returns:
+            {'key', 'sha256', 'size'}
+        """
+        if not _SUFFIX_PATTERN.match(suffix):
+            raise ArtifactStoreError(f"Extension invalide: {suffix!r}")
+        path = Path(path)
+        sha256 = file_sha256(path)
+        key = f"objects/{sha256[:2]}/{sha256}{suffix}"
+        size = path.stat().st_size
+        if not self._keep(key):
+            self._upload(key, path, size, sha256, content_type)
+        return {'key': key, 'sha256': sha256, 'size': size}
+
+    def put_ref(self, name: str, artifact: dict, filename: str, content_type: str) -> dict:
+        """Référence nommée vers un objet (identifiant de téléchargement, entrée de cache); retourne la référence."""
+        ref = {
+            'key': artifact['key'],
+            'sha256': artifact['sha256'],
+            'size': artifact['size'],
+            'filename': filename,
+            'content_type': content_type,
+            'created_at': time.time(),
+        }
+        self._write_small(self._ref_key(name), json.dumps(ref).encode('utf-8'))
+        return ref
+
+    def get_ref(self, name: str) -> Optional[dict]:
+        if not _REF_NAME_PATTERN.match(name or ''):
+            return None
+        data = self._read_small(self._ref_key(name))
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            logger.warning(f"[ARTEFACTS] Référence illisible: {name}")
+            return None
+
+    def _ref_key(self, name: str) -> str:
+        if not _REF_NAME_PATTERN.match(name):
+            raise ArtifactStoreError(f"Nom de référence invalide: {name!r}")
+        return f"refs/{name}.json"
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Chemin local de l'objet (servi directement par Flask), None si distant."""
+        return None
+
+    def presigned_url(self, key: str, filename: Optional[str] = None,
+                      expires: int = DEFAULT_URL_EXPIRES) -> Optional[str]:
+        """URL de téléchargement direct depuis le stockage, None si non prise en charge."""
+        return None
+
+    def cleanup(self, max_age_seconds: float) -> int:
+        """Supprime les objets et références plus anciens que max_age_seconds; retourne le nombre supprimé."""
+        return 0
+
+    # Primitives des implémentations
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def open(self, key: str) -> Iterator[bytes]:
+        """Contenu de l'objet, par blocs (l'objet est ouvert dès l'appel: erreur avant tout envoi)."""
+        raise NotImplementedError
+
+    def _keep(self, key: str) -> bool:
+        """L'objet existe et reste conservé (dédoublonnage): False s'il faut l'envoyer."""
+        return self.exists(key)
+
+    def _upload(self, key: str, path: Path, size: int, sha256: str, content_type: str):
+        raise NotImplementedError
+
+    def _write_small(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def _read_small(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Artefacts dans un répertoire local (partageable entre réplicas via un volume)."""
+
+    kind = 'local'
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def _atomic_write(self, key: str, writer):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex[:8]}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                writer(f)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def local_path(self, key: str) -> Optional[Path]:
+        path = self._path(key)
+        return path if path.is_file() else None
+
+    def _keep(self, key: str) -> bool:
+        # Objet réutilisé par une nouvelle référence: rafraîchir sa date pour le nettoyage
+        try:
+            os.utime(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def open(self, key: str) -> Iterator[bytes]:
+        try:
+            f = open(self._path(key), 'rb')
+        except FileNotFoundError:
+            raise ArtifactStoreError(f"Objet introuvable: {key}")
+        return _iter_chunks(f)
+
+    def _upload(self, key: str, path: Path, size: int, sha256: str, content_type: str):
+        def copy(target):
+            # Empreinte des octets réellement copiés: un fichier modifié entre le calcul de la clé
+            # et la copie ne doit pas être stocké sous cette clé
+            digest = hashlib.sha256()
+            with open(path, 'rb') as source:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    target.write(chunk)
+            if digest.hexdigest() != sha256:
+                raise ArtifactStoreError(f"Fichier modifié pendant l'envoi: {path.name}")
+        self._atomic_write(key, copy)
+
+    def _write_small(self, key: str, data: bytes):
+        self._atomic_write(key, lambda target: target.write(data))
+
+    def _read_small(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def cleanup(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        deleted = 0
+        for path in list(self.root.glob('refs/*.json')) + list(self.root.glob('objects/*/*')):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+
+# region Signature AWS SigV4
+
+def _quote(value: str, safe: str = '-_.~') -> str:
+    return urllib.parse.quote(value, safe=safe)
+
+
+def _canonical_query(params: dict) -> str:
+    return '&'.join(f"{_quote(k)}={_quote(str(v))}" for k, v in sorted(params.items()))
+
+
+def _signing_key(secret_key: str, date: str, region: str, service: str = 's3') -> bytes:
+    key = hmac.new(f"AWS4{secret_key}".encode('utf-8'), date.encode('utf-8'), hashlib.sha256).digest()
+    for part in (region, service, 'aws4_request'):
+        key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+    return key
+
+
+def _signature(method: str, path: str, query: dict, headers: dict, payload_hash: str,
+               secret_key: str, timestamp: str, scope: str, region: str) -> tuple:
+    canonical_headers = ''.join(f"{name}:{' '.join(str(headers[name]).split())}\n" for name in sorted(headers))
+    signed_headers = ';'.join(sorted(headers))
+    canonical_request = '\n'.join([
+        method, _quote(path, safe='/-_.~'), _canonical_query(query), canonical_headers, signed_headers, payload_hash
+    ])
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', timestamp, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+    ])
+    signing_key = _signing_key(secret_key, timestamp[:8], region)
+    return hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest(), signed_headers
+
+
+def sign_headers(method: str, host: str, path: str, headers: dict, payload_hash: str, access_key: str,
+                 secret_key: str, region: str, now: Optional[datetime.datetime] = None, query: Optional[dict] = None) -> dict:
+    """En-têtes signés (Authorization, x-amz-date, x-amz-content-sha256) d'une requête S3."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    timestamp = now.strftime('%Y%m%dT%H%M%SZ')
+    scope = f"{timestamp[:8]}/{region}/s3/aws4_request"
+    signed = {name.lower(): value for name, value in headers.items()}
+    signed.update({'host': host, 'x-amz-date': timestamp, 'x-amz-content-sha256': payload_hash})
+    signature, signed_headers = _signature(method, path, query or {}, signed, payload_hash,
+                                           secret_key, timestamp, scope, region)
+    signed['authorization'] = (f"AWS4-HMAC-SHA256 Credential={access_key}/{scope},"
+                               f"SignedHeaders={signed_headers},Signature={signature}")
+    return signed
+
+
+def presign_query(method: str, host: str, path: str, access_key: str, secret_key: str, region: str,
+                  expires: int, now: Optional[datetime.datetime] = None, extra: Optional[dict] = None) -> str:
+    """Chaîne de requête d'une URL présignée (X-Amz-Signature)."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    timestamp = now.strftime('%Y%m%dT%H%M%SZ')
+    scope = f"{timestamp[:8]}/{region}/s3/aws4_request"
+    query = dict(extra or {})
+    query.update({
+        'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+        'X-Amz-Credential': f"{access_key}/{scope}",
+        'X-Amz-Date': timestamp,
+        'X-Amz-Expires': str(expires),
+        'X-Amz-SignedHeaders': 'host',
+    })
+    signature, _ = _signature(method, path, query, {'host': host}, 'UNSIGNED-PAYLOAD',
+                              secret_key, timestamp, scope, region)
+    query['X-Amz-Signature'] = signature
+    return _canonical_query(query)
+
+# endregion
+
+
+class S3ArtifactStore(ArtifactStore):
+    """Artefacts dans un bucket compatible S3 (AWS, MinIO), adressage par chemin ou par hôte virtuel."""
+
+    kind = 's3'
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str, region: str = 'us-east-1',
+                 prefix: str = '', virtual_host: bool = False, public_endpoint: Optional[str] = None,
+                 refresh_after: float = S3_REFRESH_AFTER_SECONDS):
+        if not endpoint or not bucket or not access_key or not secret_key:
+            raise ArtifactStoreError("Stockage S3: endpoint, bucket et identifiants requis")
+        self.endpoint = urllib.parse.urlsplit(endpoint.rstrip('/'))
+        # Adresse vue par les clients pour les URLs présignées (si différente de celle du réseau interne)
+        self.public_endpoint = urllib.parse.urlsplit(public_endpoint.rstrip('/')) if public_endpoint else self.endpoint
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.virtual_host = virtual_host
+        self.refresh_after = refresh_after
+
+    def _location(self, key: str, endpoint=None) -> tuple:
+        """(schéma, hôte, chemin) de l'objet."""
+        endpoint = endpoint or self.endpoint
+        object_key = self.prefix + key
+        if self.virtual_host:
+            return endpoint.scheme, f"{self.bucket}.{endpoint.netloc}", f"/{object_key}"
+        return endpoint.scheme, endpoint.netloc, f"/{self.bucket}/{object_key}"
+
+    def _request(self, method: str, key: str, data=None, headers: Optional[dict] = None,
+                 payload_hash: str = EMPTY_SHA256):
+        scheme, host, path = self._location(key)
+        signed = sign_headers(method, host, path, headers or {}, payload_hash,
+                              self.access_key, self.secret_key, self.region)
+        signed.pop('host')
+        url = f"{scheme}://{host}{_quote(path, safe='/-_.~')}"
+        return urllib.request.urlopen(urllib.request.Request(url, data=data, headers=signed, method=method),
+                                      timeout=S3_TIMEOUT_SECONDS)
+
+    def exists(self, key: str) -> bool:
+        try:
+            with self._request('HEAD', key):
+                return True
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise ArtifactStoreError(f"S3 HEAD {key}: HTTP {e.code}")
+        except OSError as e:
+            raise ArtifactStoreError(f"S3 HEAD {key}: {e}")
+
+    def _keep(self, key: str) -> bool:
+        # Les règles d'expiration du bucket comptent depuis le dernier envoi: un objet ancien
+        # réutilisé par une nouvelle référence est renvoyé plutôt que de risquer son expiration
+        try:
+            with self._request('HEAD', key) as response:
+                last_modified = email.utils.parsedate_to_datetime(response.headers.get('Last-Modified', ''))
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise ArtifactStoreError(f"S3 HEAD {key}: HTTP {e.code}")
+        except (TypeError, ValueError):
+            return False
+        except OSError as e:
+            raise ArtifactStoreError(f"S3 HEAD {key}: {e}")
+        return time.time() - last_modified.timestamp() < self.refresh_after
+
+    def open(self, key: str) -> Iterator[bytes]:
+        try:
+            response = self._request('GET', key)
+        except urllib.error.HTTPError as e:
+            raise ArtifactStoreError(f"S3 GET {key}: HTTP {e.code}")
+        except OSError as e:
+            raise ArtifactStoreError(f"S3 GET {key}: {e}")
+        return _iter_chunks(response)
+
+    def _upload(self, key: str, path: Path, size: int, sha256: str, content_type: str):
+        # Envoi en flux depuis le fichier: le hash du contenu (clé de l'objet) signe la charge utile,
+        # le stockage refuse un corps différent (fichier modifié entre le calcul de la clé et l'envoi)
+        headers = {'Content-Type': content_type, 'Content-Length': str(size)}
+        try:
+            with open(path, 'rb') as f, self._request('PUT', key, data=f, headers=headers, payload_hash=sha256):
+                pass
+        except urllib.error.HTTPError as e:
+            raise ArtifactStoreError(f"S3 PUT {key}: HTTP {e.code}")
+        except OSError as e:
+            raise ArtifactStoreError(f"S3 PUT {key}: {e}")
+        logger.info(f"[ARTEFACTS] Objet envoyé: {key} ({size / 1024:.0f} Ko)")
+
+    def _write_small(self, key: str, data: bytes):
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(len(data))}
+        try:
+            with self._request('PUT', key, data=data, headers=headers, payload_hash=hashlib.sha256(data).hexdigest()):
+                pass
+        except (urllib.error.HTTPError, OSError) as e:
+            raise ArtifactStoreError(f"S3 PUT {key}: {e}")
+
+    def _read_small(self, key: str) -> Optional[bytes]:
+        try:
+            with self._request('GET', key) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise ArtifactStoreError(f"S3 GET {key}: HTTP {e.code}")
+        except OSError as e:
+            raise ArtifactStoreError(f"S3 GET {key}: {e}")
+
+    def presigned_url(self, key: str, filename: Optional[str] = None,
+                      expires: int = DEFAULT_URL_EXPIRES) -> Optional[str]:
+        scheme, host, path = self._location(key, self.public_endpoint)
+        extra = {'response-content-disposition': f'attachment; filename="{filename}"'} if filename else None
+        query = presign_query('GET', host, path, self.access_key, self.secret_key, self.region, expires, extra=extra)
+        return f"{scheme}://{host}{_quote(path, safe='/-_.~')}?{query}"
+
+
+def create_artifact_store(kind: str, local_root: Path, **s3_options) -> ArtifactStore:
+    """Stockage configuré: 'local' (répertoire) ou 's3' (options S3ArtifactStore)."""
+    if kind == 's3':
+        return S3ArtifactStore(**s3_options)
+    if kind != 'local':
+        raise ArtifactStoreError(f"Stockage d'artefacts inconnu: {kind!r} (local ou s3)")
+    return LocalArtifactStore(local_root)
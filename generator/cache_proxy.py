@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Proxy cache LAN des installeurs
+
+Cache HTTP en lecture traversante (read-through) pour les URLs d'installeurs
+référencées dans apps.json. Lors d'un déploiement en salle, seul le premier
+poste télécharge depuis Internet; les suivants sont servis depuis le disque du
+conteneur, y compris pendant que le premier téléchargement est encore en cours.
+
+Fonctionnement:
+- Allowlist: seules les URLs du catalogue sont relayées (pas de proxy ouvert)
+- Un seul téléchargement par URL, partagé entre les clients concurrents, y compris
+  entre workers et réplicas partageant le répertoire de cache (fichier verrou
+  créé en exclusif; les autres processus suivent le fichier temporaire)
+- Téléchargement dans un fichier temporaire unique, renommé atomiquement une fois complet
+- Requêtes Range supportées (reprise de téléchargement côté client)
+- Revalidation auprès de l'origine (If-None-Match / If-Modified-Since) des entrées
+  plus anciennes que max_age_seconds: un installeur republié sous la même URL
+  remplace la copie en cache; origine injoignable: la copie en cache est servie
+- Éviction LRU selon une taille maximale sur disque
+"""
+
+import json
+import hashlib
+import logging
+import os
+import posixpath
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from flask import Blueprint, Response, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+ORIGIN_TIMEOUT_SECONDS = 60
+# Verrou non rafraîchi depuis ce délai: processus propriétaire arrêté, téléchargement abandonné
+STALE_DOWNLOAD_SECONDS = 2 * ORIGIN_TIMEOUT_SECONDS
+REMOTE_POLL_SECONDS = 0.2
+USER_AGENT = 'PostBootSetup-CacheProxy/5.0'
+# Requête conditionnelle courte: origine lente ou injoignable, la copie en cache est servie
+REVALIDATE_TIMEOUT_SECONDS = 10
+
+
+class ProxyError(Exception):
+    """Erreur lors de la récupération d'un installeur depuis l'origine."""
+
+
+def collect_installer_urls(apps_config: dict) -> Set[str]:
+    """
+    Collecte les URLs d'installeurs (url, fallbackUrl) de toutes les sections du catalogue.
+    Les web apps (PWA) sont ignorées: ce ne sont pas des téléchargements.
+    """
+    apps = list(apps_config.get('master', []))
+    apps += list(apps_config.get('common_apps', {}).values())
+    apps += list(apps_config.get('optional', []))
+    for profile in apps_config.get('profiles', {}).values():
+        apps += [app for app in profile.get('apps', []) if 'ref' not in app]
+
+    urls = set()
+    for app in apps:
+        if app.get('webApp'):
+            continue
+        for field in ('url', 'fallbackUrl'):
+            if app.get(field):
+                urls.add(app[field])
+    return urls
+
+
+def parse_range(range_header: Optional[str], total_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Analyse un en-tête Range à plage unique ("bytes=a-b", "bytes=a-", "bytes=-n").
+
+    Returns:
+        Tuple (start, end) inclusif, None si absent ou non supporté
+
+    Raises:
+        ValueError: si la plage n'est pas satisfiable
+    """
+    if not range_header:
+        return None
+
+    match = re.fullmatch(r'\s*bytes=(\d*)-(\d*)\s*', range_header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+
+    if not match.group(1):
+        # Suffixe: les n derniers octets
+        length = int(match.group(2))
+        if length == 0:
+            raise ValueError("Plage vide")
+        return max(total_size - length, 0), total_size - 1
+
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else total_size - 1
+    if start >= total_size or end < start:
+        raise ValueError(f"Plage non satisfiable: {range_header}")
+    return start, min(end, total_size - 1)
+
+
+class _Download:
+    """Téléchargement en cours depuis l'origine, lisible pendant l'écriture."""
+
+    def __init__(self):
+        self.total_size: Optional[int] = None
+        self.content_type = 'application/octet-stream'
+        self.path: Optional[Path] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.written = 0
+        self.done = False
+        self.error: Optional[str] = None
+        self.headers_ready = threading.Event()
+        self.cond = threading.Condition()
+
+
+class InstallerCacheProxy:
+    """Cache disque des installeurs avec téléchargement unique et éviction LRU."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int, allowed_urls: Set[str], metrics=None,
+                 max_age_seconds: float = 0):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.allowed_urls = set(allowed_urls)
+        # Durée pendant laquelle une entrée est servie sans interroger l'origine (0: revalidée à chaque accès)
+        self.max_age_seconds = max_age_seconds
+        self._downloads: Dict[str, _Download] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'shared': 0, 'evictions': 0, 'errors': 0,
+                      'revalidations': 0, 'refreshes': 0}
+        self.metrics = metrics
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._cleanup_incomplete()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _normalize(url: str) -> str:
+        """URL avec chemin normalisé (segments . et .. résolus, comme le fera l'origine)."""
+        parts = urllib.parse.urlsplit(url)
+        path = urllib.parse.unquote(parts.path)
+        normalized = posixpath.normpath(path) if path else '/'
+        if path.endswith('/') and not normalized.endswith('/'):
+            normalized += '/'
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc, normalized, parts.query, ''))
+
+    def is_allowed(self, url: str) -> bool:
+        """Vérifie qu'une URL appartient au catalogue (ou à un répertoire filePattern du catalogue)."""
+        # Les scripts basculent les URLs http:// du catalogue en https:// quand c'est possible
+        candidates = {url}
+        if url.startswith('https://'):
+            candidates.add('http://' + url[len('https://'):])
+
+        for candidate in candidates:
+            if candidate in self.allowed_urls:
+                return True
+            # Répertoire: préfixe vérifié sur le chemin normalisé (pas de sortie par "../")
+            normalized = self._normalize(candidate)
+            if any(allowed.endswith('/') and normalized.startswith(allowed) for allowed in self.allowed_urls):
+                return True
+        return False
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _data_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _lock_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.lock"
+
+    def _cleanup_incomplete(self):
+        """
+        Supprime au démarrage les restes de téléchargements interrompus: fichiers temporaires
+        et verrous abandonnés (non modifiés depuis STALE_DOWNLOAD_SECONDS), données sans métadonnées.
+        Les téléchargements en cours dans d'autres workers écrivent en continu et sont conservés.
+        """
+        cutoff = time.time() - STALE_DOWNLOAD_SECONDS
+        for pattern in ('*.part', '*.lock', '*.tmp', '*.bin'):
+            for path in self.cache_dir.glob(pattern):
+                if path.suffix == '.bin' and self._meta_path(path.stem).exists():
+                    continue
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except FileNotFoundError:
+                    continue
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Retourne les métadonnées si l'URL est entièrement en cache (et met à jour l'accès LRU)."""
+        key = self.cache_key(url)
+        meta_path = self._meta_path(key)
+        data_path = self._data_path(key)
+        if not meta_path.exists() or not data_path.exists():
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        # La date de modification du fichier de données sert d'horodatage LRU
+        now = time.time()
+        try:
+            os.utime(data_path, (now, now))
+        except OSError:
+            pass
+        return meta
+
+    def _revalidate(self, url: str, key: str, meta: dict) -> bool:
+        """
+        Vérifie qu'une entrée en cache correspond toujours à l'origine (requête conditionnelle).
+
+        Returns:
+            True si l'entrée peut être servie (récente, 304, même ETag ou origine injoignable),
+            False si l'origine publie un autre contenu (entrée invalidée, à retélécharger)
+        """
+        validated_at = meta.get('validated_at', meta.get('fetched_at', 0))
+        if time.time() - validated_at < self.max_age_seconds:
+            return True
+
+        headers = {'User-Agent': USER_AGENT}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        unchanged = False
+        if len(headers) > 1:
+            try:
+                # Corps non lu: en cas de changement, le téléchargement passe par le chemin habituel
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers),
+                                            timeout=REVALIDATE_TIMEOUT_SECONDS) as response:
+                    unchanged = bool(meta.get('etag')) and response.headers.get('ETag') == meta['etag']
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    logger.warning(f"[PROXY] Revalidation impossible ({e.code}), copie en cache servie: {url}")
+                unchanged = True
+            except (urllib.error.URLError, OSError) as e:
+                logger.warning(f"[PROXY] Origine injoignable ({e}), copie en cache servie: {url}")
+                return True
+
+        if unchanged:
+            self._count('revalidations')
+            try:
+                self._write_meta(key, {**meta, 'validated_at': time.time()})
+            except OSError as e:
+                logger.warning(f"[PROXY] Mise à jour des métadonnées impossible {key[:12]}...: {e}")
+            return True
+
+        self._count('refreshes')
+        logger.info(f"[PROXY] Nouvelle version à l'origine, entrée invalidée: {url}")
+        self._meta_path(key).unlink(missing_ok=True)
+        return False
+
+    def _acquire_download_lock(self, key: str) -> bool:
+        """Verrou inter-processus du téléchargement (création exclusive), repris s'il est abandonné."""
+        lock_path = self._lock_path(key)
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if lock_path.stat().st_mtime >= time.time() - STALE_DOWNLOAD_SECONDS:
+                        return False
+                    logger.warning(f"[PROXY] Verrou abandonné repris: {key[:12]}...")
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    continue
+        return False
+
+    def _get_or_start_download(self, url: str) -> Tuple[Optional[_Download], bool]:
+        """
+        Retourne le téléchargement en cours pour cette URL, ou en démarre un nouveau.
+        (None, False) si un autre processus télécharge déjà l'URL.
+        """
+        key = self.cache_key(url)
+        with self._lock:
+            download = self._downloads.get(key)
+            if download:
+                return download, False
+            if not self._acquire_download_lock(key):
+                return None, False
+            download = _Download()
+            self._downloads[key] = download
+
+        thread = threading.Thread(target=self._run_download, args=(url, key, download), daemon=True)
+        thread.start()
+        return download, True
+
+    def _write_meta(self, key: str, meta: dict):
+        tmp_path = self._meta_path(key).with_suffix(f'.{uuid.uuid4().hex[:8]}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(key))
+
+    def _run_download(self, url: str, key: str, download: _Download):
+        """Télécharge l'URL depuis l'origine vers le disque en notifiant les lecteurs."""
+        lock_path = self._lock_path(key)
+        part_path = self.cache_dir / f"{key}.{os.getpid()}.{uuid.uuid4().hex[:8]}.part"
+        download.path = part_path
+        try:
+            origin_request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+            with urllib.request.urlopen(origin_request, timeout=ORIGIN_TIMEOUT_SECONDS) as response:
+                content_length = response.headers.get('Content-Length')
+                download.total_size = int(content_length) if content_length else None
+                download.content_type = response.headers.get('Content-Type', 'application/octet-stream')
+                download.etag = response.headers.get('ETag')
+                download.last_modified = response.headers.get('Last-Modified')
+
+                with open(part_path, 'wb') as f:
+                    # Le verrou décrit le téléchargement: les autres processus suivent le fichier temporaire
+                    lock_path.write_text(json.dumps({
+                        'part': part_path.name,
+                        'size': download.total_size,
+                        'content_type': download.content_type,
+                        'etag': download.etag,
+                        'last_modified': download.last_modified,
+                    }), encoding='utf-8')
+                    # Le fichier existe: les lecteurs concurrents peuvent le suivre
+                    download.headers_ready.set()
+                    while True:
+                        chunk = response.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        f.flush()
+                        # Verrou rafraîchi: le téléchargement est vivant
+                        os.utime(lock_path)
+                        with download.cond:
+                            download.written += len(chunk)
+                            download.cond.notify_all()
+
+            if download.total_size is not None and download.written != download.total_size:
+                raise ProxyError(f"Téléchargement incomplet ({download.written}/{download.total_size} octets)")
+
+            # Données complètes renommées atomiquement, puis métadonnées (entrée visible par lookup)
+            os.replace(part_path, self._data_path(key))
+            fetched_at = time.time()
+            self._write_meta(key, {
+                'url': url,
+                'size': download.written,
+                'content_type': download.content_type,
+                'etag': download.etag,
+                'last_modified': download.last_modified,
+                'fetched_at': fetched_at,
+                'validated_at': fetched_at
+            })
+
+            with download.cond:
+                download.total_size = download.written
+                download.done = True
+                download.cond.notify_all()
+
+            logger.info(f"[PROXY] Mis en cache: {url} ({download.written} octets)")
+
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"[PROXY] Échec téléchargement {url}: {e}")
+            part_path.unlink(missing_ok=True)
+            with download.cond:
+                download.error = str(e)
+                download.done = True
+                download.cond.notify_all()
+            download.headers_ready.set()
+
+        finally:
+            lock_path.unlink(missing_ok=True)
+            try:
+                # Éviction avant la fin du téléchargement (in_progress): l'entrée reste protégée
+                if download.error is None:
+                    self.evict()
+            finally:
+                with self._lock:
+                    self._downloads.pop(key, None)
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+        entries = []
+        for meta_path in self.cache_dir.glob('*.json'):
+            data_path = self._data_path(meta_path.stem)
+            if data_path.exists():
+                stat = data_path.stat()
+                entries.append((stat.st_mtime, stat.st_size, meta_path.stem))
+
+        total = sum(size for _, size, _ in entries)
+        with self._lock:
+            in_progress = set(self._downloads.keys())
+
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key in in_progress or self._lock_path(key).exists():
+                continue
+            try:
+                self._meta_path(key).unlink(missing_ok=True)
+                self._data_path(key).unlink(missing_ok=True)
+                total -= size
+                self._count('evictions')
+                logger.info(f"[PROXY] Éviction: {key[:12]}... ({size} octets)")
+            except OSError as e:
+                # Fichier en cours de lecture (Windows): réessayé à la prochaine éviction
+                logger.warning(f"[PROXY] Éviction impossible {key[:12]}...: {e}")
+
+    def _read_file(self, path: Path, start: int, end: int) -> Iterator[bytes]:
+        """Lit un fichier complet entre start et end (inclus)."""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def _open_download(self, key: str, part_path: Path):
+        """Fichier temporaire du téléchargement, ou fichier final s'il vient d'être renommé."""
+        try:
+            return open(part_path, 'rb')
+        except FileNotFoundError:
+            return open(self._data_path(key), 'rb')
+
+    def _follow_download(self, key: str, download: _Download, start: int, end: Optional[int]) -> Iterator[bytes]:
+        """Lit un fichier en cours d'écriture en attendant les octets manquants."""
+        position = start
+        with self._open_download(key, download.path) as f:
+            while end is None or position <= end:
+                with download.cond:
+                    while download.written <= position and not download.done:
+                        download.cond.wait(timeout=1)
+                    available = download.written
+                    if download.error:
+                        raise ProxyError(download.error)
+                if available <= position:
+                    break
+
+                f.seek(position)
+                limit = available if end is None else min(available, end + 1)
+                while position < limit:
+                    chunk = f.read(min(CHUNK_SIZE, limit - position))
+                    if not chunk:
+                        break
+                    position += len(chunk)
+                    yield chunk
+
+    def _wait_remote_download(self, key: str) -> Optional[dict]:
+        """
+        Attend les en-têtes d'un téléchargement mené par un autre processus (contenu du verrou).
+        None si le téléchargement s'est terminé entre-temps (entrée en cache).
+        """
+        deadline = time.monotonic() + ORIGIN_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if self._meta_path(key).exists():
+                return None
+            try:
+                return json.loads(self._lock_path(key).read_text(encoding='utf-8'))
+            except FileNotFoundError:
+                if not self._meta_path(key).exists():
+                    raise ProxyError("Téléchargement interrompu par un autre worker")
+                return None
+            except ValueError:
+                time.sleep(REMOTE_POLL_SECONDS)
+        raise ProxyError("Timeout en attente du téléchargement d'un autre worker")
+
+    def _follow_remote_download(self, key: str, info: dict, start: int, end: Optional[int]) -> Iterator[bytes]:
+        """Suit le fichier temporaire d'un autre processus jusqu'à la création des métadonnées."""
+        position = start
+        last_progress = time.monotonic()
+        with self._open_download(key, self.cache_dir / info['part']) as f:
+            while end is None or position <= end:
+                available = os.fstat(f.fileno()).st_size
+                if available > position:
+                    f.seek(position)
+                    limit = available if end is None else min(available, end + 1)
+                    while position < limit:
+                        chunk = f.read(min(CHUNK_SIZE, limit - position))
+                        if not chunk:
+                            break
+                        position += len(chunk)
+                        yield chunk
+                    last_progress = time.monotonic()
+                    continue
+
+                if self._meta_path(key).exists():
+                    # Terminé: rien de plus que ce qui est déjà sur disque
+                    if os.fstat(f.fileno()).st_size <= position:
+                        break
+                    continue
+                if not self._lock_path(key).exists() or time.monotonic() - last_progress > ORIGIN_TIMEOUT_SECONDS:
+                    raise ProxyError("Téléchargement interrompu par un autre worker")
+                time.sleep(REMOTE_POLL_SECONDS)
+
+    def serve(self, url: str, range_header: Optional[str] = None) -> Tuple[int, dict, Iterator[bytes]]:
+        """
+        Sert une URL depuis le cache, en la téléchargeant depuis l'origine si nécessaire.
+
+        Returns:
+            Tuple (status_code, headers, body_iterator)
+
+        Raises:
+            ProxyError: si l'origine est injoignable
+            ValueError: si la plage demandée n'est pas satisfiable
+        """
+        key = self.cache_key(url)
+        meta = self.lookup(url)
+        if meta and not self._revalidate(url, key, meta):
+            meta = None
+        download = remote = None
+
+        if not meta:
+            download, started = self._get_or_start_download(url)
+            if download is None:
+                # Téléchargé par un autre worker: suivre son fichier temporaire
+                remote = self._wait_remote_download(key)
+                if remote is None:
+                    meta = self.lookup(url)
+                    if not meta:
+                        raise ProxyError(f"Entrée de cache introuvable après téléchargement: {url}")
+
+        if meta:
+            self._count('hits')
+            total_size = meta['size']
+            content_type = meta.get('content_type', 'application/octet-stream')
+            validators = meta
+            cache_status = 'HIT'
+        elif remote is not None:
+            self._count('shared')
+            total_size = remote.get('size')
+            content_type = remote.get('content_type') or 'application/octet-stream'
+            validators = remote
+            cache_status = 'SHARED'
+        else:
+            self._count('misses' if started else 'shared')
+            if not download.headers_ready.wait(timeout=ORIGIN_TIMEOUT_SECONDS):
+                raise ProxyError(f"Timeout de connexion à l'origine: {url}")
+            if download.error:
+                raise ProxyError(download.error)
+            total_size = download.total_size
+            content_type = download.content_type
+            validators = {'etag': download.etag, 'last_modified': download.last_modified}
+            cache_status = 'MISS' if started else 'SHARED'
+
+        if self.metrics is not None:
+            self.metrics.inc('postboot_cache_requests_total', cache='installer_proxy', result=cache_status.lower())
+
+        headers = {
+            'Content-Type': content_type,
+            'Accept-Ranges': 'bytes',
+            'X-Cache': cache_status
+        }
+        # Version servie: le client peut la comparer à celle annoncée par l'origine
+        if validators.get('etag'):
+            headers['ETag'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['Last-Modified'] = validators['last_modified']
+
+        byte_range = parse_range(range_header, total_size) if total_size is not None else None
+        start, end = byte_range if byte_range else (0, None if total_size is None else total_size - 1)
+        status = 206 if byte_range else 200
+
+        if end is not None:
+            headers['Content-Length'] = str(end - start + 1)
+        if byte_range:
+            headers['Content-Range'] = f"bytes {start}-{end}/{total_size}"
+
+        if meta:
+            body = self._read_file(self._data_path(key), start, end)
+        elif remote is not None:
+            body = self._follow_remote_download(key, remote, start, end)
+        else:
+            body = self._follow_download(key, download, start, end)
+
+        return status, headers, body
+
+    def get_stats(self) -> dict:
+        """Statistiques du cache (entrées, taille disque, compteurs)."""
+        entries = [p for p in self.cache_dir.glob('*.json') if self._data_path(p.stem).exists()]
+        total_bytes = sum(self._data_path(p.stem).stat().st_size for p in entries)
+        with self._lock:
+            in_progress = len(self._downloads)
+            stats = dict(self.stats)
+        return {
+            'entries': len(entries),
+            'total_bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'in_progress': in_progress,
+            'allowed_urls': len(self.allowed_urls),
+            **stats
+        }
+
+
+def create_proxy_blueprint(proxy: InstallerCacheProxy) -> Blueprint:
+    """Crée le blueprint Flask exposant le proxy cache (/api/proxy)."""
+    bp = Blueprint('installer_proxy', __name__)
+
+    @bp.route('/api/proxy', methods=['GET'])
+    def proxy_download():
+        """Relaie un installeur du catalogue: GET /api/proxy?url=<url encodée>."""
+        url = request.args.get('url', '')
+        if not url:
+            return jsonify({'success': False, 'error': "Paramètre 'url' manquant"}), 400
+        if not proxy.is_allowed(url):
+            logger.warning(f"[PROXY] URL refusée (hors catalogue): {url} - IP: {request.remote_addr}")
+            return jsonify({'success': False, 'error': 'URL non référencée dans le catalogue'}), 403
+
+        try:
+            status, headers, body = proxy.serve(url, request.headers.get('Range'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 416
+        except ProxyError as e:
+            return jsonify({'success': False, 'error': f"Origine injoignable: {e}"}), 502
+
+        logger.info(f"[PROXY] {headers['X-Cache']} {url} - IP: {request.remote_addr}")
+        return Response(body, status=status, headers=headers, direct_passthrough=True)
+
+    @bp.route('/api/proxy/stats', methods=['GET'])
+    def proxy_stats():
+        """Statistiques du proxy cache."""
+        return jsonify({'success': True, 'proxy': proxy.get_stats()})
+
+    return bp
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Recherche indexée dans le catalogue d'applications
+
+Index inversé en mémoire sur le nom, la catégorie, l'identifiant winget et la
+description des applications (master, common_apps, profils, optionnelles):
+- correspondance exacte, par préfixe (recherche au fil de la frappe) et
+  approximative (une faute de frappe: index des suppressions d'un caractère)
+- facettes par catégorie avec effectifs, filtres par catégorie et par source
+- pagination par curseur opaque, projection des champs retournés
+
+L'index est construit une fois par version du catalogue (empreinte du contenu,
+identique sur tous les workers): une recherche ne parcourt que les listes des
+termes de la requête, indépendamment de la taille du catalogue.
+"""
+
+import base64
+import bisect
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional
+
+from flask import Blueprint, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 4
+# Nombre maximal de termes du vocabulaire développés pour un préfixe
+MAX_PREFIX_EXPANSION = 500
+
+# Poids des champs indexés
+FIELD_WEIGHTS = {'name': 4.0, 'winget': 3.0, 'category': 2.0, 'description': 1.0}
+# Facteur appliqué selon le type de correspondance du terme
+MATCH_FACTORS = {'exact': 1.0, 'prefix': 0.6, 'fuzzy': 0.3}
+
+SOURCES = ('master', 'common', 'profile', 'optional')
+DEFAULT_CATEGORY = 'Autre'
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+class SearchError(ValueError):
+    """Paramètre de recherche invalide (curseur, filtre)."""
+
+
+def normalize(text: str) -> str:
+    """Minuscules sans accents."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(normalize(text))
+
+
+def _deletions(token: str) -> set:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def app_id(app: dict) -> str:
+    return app.get('winget') or app.get('url') or app.get('name')
+
+
+def catalog_fingerprint(apps_config: dict) -> str:
+    """Empreinte du contenu du catalogue (même valeur sur tous les workers)."""
+    payload = json.dumps(apps_config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class CatalogIndex:
+    """Index inversé immuable d'une version du catalogue résolu."""
+
+    def __init__(self, resolved_config: dict, version: str):
+        self.version = version
+        self.apps: List[dict] = []
+        seen = set()
+
+        def add(app: dict, source: str):
+            identifier = app_id(app)
+            if identifier and identifier not in seen:
+                seen.add(identifier)
+                self.apps.append({**app, 'id': identifier, 'source': source})
+
+        for app in resolved_config.get('master', []):
+            add(app, 'master')
+        for app in resolved_config.get('common_apps', {}).values():
+            add(app, 'common')
+        for profile in resolved_config.get('profiles', {}).values():
+            for app in profile.get('apps', []):
+                add(app, 'profile')
+        for app in resolved_config.get('optional', []):
+            add(app, 'optional')
+
+        # Terme -> {indice d'application: poids}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        for doc, app in enumerate(self.apps):
+            for field, weight in FIELD_WEIGHTS.items():
+                value = app.get(field)
+                if not value:
+                    continue
+                terms = set(tokenize(str(value)))
+                if field == 'winget':
+                    terms.add(normalize(value))  # Identifiant complet (Microsoft.VisualStudioCode)
+                for term in terms:
+                    postings = self.postings.setdefault(term, {})
+                    postings[doc] = max(postings.get(doc, 0.0), weight)
+
+        self.vocabulary = sorted(self.postings)
+        self.deletions: Dict[str, List[str]] = {}
+        for term in self.vocabulary:
+            if len(term) >= MIN_FUZZY_LENGTH:
+                for variant in _deletions(term) | {term}:
+                    self.deletions.setdefault(variant, []).append(term)
+
+        self.categories = [app.get('category') or DEFAULT_CATEGORY for app in self.apps]
+        # Ordre d'affichage sans requête (par nom), et rang de chaque application pour départager les scores
+        self.by_name = sorted(range(len(self.apps)), key=lambda doc: normalize(self.apps[doc].get('name', '')))
+        self.name_rank = [0] * len(self.apps)
+        for rank, doc in enumerate(self.by_name):
+            self.name_rank[doc] = rank
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Termes du vocabulaire correspondant à un terme de requête, avec le facteur de correspondance."""
+        matches = {}
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self.vocabulary, token)
+            for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+                if not term.startswith(token):
+                    break
+                matches[term] = MATCH_FACTORS['prefix']
+        if len(token) >= MIN_FUZZY_LENGTH:
+            for variant in _deletions(token) | {token}:
+                for term in self.deletions.get(variant, ()):
+                    matches.setdefault(term, MATCH_FACTORS['fuzzy'])
+        if token in self.postings:
+            matches[token] = MATCH_FACTORS['exact']
+        return matches
+
+    def match(self, query: str) -> Optional[Dict[int, float]]:
+        """Applications contenant tous les termes de la requête, avec leur score (None: pas de requête)."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return None
+
+        scores: Optional[Dict[int, float]] = None
+        # Termes les plus sélectifs d'abord: l'intersection reste petite
+        expansions = sorted((self._expand(token) for token in tokens),
+                            key=lambda terms: sum(len(self.postings[t]) for t in terms))
+        for terms in expansions:
+            token_scores: Dict[int, float] = {}
+            for term, factor in terms.items():
+                for doc, weight in self.postings[term].items():
+                    if scores is not None and doc not in scores:
+                        continue
+                    score = weight * factor
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc: scores[doc] + score for doc, score in token_scores.items()}
+            if not scores:
+                break
+        return scores
+
+    def search(self, query: str = '', categories: Optional[List[str]] = None, sources: Optional[List[str]] = None,
+               offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        """
+        Recherche paginée.
+
+        Returns:
+            {'total', 'docs' (indices de la page), 'facets' ({catégorie: effectif}), 'scores'}
+        """
+        scores = self.match(query)
+        if scores is None:
+            candidates = self.by_name
+        else:
+            candidates = sorted(scores, key=lambda doc: (-scores[doc], self.name_rank[doc]))
+        if sources:
+            candidates = [doc for doc in candidates if self.apps[doc]['source'] in sources]
+
+        # Facettes calculées avant le filtre de catégorie (les autres catégories restent proposées)
+        categories_of = self.categories
+        facets: Dict[str, int] = {}
+        for doc in candidates:
+            category = categories_of[doc]
+            facets[category] = facets.get(category, 0) + 1
+        if categories:
+            wanted = set(categories)
+            candidates = [doc for doc in candidates if self.categories[doc] in wanted]
+
+        return {
+            'total': len(candidates),
+            'docs': candidates[offset:offset + limit],
+            'facets': facets,
+            'scores': scores or {},
+        }
+
+
+def encode_cursor(version: str, params_key: str, offset: int) -> str:
+    payload = json.dumps({'v': version, 'p': params_key, 'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, version: str, params_key: str) -> int:
+    """Position encodée dans le curseur; SearchError si illisible, périmé ou d'une autre recherche."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        offset = int(payload['o'])
+    except (ValueError, KeyError, TypeError):
+        raise SearchError("Curseur invalide")
+    if payload.get('v') != version:
+        raise SearchError("Curseur expiré: le catalogue a changé, relancer la recherche")
+    if payload.get('p') != params_key or offset < 0:
+        raise SearchError("Curseur invalide pour cette recherche")
+    return offset
+
+
+class CatalogSearch:
+    """Index du catalogue courant, reconstruit lorsque le catalogue change."""
+
+    def __init__(self, get_catalog: Callable[[], dict], get_resolved: Callable[[], dict]):
+        self.get_catalog = get_catalog
+        self.get_resolved = get_resolved
+        self._lock = threading.Lock()
+        self._source = None
+        self._index: Optional[CatalogIndex] = None
+
+    def index(self) -> CatalogIndex:
+        catalog = self.get_catalog()
+        index = self._index
+        if index is not None and catalog is self._source:
+            return index
+        with self._lock:
+            if self._index is None or catalog is not self._source:
+                start = time.perf_counter()
+                self._index = CatalogIndex(self.get_resolved(), catalog_fingerprint(catalog))
+                self._source = catalog
+                logger.info(f"[RECHERCHE] Index du catalogue {self._index.version} construit: "
+                            f"{len(self._index.apps)} apps, {len(self._index.vocabulary)} termes "
+                            f"en {(time.perf_counter() - start) * 1000:.0f} ms")
+            return self._index
+
+
+def _split_param(name: str) -> List[str]:
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(value.strip() for value in raw.split(',') if value.strip())
+    return values
+
+
+def create_search_blueprint(search: CatalogSearch) -> Blueprint:
+    """Crée le blueprint Flask de recherche dans le catalogue (/api/apps/search)."""
+    bp = Blueprint('catalog_search', __name__)
+
+    @bp.route('/api/apps/search', methods=['GET'])
+    def search_apps():
+        """
+        Recherche paginée: GET /api/apps/search?q=visual&category=Développement&source=optional
+        &limit=20&cursor=...&fields=name,category,winget
+        """
+        query = request.args.get('q', '').strip()
+        categories = _split_param('category')
+        sources = _split_param('source')
+        fields = _split_param('fields')
+        limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+        unknown_sources = [source for source in sources if source not in SOURCES]
+        if unknown_sources:
+            return jsonify({'success': False, 'error': f"source doit être parmi {', '.join(SOURCES)}"}), 400
+
+        index = search.index()
+        params_key = hashlib.sha1(json.dumps([normalize(query), sorted(categories), sorted(sources)],
+                                             ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+        offset = 0
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                offset = decode_cursor(cursor, index.version, params_key)
+            except SearchError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+        result = index.search(query, categories, sources, offset, limit)
+        items = []
+        for doc in result['docs']:
+            app = index.apps[doc]
+            item = {key: app[key] for key in fields if key in app} if fields else dict(app)
+            item['id'] = app['id']
+            if doc in result['scores']:
+                item['score'] = round(result['scores'][doc], 2)
+            items.append(item)
+
+        next_offset = offset + len(items)
+        return jsonify({
+            'success': True,
+            'catalog_version': index.version,
+            'query': query,
+            'total': result['total'],
+            'items': items,
+            'facets': {'categories': [{'name': name, 'count': count}
+                                      for name, count in sorted(result['facets'].items(),
+                                                                key=lambda entry: (-entry[1], entry[0]))]},
+            'next_cursor': encode_cursor(index.version, params_key, next_offset)
+            if next_offset < result['total'] else None,
+        })
+
+    return bp
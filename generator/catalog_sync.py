@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Versions du catalogue et synchronisation différentielle
+
+Chaque version du catalogue (empreinte du contenu de apps.json, la même que
+catalog_version de /api/apps/search) est conservée sur disque dans un
+historique court. GET /api/catalog?since=<version> ne retourne que les
+applications et profils ajoutés, modifiés ou supprimés depuis cette version:
+un client à jour reçoit quelques centaines d'octets (ou un 304 avec ETag).
+
+Le catalogue est aplati en entrées indépendantes, identifiées par section:
+- applications: "master:<id>", "common:<clé>", "optional:<id>"
+- profils: "<clé du profil>" (définition brute, références {"ref": ...} comprises)
+
+Un client applique le delta à son cache local (ajout/remplacement des entrées
+added et changed, suppression des entrées removed) puis mémorise version.
+Si la version connue n'est plus dans l'historique, le catalogue complet est
+renvoyé (full: true).
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from flask import Blueprint, Response, jsonify, request
+
+from catalog_search import app_id, catalog_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_SIZE = 20
+# Deltas calculés gardés en mémoire (une entrée par version de départ)
+MAX_CACHED_DELTAS = 32
+META_KEYS = ('version', 'lastUpdate', 'company')
+
+
+def flatten_catalog(apps_config: dict) -> dict:
+    """Entrées indépendantes du catalogue: {'meta', 'apps', 'profiles'}."""
+    apps = {}
+    for app in apps_config.get('master', []):
+        apps[f"master:{app_id(app)}"] = app
+    for key, app in apps_config.get('common_apps', {}).items():
+        apps[f"common:{key}"] = app
+    for app in apps_config.get('optional', []):
+        apps[f"optional:{app_id(app)}"] = app
+    return {
+        'meta': {key: apps_config[key] for key in META_KEYS if key in apps_config},
+        'apps': apps,
+        'profiles': dict(apps_config.get('profiles', {})),
+    }
+
+
+def diff_entries(old: dict, new: dict) -> dict:
+    """Entrées ajoutées, modifiées (valeur complète) et supprimées (clés)."""
+    return {
+        'added': {key: value for key, value in new.items() if key not in old},
+        'changed': {key: value for key, value in new.items() if key in old and old[key] != value},
+        'removed': sorted(key for key in old if key not in new),
+    }
+
+
+class CatalogHistory:
+    """Historique court des versions du catalogue (un fichier JSON par version)."""
+
+    def __init__(self, directory: Path, max_versions: int = DEFAULT_HISTORY_SIZE):
+        self.directory = Path(directory)
+        self.max_versions = max(2, max_versions)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._source = None
+        self._version: Optional[str] = None
+        self._snapshot: Optional[dict] = None
+        self._deltas: Dict[str, dict] = {}
+
+    def _path(self, version: str) -> Path:
+        return self.directory / f"{version}.json"
+
+    def record(self, apps_config: dict) -> str:
+        """Enregistre la version courante si elle est nouvelle; retourne son identifiant."""
+        with self._lock:
+            if apps_config is self._source:
+                return self._version
+
+            version = catalog_fingerprint(apps_config)
+            snapshot = flatten_catalog(apps_config)
+            path = self._path(version)
+            if path.exists():
+                # Version déjà connue (redémarrage, retour arrière): la marquer comme la plus récente
+                os.utime(path)
+            else:
+                # Écriture atomique: plusieurs workers peuvent enregistrer la même version
+                tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+                tmp_path.write_text(json.dumps(snapshot, ensure_ascii=False), encoding='utf-8')
+                os.replace(tmp_path, path)
+                logger.info(f"[CATALOGUE] Nouvelle version {version} "
+                            f"({snapshot['meta'].get('version', '?')} du {snapshot['meta'].get('lastUpdate', '?')})")
+                self._prune(keep=version)
+
+            self._source = apps_config
+            self._version = version
+            self._snapshot = snapshot
+            self._deltas = {}
+            return version
+
+    def _prune(self, keep: str):
+        """Ne garde que les max_versions versions les plus récentes."""
+        snapshots = sorted(self.directory.glob('*.json'), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        for path in snapshots[self.max_versions:]:
+            if path.stem != keep:
+                path.unlink(missing_ok=True)
+
+    def versions(self) -> list:
+        """Versions connues, de la plus récente à la plus ancienne."""
+        snapshots = sorted(self.directory.glob('*.json'), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        return [path.stem for path in snapshots]
+
+    def _load(self, version: str) -> Optional[dict]:
+        path = self._path(version)
+        if not version.isalnum() or not path.is_file():
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def delta(self, since: str) -> Optional[dict]:
+        """Différences entre la version since et la version courante (None si since est inconnue)."""
+        with self._lock:
+            cached = self._deltas.get(since)
+            if cached is not None:
+                return cached
+            old = self._load(since)
+            if old is None:
+                return None
+            delta = {
+                'apps': diff_entries(old['apps'], self._snapshot['apps']),
+                'profiles': diff_entries(old['profiles'], self._snapshot['profiles']),
+            }
+            if len(self._deltas) >= MAX_CACHED_DELTAS:
+                self._deltas.pop(next(iter(self._deltas)))
+            self._deltas[since] = delta
+            return delta
+
+    def snapshot(self) -> dict:
+        return self._snapshot
+
+
+def create_catalog_blueprint(history: CatalogHistory, get_catalog: Callable[[], dict]) -> Blueprint:
+    """Crée le blueprint Flask de synchronisation du catalogue (/api/catalog)."""
+    bp = Blueprint('catalog_sync', __name__)
+
+    @bp.route('/api/catalog', methods=['GET'])
+    def catalog():
+        """Catalogue complet, ou delta depuis une version: GET /api/catalog?since=<version>."""
+        version = history.record(get_catalog())
+        etag = f'"{version}"'
+        since = request.args.get('since', '').strip()
+
+        if not since and etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=304)
+            response.headers['ETag'] = etag
+            return response
+        if since == version:
+            return jsonify({'success': True, 'version': version, 'since': since, 'full': False, 'unchanged': True})
+
+        snapshot = history.snapshot()
+        body = {'success': True, 'version': version, 'meta': snapshot['meta']}
+        delta = history.delta(since) if since else None
+        if delta is not None:
+            body.update({'since': since, 'full': False, 'unchanged': False, **delta})
+        else:
+            if since:
+                logger.info(f"[CATALOGUE] Version {since} inconnue ou expirée: catalogue complet envoyé")
+            body.update({'since': since or None, 'full': True, 'apps': snapshot['apps'],
+                         'profiles': snapshot['profiles']})
+
+        response = jsonify(body)
+        response.headers['ETag'] = etag
+        return response
+
+    @bp.route('/api/catalog/versions', methods=['GET'])
+    def catalog_versions():
+        """Versions disponibles pour ?since=, de la plus récente à la plus ancienne."""
+        current = history.record(get_catalog())
+        return jsonify({'success': True, 'current': current, 'versions': history.versions()})
+
+    return bp
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Modèle de coût statique des scripts générés
+
+Estime, sans produire le script, ce que coûtera son exécution: appels winget,
+téléchargements (et volume d'après le champ `size` du catalogue), chargements de
+ruche registre, énumérations AppX, modifications de services et redémarrages de
+l'explorateur.
+
+Les modules PowerShell sont analysés statiquement: découpage en fonctions, graphe
+d'appels depuis les points d'entrée appelés par l'orchestrateur, options désactivées
+écartées, puis comptage des opérations coûteuses dans les fonctions atteignables.
+Les boucles sur une liste littérale (services, valeurs registre) sont dépliées; les autres sites
+d'appel comptent pour un. Le résultat est une borne haute réaliste: les vérifications
+d'état désiré peuvent éviter une partie des modifications à l'exécution.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Set
+
+# Points d'entrée appelés par l'orchestrateur pour chaque module
+MODULE_ENTRY_POINTS = {
+    'debloat': ('Invoke-WindowsDebloat',),
+    'performance': ('Invoke-PerformanceOptimizations',),
+    'ui': ('Invoke-UICustomizations', 'Clear-TaskbarPins', 'Set-CustomPinnedApps'),
+}
+
+# Options transmises par l'orchestrateur à chaque module (clé de la configuration)
+MODULE_OPTIONS_KEY = {
+    'performance': 'performance_options',
+    'ui': 'ui_options',
+}
+
+# Appels jamais exécutés dans le script généré: l'UI est lancée avec -RestartExplorer $false,
+# l'orchestrateur redémarre l'explorateur une seule fois à la fin
+EXCLUDED_CALLS = {
+    'Invoke-UICustomizations': {'Restart-Explorer'},
+}
+
+# Écritures registre pour l'utilisateur courant et les futurs utilisateurs (ruche Default)
+_REGISTRY_USER_WRITES = re.compile(r'\b(?:Set-RegistryForAllUsers(?:Perf)?|Add-RegistryBatchValue)\b')
+_REGISTRY_WRITES = re.compile(r'\b(?:Set-RegistryForAllUsers(?:Perf)?|Add-RegistryBatchValue|Set-ItemProperty|New-ItemProperty)\b')
+_REG_LOAD = re.compile(r'\breg(?:\.exe)?\s+load\b', re.IGNORECASE)
+_APPX_ENUMERATIONS = re.compile(r'\b(?:Get-AppxPackage|Get-AppxProvisionedPackage)\b')
+_WINGET = re.compile(r'(?<![\w$-])winget(?:\.exe)?\b(?!\s*=)', re.IGNORECASE)
+_DOWNLOADS = re.compile(r'\b(?:Invoke-WebRequest|Start-BitsTransfer|DownloadFile|Invoke-RestMethod)\b', re.IGNORECASE)
+_EXPLORER_STOP = re.compile(r'Stop-Process\s+-Name\s+["\']?explorer\b', re.IGNORECASE)
+_SERVICE_CALL = re.compile(r'\bSet-ServiceDesiredState\b')
+_OPTION_MAP_ENTRY = re.compile(r'"(\w+)"\s*=\s*\{\s*([A-Z][\w-]+)\s*\}')
+_OPTION_PROPERTY = re.compile(r'\$Options\.(\w+)\b(?!\s*\()')
+_FUNCTION = re.compile(r'(?m)^function\s+([\w-]+)\s*\{')
+_IF_BLOCK = re.compile(r'\bif\s*\(')
+
+# Inventaire AppX mis en cache (Get-AppxInventory): une énumération installés + provisionnés
+APPX_INVENTORY_FUNCTION = 'Get-AppxInventory'
+
+
+def parse_size_bytes(size) -> Optional[int]:
+    """Convertit une taille annoncée du catalogue ("150 MB", "3 GB") en octets, None si inconnue."""
+    match = re.match(r'^\s*([\d.,]+)\s*(KB|MB|GB)\b', str(size or ''), re.IGNORECASE)
+    if not match:
+        return None
+    factor = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}[match.group(2).upper()]
+    return int(float(match.group(1).replace(',', '.')) * factor)
+
+
+def strip_comments(source: str) -> str:
+    """Retire les blocs <# #> et les commentaires de ligne (hors chaînes simples)."""
+    source = re.sub(r'<#.*?#>', '', source, flags=re.DOTALL)
+    return re.sub(r'(?m)(^|[ \t;])#(?!>).*$', r'\1', source)
+
+
+def _matching_brace(source: str, open_index: int) -> int:
+    depth = 0
+    for index in range(open_index, len(source)):
+        char = source[index]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(source) - 1
+
+
+def split_functions(source: str) -> Dict[str, str]:
+    """Découpe un module PowerShell (sans commentaires) en {nom de fonction: corps}."""
+    functions = {}
+    for match in _FUNCTION.finditer(source):
+        start = match.end() - 1
+        functions[match.group(1)] = source[start + 1:_matching_brace(source, start)]
+    return functions
+
+
+def _gated_blocks(body: str, options: dict) -> List[tuple]:
+    """
+    Plages (début, fin) des blocs `if (...)` désactivés par les options: condition
+    n'utilisant que des `-and` et lisant une option `$Options.X` fausse.
+    """
+    disabled = []
+    for match in _IF_BLOCK.finditer(body):
+        cond_start = match.end() - 1
+        depth = 0
+        cond_end = cond_start
+        for index in range(cond_start, len(body)):
+            if body[index] == '(':
+                depth += 1
+            elif body[index] == ')':
+                depth -= 1
+                if depth == 0:
+                    cond_end = index
+                    break
+        condition = body[cond_start:cond_end + 1]
+        if '-or' in condition or '-not' in condition:
+            continue
+        referenced = _OPTION_PROPERTY.findall(condition)
+        if not referenced or all(options.get(name) for name in referenced):
+            continue
+        block_start = body.find('{', cond_end)
+        if block_start != -1:
+            disabled.append((block_start, _matching_brace(body, block_start)))
+    return disabled
+
+
+def _active_body(body: str, options: dict) -> str:
+    """Corps de fonction sans les blocs désactivés par les options."""
+    for start, end in sorted(_gated_blocks(body, options), reverse=True):
+        body = body[:start] + body[end + 1:]
+    return body
+
+
+def _matching_paren(source: str, open_index: int) -> int:
+    depth = 0
+    for index in range(open_index, len(source)):
+        if source[index] == '(':
+            depth += 1
+        elif source[index] == ')':
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(source) - 1
+
+
+def _literal_list_length(body: str, variable: str) -> Optional[int]:
+    """Nombre d'éléments d'une liste littérale `$var = @(...)` (tables de hachage ou chaînes)."""
+    assignment = re.search(r'%s\s*=\s*@\(' % re.escape(variable), body)
+    if not assignment:
+        return None
+    literal = body[assignment.end() - 1:_matching_paren(body, assignment.end() - 1) + 1]
+    items = literal.count('@{') or len(re.findall(r'"[^"]+"|\'[^\']+\'', literal))
+    return items or None
+
+
+def _site_multiplier(body: str, position: int) -> int:
+    """Nombre d'exécutions d'un site d'appel: dépliage des boucles foreach sur une liste littérale."""
+    multiplier = 1
+    for loop in re.finditer(r'foreach\s*\(\s*\$\w+\s+in\s+(\$\w+)\s*\)\s*\{', body[:position]):
+        block_end = _matching_brace(body, loop.end() - 1)
+        if block_end >= position:
+            multiplier *= _literal_list_length(body, loop.group(1)) or 1
+    return multiplier
+
+
+def _count_sites(pattern, body: str) -> int:
+    return sum(_site_multiplier(body, match.start()) for match in pattern.finditer(body))
+
+
+class ModuleCostAnalyzer:
+    """Analyse statique des modules PowerShell inclus dans un script."""
+
+    def __init__(self, sources: Dict[str, str]):
+        """
+        Args:
+            sources: {clé module (debloat, performance, ui): code du module}. Les modules
+                partagés (Registry-Batch, Desired-State) ne sont pas analysés: leurs
+                fonctions sont des primitives dont seuls les appels sont comptés.
+        """
+        self.functions: Dict[str, str] = {}
+        for source in sources.values():
+            self.functions.update(split_functions(strip_comments(source)))
+
+    def _callees(self, name: str, body: str) -> Set[str]:
+        return {
+            callee for callee in self.functions
+            if callee != name
+            and re.search(r'(?<![\w-])%s(?![\w-])' % re.escape(callee), body)
+        }
+
+    def _entry_body(self, entry: str, options: dict) -> str:
+        body = _active_body(self.functions.get(entry, ''), options)
+        for excluded in EXCLUDED_CALLS.get(entry, ()):
+            body = re.sub(r'(?<![\w-])%s(?![\w-])' % re.escape(excluded), '', body)
+        # Table option -> fonction (Invoke-PerformanceOptimizations): options fausses retirées
+        for option, function in _OPTION_MAP_ENTRY.findall(body):
+            if not options.get(option):
+                body = re.sub(r'"%s"\s*=\s*\{\s*%s\s*\}' % (option, re.escape(function)), '', body)
+        return body
+
+    def reachable(self, entry: str, options: dict) -> Dict[str, str]:
+        """Fonctions atteignables depuis un point d'entrée: {nom: corps actif}."""
+        if entry not in self.functions:
+            return {}
+        bodies = {entry: self._entry_body(entry, options)}
+        pending = [entry]
+        while pending:
+            name = pending.pop()
+            for callee in self._callees(name, bodies[name]):
+                if callee not in bodies:
+                    bodies[callee] = self.functions[callee]
+                    pending.append(callee)
+        return bodies
+
+    def analyze_module(self, module: str, options: dict) -> dict:
+        """Coût d'un module: opérations comptées sur ses fonctions atteignables."""
+        cost = {
+            'functions': [],
+            'registry_values': 0,
+            'registry_hive_loads': 0,
+            'appx_enumerations': 0,
+            'service_changes': 0,
+            'winget_invocations': 0,
+            'downloads': 0,
+            'explorer_restarts': 0,
+        }
+        uses_appx_inventory = False
+
+        for entry in MODULE_ENTRY_POINTS.get(module, ()):
+            bodies = self.reachable(entry, options)
+            entry_batched = 'Start-RegistryBatch' in bodies.get(entry, '')
+            for name, body in bodies.items():
+                if name not in cost['functions']:
+                    cost['functions'].append(name)
+                if _REGISTRY_WRITES.fullmatch(name):
+                    # Enveloppe (Set-RegistryForAllUsers): ses appelants sont déjà comptés
+                    continue
+                cost['registry_values'] += _count_sites(_REGISTRY_WRITES, body)
+                cost['registry_hive_loads'] += _count_sites(_REG_LOAD, body)
+                if not entry_batched:
+                    # Hors lot, chaque écriture HKCU charge la ruche Default
+                    cost['registry_hive_loads'] += _count_sites(_REGISTRY_USER_WRITES, body)
+                cost['service_changes'] += _count_sites(_SERVICE_CALL, body)
+                cost['winget_invocations'] += _count_sites(_WINGET, body)
+                cost['downloads'] += _count_sites(_DOWNLOADS, body)
+                cost['explorer_restarts'] += len(re.findall(r'(?<![\w-])Restart-Explorer\b', body))
+                if name != 'Restart-Explorer':
+                    cost['explorer_restarts'] += len(_EXPLORER_STOP.findall(body))
+                if name == APPX_INVENTORY_FUNCTION:
+                    uses_appx_inventory = True
+                else:
+                    cost['appx_enumerations'] += len(_APPX_ENUMERATIONS.findall(body))
+            if entry_batched:
+                # Lot externe: NTUSER.DAT chargé une seule fois à Complete-RegistryBatch
+                cost['registry_hive_loads'] += 1
+
+        cost['uses_appx_inventory'] = uses_appx_inventory
+        return cost
+
+
+def _app_cost(app: dict) -> dict:
+    """Coût d'installation d'une application du catalogue."""
+    cost = {'winget_invocations': 0, 'downloads': 0, 'download_bytes': parse_size_bytes(app.get('size'))}
+    if app.get('webApp'):
+        cost['download_bytes'] = 0
+        return cost
+
+    if app.get('customInstall') and app.get('installScript'):
+        script = strip_comments(app['installScript'])
+        cost['winget_invocations'] = _count_sites(_WINGET, script)
+        cost['downloads'] = _count_sites(_DOWNLOADS, script)
+    elif app.get('winget'):
+        # Test-AppInstalled (winget list) puis winget install
+        cost['winget_invocations'] = 2
+        cost['downloads'] = 1
+    elif app.get('url'):
+        # Listing du répertoire (filePattern) puis téléchargement
+        cost['downloads'] = 2 if app.get('filePattern') else 1
+    return cost
+
+
+def analyze_cost(config: dict, sources: Dict[str, str],
+                 estimate_seconds: Optional[Callable[[dict], float]] = None) -> dict:
+    """
+    Décompose le coût d'exécution d'un script sans le générer.
+
+    Args:
+        config: configuration validée du générateur (apps, modules, options)
+        sources: code des modules inclus ({debloat|performance|ui: code})
+        estimate_seconds: estimation de durée d'une application (optionnelle)
+
+    Returns:
+        Totaux, détail par application et par module
+    """
+    apps = list(config.get('apps', {}).get('master', [])) + list(config.get('apps', {}).get('profile', []))
+    modules = [module for module in config.get('modules', []) if module in sources]
+
+    app_details = []
+    unknown_size = []
+    for app in apps:
+        if not isinstance(app, dict):
+            continue
+        cost = _app_cost(app)
+        if cost['download_bytes'] is None:
+            unknown_size.append(app.get('name'))
+        if estimate_seconds:
+            cost['estimated_seconds'] = int(estimate_seconds(app))
+        app_details.append({'name': app.get('name'), **cost})
+
+    analyzer = ModuleCostAnalyzer(sources)
+    module_details = {
+        module: analyzer.analyze_module(module, config.get(MODULE_OPTIONS_KEY.get(module, ''), {}))
+        for module in modules
+    }
+
+    def module_total(field):
+        return sum(detail[field] for detail in module_details.values())
+
+    # Inventaire AppX partagé par les modules: installés + provisionnés, une seule fois
+    appx_inventory = 2 if any(d['uses_appx_inventory'] for d in module_details.values()) else 0
+    # Orchestrateur: winget --version, redémarrage unique de l'explorateur si UI
+    orchestrator_winget = 1
+    orchestrator_restarts = 1 if 'ui' in modules else 0
+
+    totals = {
+        'apps': len(app_details),
+        'winget_invocations': orchestrator_winget + module_total('winget_invocations')
+                              + sum(app['winget_invocations'] for app in app_details),
+        'downloads': module_total('downloads') + sum(app['downloads'] for app in app_details),
+        'download_bytes': sum(app['download_bytes'] or 0 for app in app_details),
+        'unknown_size_apps': unknown_size,
+        'registry_hive_loads': module_total('registry_hive_loads'),
+        'registry_values': module_total('registry_values'),
+        'appx_enumerations': appx_inventory + module_total('appx_enumerations'),
+        'service_changes': module_total('service_changes'),
+        'explorer_restarts': orchestrator_restarts + module_total('explorer_restarts'),
+    }
+    if estimate_seconds:
+        totals['estimated_seconds'] = sum(app['estimated_seconds'] for app in app_details)
+
+    for detail in module_details.values():
+        detail.pop('uses_appx_inventory')
+
+    return {'totals': totals, 'apps': app_details, 'modules': module_details}
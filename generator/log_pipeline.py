@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Journalisation non bloquante de l'API
+
+Les threads de requête ne font aucune entrée/sortie de journalisation: un
+QueueHandler dépose les enregistrements dans une file en mémoire (non bornée,
+jamais bloquante) et un QueueListener, dans un thread dédié, les formate et
+les écrit:
+- fichier en lignes JSON (un objet par ligne), avec rotation par taille
+- console au format texte habituel
+
+Sur le thread de requête, seul le message est figé (interpolation %-style des
+arguments, peu coûteuse); la mise en forme JSON, les traces d'exception et
+l'écriture sont faites par le listener. Les appels logger.debug("... %s", x)
+ne coûtent rien lorsque le niveau DEBUG est désactivé.
+
+Avec plusieurs workers gunicorn, chaque processus fait sa propre rotation:
+utiliser un fichier par worker (motif {pid} dans LOG_FILE) pour éviter que deux
+processus renomment le même fichier.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+try:
+    from flask import has_request_context, request
+    HAS_FLASK = True
+except ImportError:
+    HAS_FLASK = False
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Attributs standard d'un LogRecord: tout autre attribut (extra=...) est exporté en JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objet JSON par enregistrement: horodatage, niveau, logger, message, contexte."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute méthode, route et IP de la requête Flask en cours (lu sur le thread de requête)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if HAS_FLASK and has_request_context():
+            record.http = {'method': request.method, 'path': request.path, 'remote_addr': request.remote_addr}
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler qui laisse la mise en forme au listener.
+
+    QueueHandler.prepare() formate l'enregistrement complet (trace d'exception
+    comprise) sur le thread appelant pour le rendre sérialisable; la file étant
+    en mémoire, seul le message est figé ici (les arguments mutables pourraient
+    changer avant l'écriture).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class LogPipeline:
+    """File en mémoire + listener (fichier JSON avec rotation, console texte) installés sur un logger."""
+
+    def __init__(self, log_file: Optional[Path] = None, level: int = logging.INFO,
+                 max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT,
+                 console: bool = True, logger: Optional[logging.Logger] = None):
+        self._log_file_template = str(log_file) if log_file else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.console = console
+        self.logger = logger if logger is not None else logging.getLogger()
+        self._lock = threading.Lock()
+
+        self.handlers = self._build_handlers()
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = DeferredQueueHandler(self.queue)
+        self.queue_handler.addFilter(RequestContextFilter())
+
+        for handler in self.logger.handlers[:]:
+            self.logger.removeHandler(handler)
+        self.logger.addHandler(self.queue_handler)
+        self.logger.setLevel(level)
+
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+        # Le thread du listener ne survit pas à un fork (gunicorn --preload): le redémarrer
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    @property
+    def log_file(self) -> Optional[Path]:
+        if not self._log_file_template:
+            return None
+        return Path(self._log_file_template.replace('{pid}', str(os.getpid())))
+
+    def _build_handlers(self) -> list:
+        handlers = []
+        if self.log_file:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingFileHandler(self.log_file, maxBytes=self.max_bytes,
+                                               backupCount=self.backup_count, encoding='utf-8')
+            file_handler.setFormatter(JsonLinesFormatter())
+            handlers.append(file_handler)
+        if self.console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(stream_handler)
+        return handlers
+
+    def _restart_after_fork(self):
+        # Nouvelle file (l'ancienne peut avoir été copiée dans un état incohérent) et nouveau thread
+        self._lock = threading.Lock()
+        if not self._running:
+            return
+        self.queue = queue.SimpleQueue()
+        self.queue_handler.queue = self.queue
+        if self._log_file_template and '{pid}' in self._log_file_template:
+            # Fichier propre au worker: les descripteurs hérités restent au processus parent
+            self.handlers = self._build_handlers()
+        else:
+            for handler in self.handlers:
+                handler.createLock()
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self._running = True
+
+    def stop(self):
+        """Vide la file, arrête le listener et ferme les fichiers (idempotent)."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+def setup_logging(log_file: Optional[Path], level: str = 'INFO', max_bytes: int = DEFAULT_MAX_BYTES,
+                  backup_count: int = DEFAULT_BACKUP_COUNT) -> LogPipeline:
+    """Installe la journalisation non bloquante sur le logger racine."""
+    return LogPipeline(log_file, level=logging.getLevelName(level.upper()),
+                       max_bytes=max_bytes, backup_count=backup_count)
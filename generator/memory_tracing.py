@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Mesure mémoire par requête (mode diagnostic tracemalloc)
+
+En mode diagnostic, tracemalloc suit les allocations Python du worker:
+- pic d'allocation et mémoire retenue de chaque requête, agrégés par endpoint
+- budget mémoire par requête: dépassement journalisé (et compté dans /api/metrics)
+- principaux sites d'allocation de la mémoire vivante, et croissance depuis une
+  référence (POST /api/admin/memory/reset), pour repérer ce qui fait grossir le RSS
+
+tracemalloc ralentit l'exécution (ordre de grandeur x1.5 à x3): mode à activer
+ponctuellement (MEMORY_TRACING=1). Les mesures sont exactes avec des workers
+gunicorn mono-thread (sync); avec --threads, le pic d'une requête inclut les
+allocations des requêtes concurrentes du même worker.
+"""
+
+import logging
+import os
+import threading
+import tracemalloc
+from typing import Dict, List, Optional
+
+from flask import Blueprint, jsonify, request
+
+from admin import require_admin_token
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_LIMIT = 20
+MAX_TOP_LIMIT = 200
+# Allocations de tracemalloc lui-même et de l'import de modules exclues des sites
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _site(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        'file': os.path.relpath(frame.filename) if not frame.filename.startswith('<') else frame.filename,
+        'line': frame.lineno,
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count,
+        'traceback': [f'{f.filename}:{f.lineno}' for f in stat.traceback] if len(stat.traceback) > 1 else None,
+    }
+
+
+class MemoryTracer:
+    """Pic et rétention mémoire par endpoint, budget par requête, sites d'allocation."""
+
+    def __init__(self, enabled: bool = False, budget_kb: float = 0, frames: int = 1, metrics=None):
+        self.enabled = enabled
+        self.budget_bytes = int(budget_kb * 1024)
+        self.frames = frames
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+        self._baseline = None
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def begin(self) -> Optional[int]:
+        """Début de requête: remise à zéro du pic; retourne la mémoire tracée courante."""
+        if not self.enabled or not tracemalloc.is_tracing():
+            return None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def end(self, endpoint: str, start: Optional[int]) -> Optional[dict]:
+        """
+        Fin de requête: enregistre pic et rétention, vérifie le budget.
+
+        Returns:
+            {'peak_bytes', 'retained_bytes', 'over_budget'} ou None si non suivie
+        """
+        if start is None or not tracemalloc.is_tracing():
+            return None
+
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes = max(0, peak - start)
+        retained_bytes = current - start
+        over_budget = bool(self.budget_bytes) and peak_bytes > self.budget_bytes
+
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                'requests': 0, 'peak_max': 0, 'peak_total': 0, 'retained_total': 0, 'over_budget': 0
+            })
+            stats['requests'] += 1
+            stats['peak_max'] = max(stats['peak_max'], peak_bytes)
+            stats['peak_total'] += peak_bytes
+            stats['retained_total'] += retained_bytes
+            stats['over_budget'] += int(over_budget)
+
+        if self.metrics is not None:
+            self.metrics.observe('postboot_request_memory_peak_bytes', peak_bytes, endpoint=endpoint)
+            if over_budget:
+                self.metrics.inc('postboot_memory_budget_exceeded_total', endpoint=endpoint)
+        if over_budget:
+            logger.warning(f"[MEMOIRE] Budget dépassé sur {endpoint}: pic {peak_bytes / 1024:.0f} Ko "
+                           f"(budget {self.budget_bytes / 1024:.0f} Ko, retenu {retained_bytes / 1024:.0f} Ko)")
+
+        return {'peak_bytes': peak_bytes, 'retained_bytes': retained_bytes, 'over_budget': over_budget}
+
+    def endpoint_stats(self) -> List[dict]:
+        """Statistiques par endpoint, par pic maximal décroissant."""
+        with self._lock:
+            items = list(self._stats.items())
+        stats = [{
+            'endpoint': endpoint,
+            'requests': s['requests'],
+            'peak_kb_max': round(s['peak_max'] / 1024, 1),
+            'peak_kb_mean': round(s['peak_total'] / s['requests'] / 1024, 1),
+            'retained_kb_mean': round(s['retained_total'] / s['requests'] / 1024, 1),
+            'retained_kb_total': round(s['retained_total'] / 1024, 1),
+            'over_budget': s['over_budget'],
+        } for endpoint, s in items]
+        return sorted(stats, key=lambda entry: entry['peak_kb_max'], reverse=True)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def top_allocations(self, limit: int = DEFAULT_TOP_LIMIT) -> List[dict]:
+        """Principaux sites d'allocation de la mémoire encore vivante."""
+        group_by = 'traceback' if self.frames > 1 else 'lineno'
+        return [_site(stat) for stat in self._snapshot().statistics(group_by)[:limit]]
+
+    def growth(self, limit: int = DEFAULT_TOP_LIMIT) -> Optional[List[dict]]:
+        """Sites dont la mémoire vivante a le plus augmenté depuis la référence."""
+        if self._baseline is None:
+            return None
+        differences = self._snapshot().compare_to(self._baseline, 'lineno')
+        growth = []
+        for stat in differences[:limit]:
+            site = _site(stat)
+            site['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+            site['count_diff'] = stat.count_diff
+            growth.append(site)
+        return growth
+
+    def reset(self):
+        """Remet à zéro les statistiques et prend une nouvelle référence pour la croissance."""
+        with self._lock:
+            self._stats = {}
+        self._baseline = self._snapshot()
+
+    def summary(self, limit: int = DEFAULT_TOP_LIMIT) -> dict:
+        if not self.enabled or not tracemalloc.is_tracing():
+            return {'enabled': False}
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            'enabled': True,
+            'pid': os.getpid(),
+            'budget_kb': round(self.budget_bytes / 1024, 1) or None,
+            'traced_kb': round(current / 1024, 1),
+            'tracemalloc_overhead_kb': round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+            'endpoints': self.endpoint_stats(),
+            'top_allocations': self.top_allocations(limit),
+            'growth_since_reset': self.growth(limit),
+        }
+
+
+def create_memory_blueprint(tracer: MemoryTracer) -> Blueprint:
+    """Crée le blueprint Flask d'administration mémoire (/api/admin/memory)."""
+    bp = Blueprint('memory', __name__)
+
+    @bp.route('/api/admin/memory', methods=['GET'])
+    @require_admin_token
+    def memory_report():
+        """Mesures mémoire du worker qui répond: endpoints, sites d'allocation, croissance."""
+        limit = min(max(request.args.get('limit', DEFAULT_TOP_LIMIT, type=int), 1), MAX_TOP_LIMIT)
+        return jsonify({'success': True, **tracer.summary(limit)})
+
+    @bp.route('/api/admin/memory/reset', methods=['POST'])
+    @require_admin_token
+    def memory_reset():
+        """Remet à zéro les statistiques et fixe la référence de croissance."""
+        if not tracer.enabled:
+            return jsonify({'success': False, 'error': 'Mode diagnostic mémoire désactivé (MEMORY_TRACING=1)'}), 409
+        tracer.reset()
+        return jsonify({'success': True, 'pid': os.getpid()})
+
+    return bp
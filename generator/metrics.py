@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Métriques Prometheus de l'API
+
+Compteurs, jauges et histogrammes exposés au format texte Prometheus sur
+/api/metrics: requêtes et latences par endpoint, durée de chaque étape de la
+génération, tailles des scripts produits, accès aux caches, compilations EXE.
+
+Agrégation multi-workers sans service externe: chaque processus (worker gunicorn)
+écrit périodiquement ses valeurs dans un fichier du répertoire partagé, et le
+worker qui répond au scrape additionne les fichiers de tous les processus. Les
+compteurs et histogrammes des workers terminés sont fusionnés dans une archive
+(les valeurs restent monotones après un redémarrage de worker); leurs jauges
+sont ignorées. Un processus est identifié par son pid et sa date de démarrage:
+après un redémarrage du conteneur, le fichier du précédent pid 1 est archivé
+même si le nouveau processus porte le même pid.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from flask import Blueprint, Response
+
+# Verrou inter-processus (POSIX) pour la fusion des fichiers des workers terminés
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = tuple(16 * 1024 * 2 ** i for i in range(11))  # 16 Ko à 16 Mo
+
+# Nom -> (type, description, seuils des histogrammes)
+METRIC_DEFINITIONS = {
+    'postboot_http_requests_total': (
+        'counter', "Requêtes HTTP traitées par endpoint, méthode et statut", None),
+    'postboot_http_request_duration_seconds': (
+        'histogram', "Durée de traitement des requêtes HTTP par endpoint", LATENCY_BUCKETS),
+    'postboot_stage_duration_seconds': (
+        'histogram', "Durée des étapes de génération (transformation, sections du script, écriture, compilation)",
+        STAGE_BUCKETS),
+    'postboot_output_size_bytes': (
+        'histogram', "Taille des fichiers générés par type (ps1, exe)", SIZE_BUCKETS),
+    'postboot_cache_requests_total': (
+        'counter', "Accès aux caches par résultat (hit, miss, shared)", None),
+    'postboot_request_memory_peak_bytes': (
+        'histogram', "Pic d'allocation Python par requête (mode diagnostic mémoire)", SIZE_BUCKETS),
+    'postboot_memory_budget_exceeded_total': (
+        'counter', "Requêtes ayant dépassé le budget mémoire par endpoint", None),
+    'postboot_compile_queue_depth': (
+        'gauge', "Compilations EXE en cours (profondeur de la file de compilation)", None),
+}
+
+
+def _label_key(labels: Dict[str, str]) -> str:
+    """Rendu Prometheus des labels (triés, échappés), utilisé comme clé de série."""
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in sorted(labels.items()))
+
+
+def _series(name: str, key: str) -> str:
+    return f'{name}{{{key}}}' if key else name
+
+
+def _process_identity(pid: int) -> Optional[str]:
+    """Identité d'un processus distincte d'un redémarrage à l'autre (Linux: boot et date de démarrage)."""
+    try:
+        boot_id = Path('/proc/sys/kernel/random/boot_id').read_text().strip()
+        # Champ 22 de /proc/<pid>/stat (starttime), compté après le nom du processus entre parenthèses
+        start_ticks = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()[19]
+        return f'{boot_id}:{start_ticks}'
+    except (OSError, IndexError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    if not HAS_FCNTL:
+        return True  # Hors POSIX: pas de détection des processus terminés
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshot_alive(snapshot: dict) -> bool:
+    """Le processus qui a écrit l'instantané tourne encore (même pid et même identité)."""
+    pid = snapshot.get('pid', 0)
+    if not _pid_alive(pid):
+        return False
+    # Pid réutilisé (pid 1 après redémarrage du conteneur) ou fichier sans identité: processus terminé
+    identity = _process_identity(pid)
+    return identity is None or identity == snapshot.get('identity')
+
+
+def _merge(target: dict, snapshot: dict, include_gauges: bool):
+    """Additionne les séries d'un instantané dans target."""
+    for kind in ('counters', 'gauges') if include_gauges else ('counters',):
+        for name, series in snapshot.get(kind, {}).items():
+            merged = target.setdefault(kind, {}).setdefault(name, {})
+            for labels, value in series.items():
+                merged[labels] = merged.get(labels, 0) + value
+    for name, series in snapshot.get('histograms', {}).items():
+        merged = target.setdefault('histograms', {}).setdefault(name, {})
+        for labels, values in series.items():
+            current = merged.get(labels)
+            merged[labels] = values[:] if current is None else [a + b for a, b in zip(current, values)]
+
+
+class MetricsRegistry:
+    """
+    Métriques du processus courant, partagées entre workers via un répertoire.
+
+    Sans répertoire, les valeurs restent locales au processus (tests, serveur de
+    développement).
+    """
+
+    def __init__(self, directory: Optional[Path] = None, flush_interval: float = 1.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atexit.register(self.flush)
+        self._reset()
+
+    def _reset(self):
+        # Après un fork (gunicorn --preload), le worker repart de valeurs vides
+        self._pid = os.getpid()
+        self._identity = _process_identity(self._pid)
+        self._flush_lock = threading.Lock()
+        self._file = self.directory / f'{self._pid}-{uuid.uuid4().hex[:8]}.json' if self.directory else None
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, Dict[str, float]] = {}
+        self._histograms: Dict[str, Dict[str, list]] = {}
+        self._dirty = False
+        self._flusher = None
+
+    def _check_process(self):
+        if os.getpid() != self._pid:
+            self._reset()
+        if self.directory and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _definition(self, name: str, expected: str) -> tuple:
+        definition = METRIC_DEFINITIONS.get(name)
+        if definition is None or definition[0] != expected:
+            raise KeyError(f"Métrique {expected} inconnue: {name}")
+        return definition
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrémente un compteur."""
+        self._definition(name, 'counter')
+        key = _label_key(labels)
+        with self._lock:
+            self._check_process()
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            self._dirty = True
+
+    def add(self, name: str, delta: float, **labels):
+        """Ajoute delta (positif ou négatif) à une jauge."""
+        self._definition(name, 'gauge')
+        key = _label_key(labels)
+        with self._lock:
+            self._check_process()
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0) + delta
+            self._dirty = True
+
+    def observe(self, name: str, value: float, **labels):
+        """Enregistre une observation dans un histogramme."""
+        buckets = self._definition(name, 'histogram')[2]
+        key = _label_key(labels)
+        with self._lock:
+            self._check_process()
+            # [compte par seuil..., compte au-delà du dernier seuil, somme]
+            values = self._histograms.setdefault(name, {}).setdefault(key, [0] * (len(buckets) + 2))
+            values[bisect.bisect_left(buckets, value)] += 1
+            values[-1] += value
+            self._dirty = True
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Chronomètre le bloc (y compris en cas d'exception) dans un histogramme."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'pid': self._pid,
+                'identity': self._identity,
+                'counters': {name: dict(series) for name, series in self._counters.items()},
+                'gauges': {name: dict(series) for name, series in self._gauges.items()},
+                'histograms': {name: {key: values[:] for key, values in series.items()}
+                               for name, series in self._histograms.items()},
+            }
+
+    def flush(self):
+        """Écrit les valeurs du processus dans son fichier (remplacement atomique)."""
+        if not self.directory or os.getpid() != self._pid or not self.directory.is_dir():
+            return
+        # Appelée par le thread d'écriture et par collect(): une écriture à la fois, fichier temporaire unique
+        with self._flush_lock:
+            with self._lock:
+                self._dirty = False
+            temp_path = self._file.with_suffix(f'.{uuid.uuid4().hex[:8]}.tmp')
+            try:
+                temp_path.write_text(json.dumps(self.snapshot()), encoding='utf-8')
+                os.replace(temp_path, self._file)
+            except OSError as e:
+                temp_path.unlink(missing_ok=True)
+                logger.warning(f"Écriture des métriques impossible ({self._file}): {e}")
+
+    def _flush_loop(self):
+        while os.getpid() == self._pid:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                self.flush()
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        if not HAS_FCNTL:
+            yield
+            return
+        with open(self.directory / LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def collect(self) -> dict:
+        """Valeurs agrégées de tous les processus (workers actifs, terminés et archive)."""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush()
+        aggregated = {'processes': 0}
+        with self._directory_lock():
+            archive_path = self.directory / ARCHIVE_FILE
+            archive = self._read(archive_path) or {}
+            dead_files = []
+
+            for path in self.directory.glob('*-*.json'):
+                snapshot = self._read(path)
+                if snapshot is None:
+                    continue
+                if _snapshot_alive(snapshot):
+                    _merge(aggregated, snapshot, include_gauges=True)
+                    aggregated['processes'] += 1
+                else:
+                    _merge(archive, snapshot, include_gauges=False)
+                    dead_files.append(path)
+
+            if dead_files:
+                # Fusion des workers terminés dans l'archive, puis suppression de leurs fichiers
+                temp_path = archive_path.with_suffix('.tmp')
+                temp_path.write_text(json.dumps(archive), encoding='utf-8')
+                os.replace(temp_path, archive_path)
+                for path in dead_files:
+                    path.unlink(missing_ok=True)
+
+        _merge(aggregated, archive, include_gauges=False)
+        return aggregated
+
+    def render(self) -> str:
+        """Exposition au format texte Prometheus (0.0.4)."""
+        data = self.collect()
+        lines = []
+
+        for name, (kind, description, buckets) in METRIC_DEFINITIONS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for key, values in sorted(data.get('histograms', {}).get(name, {}).items()):
+                    prefix = f'{key},' if key else ''
+                    cumulative = 0
+                    for bound, count in zip(buckets, values):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+                    total = cumulative + values[len(buckets)]
+                    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {total}')
+                    lines.append(f"{_series(name + '_sum', key)} {values[-1]:.6f}")
+                    lines.append(f"{_series(name + '_count', key)} {total}")
+            else:
+                for key, value in sorted(data.get(f'{kind}s', {}).get(name, {}).items()):
+                    lines.append(f'{_series(name, key)} {value:g}')
+
+        # Part des accès servis sans nouveau téléchargement (hit ou téléchargement partagé)
+        lines.append('# HELP postboot_cache_hit_ratio Part des accès au cache servis sans nouveau téléchargement')
+        lines.append('# TYPE postboot_cache_hit_ratio gauge')
+        per_cache: Dict[str, Dict[str, float]] = {}
+        for key, value in data.get('counters', {}).get('postboot_cache_requests_total', {}).items():
+            labels = dict(part.split('=', 1) for part in key.split(','))
+            per_cache.setdefault(labels['cache'].strip('"'), {})[labels['result'].strip('"')] = value
+        for cache, results in sorted(per_cache.items()):
+            total = sum(results.values())
+            ratio = (results.get('hit', 0) + results.get('shared', 0)) / total if total else 0
+            lines.append(f"postboot_cache_hit_ratio{{{_label_key({'cache': cache})}}} {ratio:.4f}")
+
+        if self.directory:
+            lines.append('# HELP postboot_metrics_processes Processus actifs agrégés dans ces métriques')
+            lines.append('# TYPE postboot_metrics_processes gauge')
+            lines.append(f"postboot_metrics_processes {data['processes']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def create_metrics_blueprint(registry: MetricsRegistry) -> Blueprint:
+    """Crée le blueprint Flask exposant les métriques (/api/metrics)."""
+    bp = Blueprint('metrics', __name__)
+
+    @bp.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Métriques agrégées de tous les workers, au format texte Prometheus."""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return bp
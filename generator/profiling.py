@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Server-Timing et profilage des requêtes lentes
+
+- Server-Timing: chaque étape chronométrée pendant une requête (résolution du
+  catalogue, chargement des modules, sections du script, écriture disque) est
+  ajoutée à l'en-tête de réponse, lisible dans l'onglet Réseau du navigateur.
+- Profilage des requêtes lentes (optionnel): un échantillonneur de piles relève
+  périodiquement la pile du thread de chaque requête suivie; si la requête dépasse
+  le seuil de latence, les piles sont enregistrées au format « folded »
+  (flamegraph.pl, speedscope) avec leurs métadonnées.
+
+L'échantillonnage (sys._current_frames) ne ralentit pas le code profilé, contrairement
+à cProfile: il peut rester actif en production.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import Blueprint, g, has_request_context, jsonify, send_file
+
+from admin import require_admin_token
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 200
+PROFILE_ID_PATTERN = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+#region Server-Timing
+
+def record_stage(name: str, seconds: float):
+    """Ajoute la durée d'une étape au Server-Timing de la requête en cours (cumulée par nom)."""
+    if not has_request_context():
+        return
+    timings = g.setdefault('server_timing', {})
+    timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing_header(timings: Dict[str, float], total_seconds: float) -> str:
+    """Valeur de l'en-tête Server-Timing (durées en millisecondes)."""
+    parts = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.items()]
+    parts.append(f'total;dur={total_seconds * 1000:.2f}')
+    return ', '.join(parts)
+
+#endregion
+
+
+#region Échantillonneur de piles
+
+def _fold_stack(frame) -> str:
+    """Pile au format folded: appelant;...;appelé (fonction (fichier:ligne))."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Relève la pile des threads enregistrés à intervalle fixe (thread unique par processus)."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active: Dict[int, Counter] = {}
+        self._pid = None
+
+    def start(self, thread_id: int) -> Counter:
+        samples = Counter()
+        with self._lock:
+            self._active[thread_id] = samples
+            # Thread démarré à la première requête suivie (et après un fork de worker)
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='stack-sampler', daemon=True).start()
+        return samples
+
+    def stop(self, thread_id: int) -> Optional[Counter]:
+        with self._lock:
+            return self._active.pop(thread_id, None)
+
+    def _run(self):
+        pid = os.getpid()
+        while os.getpid() == pid:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_fold_stack(frame)] += 1
+
+#endregion
+
+
+#region Profilage des requêtes lentes
+
+class SlowRequestProfiler:
+    """Enregistre le profil des requêtes dépassant le seuil de latence."""
+
+    def __init__(self, directory: Path, threshold_ms: float, sample_rate: float = 1.0,
+                 interval_ms: float = 5, max_profiles: int = 100, enabled: bool = True):
+        self.directory = Path(directory)
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.enabled = enabled
+        self.sampler = StackSampler(interval_ms / 1000)
+        if enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def begin(self) -> bool:
+        """Commence le suivi de la requête courante (selon le taux d'échantillonnage)."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return False
+        self.sampler.start(threading.get_ident())
+        return True
+
+    def cancel(self):
+        """Arrête le suivi sans enregistrer (fin de requête anormale)."""
+        self.sampler.stop(threading.get_ident())
+
+    def end(self, method: str, path: str, status: int, elapsed_seconds: float,
+            timings: Optional[Dict[str, float]] = None) -> Optional[str]:
+        """
+        Termine le suivi de la requête courante et enregistre son profil si elle est lente.
+
+        Returns:
+            Identifiant du profil enregistré, None sinon
+        """
+        samples = self.sampler.stop(threading.get_ident())
+        duration_ms = elapsed_seconds * 1000
+        if samples is None or duration_ms < self.threshold_ms:
+            return None
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        metadata = {
+            'id': profile_id,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'method': method,
+            'path': path,
+            'status': status,
+            'duration_ms': round(duration_ms, 1),
+            'samples': sum(samples.values()),
+            'interval_ms': self.sampler.interval * 1000,
+            'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in (timings or {}).items()},
+        }
+        try:
+            folded = '\n'.join(f'{stack} {count}' for stack, count in samples.most_common())
+            (self.directory / f'{profile_id}.folded').write_text(folded + '\n', encoding='utf-8')
+            (self.directory / f'{profile_id}.json').write_text(json.dumps(metadata, indent=2), encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Profil de requête lente non enregistré: {e}")
+            return None
+
+        logger.info(f"[PROFIL] Requête lente {method} {path}: {duration_ms:.0f} ms ({metadata['samples']} échantillons) -> {profile_id}")
+        self._prune()
+        return profile_id
+
+    def _metadata_files(self) -> List[Path]:
+        """Fichiers de métadonnées, du plus récent au plus ancien."""
+        def modified(path: Path) -> int:
+            try:
+                return path.stat().st_mtime_ns
+            except OSError:
+                return 0  # Supprimé entre-temps par un autre worker
+        return sorted(self.directory.glob('*.json'), key=modified, reverse=True)
+
+    def _prune(self):
+        """Conserve les max_profiles profils les plus récents."""
+        for meta_path in self._metadata_files()[self.max_profiles:]:
+            meta_path.with_suffix('.folded').unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[dict]:
+        """Métadonnées des profils enregistrés, du plus récent au plus ancien."""
+        profiles = []
+        if not self.directory.exists():
+            return profiles
+        for meta_path in self._metadata_files():
+            try:
+                profiles.append(json.loads(meta_path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def profile_path(self, profile_id: str) -> Optional[Path]:
+        """Chemin du fichier folded d'un profil (identifiant validé), None s'il n'existe pas."""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f'{profile_id}.folded'
+        return path if path.exists() else None
+
+#endregion
+
+
+def create_profiling_blueprint(profiler: SlowRequestProfiler) -> Blueprint:
+    """Crée le blueprint Flask des profils de requêtes lentes (/api/debug/profiles)."""
+    bp = Blueprint('profiling', __name__)
+
+    @bp.route('/api/debug/profiles', methods=['GET'])
+    @require_admin_token
+    def list_slow_profiles():
+        """Liste des profils de requêtes lentes enregistrés."""
+        return jsonify({
+            'success': True,
+            'enabled': profiler.enabled,
+            'threshold_ms': profiler.threshold_ms,
+            'sample_rate': profiler.sample_rate,
+            'profiles': profiler.list_profiles()
+        })
+
+    @bp.route('/api/debug/profiles/<profile_id>', methods=['GET'])
+    @require_admin_token
+    def download_slow_profile(profile_id):
+        """Télécharge un profil au format folded (flamegraph.pl, speedscope)."""
+        path = profiler.profile_path(profile_id)
+        if path is None:
+            return jsonify({'success': False, 'error': 'Profil non trouvé'}), 404
+        return send_file(path, as_attachment=True, download_name=path.name, mimetype='text/plain; charset=utf-8')
+
+    return bp
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sérialisation de données Python en littéraux PowerShell.
+
+Les scripts générés embarquent leur configuration sous forme de tables de hachage
+et de tableaux PowerShell natifs: aucune analyse JSON (ConvertFrom-Json) ni conversion
+PSObject -> hashtable n'est nécessaire à l'exécution.
+
+Correspondance des types:
+    dict  -> @{ cle = valeur }     (clés insensibles à la casse, comme PowerShell)
+    list  -> @(a, b)               (@(,@(...)) pour un tableau imbriqué unique)
+    str   -> 'texte' ou here-string @'...'@ pour le texte multiligne
+    bool  -> $true / $false
+    None  -> $null
+    int / float -> littéral numérique invariant
+"""
+
+import math
+import re
+
+# Caractères traités comme apostrophes par l'analyseur PowerShell (doublés dans '...')
+_SINGLE_QUOTES = ("'", '‘', '’', '‚', '‛')
+_BARE_KEY = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# Fin de here-string: '@ (ou variante typographique) en début de ligne
+_HERE_STRING_END = re.compile("^[" + ''.join(_SINGLE_QUOTES) + "]@", re.MULTILINE)
+
+INDENT = '    '
+
+
+class PowerShellLiteralError(ValueError):
+    """Valeur non représentable en littéral PowerShell."""
+
+
+def quote_string(value: str) -> str:
+    """Chaîne entre apostrophes, apostrophes (y compris typographiques) doublées."""
+    for quote in _SINGLE_QUOTES:
+        value = value.replace(quote, quote * 2)
+    return f"'{value}'"
+
+
+def _string_literal(value: str) -> str:
+    # Texte multiligne (scripts d'installation): here-string littérale, plus lisible,
+    # sauf si une ligne du contenu fermerait la here-string
+    if '\n' in value and '\r' not in value and not _HERE_STRING_END.search(value):
+        return "@'\n" + value + "\n'@"
+    return quote_string(value)
+
+
+def _key_literal(key) -> str:
+    if not isinstance(key, str):
+        raise PowerShellLiteralError(f"Clé non textuelle: {key!r}")
+    return key if _BARE_KEY.match(key) else quote_string(key)
+
+
+def _number_literal(value) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return '[double]::NaN'
+        if math.isinf(value):
+            return '[double]::PositiveInfinity' if value > 0 else '[double]::NegativeInfinity'
+        return repr(value)
+    return str(value)
+
+
+def to_ps_literal(value, level: int = 0) -> str:
+    """
+    Convertit une valeur Python (issue de JSON) en expression PowerShell équivalente.
+
+    Args:
+        value: dict, list, str, int, float, bool ou None
+        level: niveau d'indentation de la valeur (pour les lignes de continuation)
+
+    Returns:
+        Expression PowerShell évaluable telle quelle
+
+    Raises:
+        PowerShellLiteralError: type non supporté ou clés en doublon (insensibles à la casse)
+    """
+    if value is None:
+        return '$null'
+    if isinstance(value, bool):
+        return '$true' if value else '$false'
+    if isinstance(value, (int, float)):
+        return _number_literal(value)
+    if isinstance(value, str):
+        return _string_literal(value)
+
+    inner = INDENT * (level + 1)
+    outer = INDENT * level
+
+    if isinstance(value, dict):
+        if not value:
+            return '@{}'
+        seen = set()
+        lines = []
+        for key, item in value.items():
+            folded = str(key).casefold()
+            if folded in seen:
+                raise PowerShellLiteralError(f"Clé en double (PowerShell ignore la casse): {key!r}")
+            seen.add(folded)
+            lines.append(f"{inner}{_key_literal(key)} = {to_ps_literal(item, level + 1)}")
+        return '@{\n' + '\n'.join(lines) + f'\n{outer}}}'
+
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return '@()'
+        items = [to_ps_literal(item, level + 1) for item in value]
+        if len(items) == 1 and isinstance(value[0], (list, tuple)):
+            # @(@(1, 2)) serait aplati: la virgule unaire conserve le tableau imbriqué
+            items[0] = ',' + items[0]
+        if all(not isinstance(item, (dict, list, tuple)) for item in value) and \
+                sum(len(item) for item in items) < 100 and not any('\n' in item for item in items):
+            return '@(' + ', '.join(items) + ')'
+        return '@(\n' + ',\n'.join(inner + item for item in items) + f'\n{outer})'
+
+    raise PowerShellLiteralError(f"Type non supporté: {type(value).__name__}")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Profils personnalisés enregistrés côté serveur
+
+Une configuration personnalisée (sélection d'applications, modules et options)
+est enregistrée une fois dans une base SQLite locale et référencée ensuite par
+un identifiant court dérivé de son contenu: deux configurations produisant le
+même script partagent le même identifiant, quel que soit l'ordre des sélections.
+
+La configuration normalisée pour le générateur (api_config) est calculée à
+l'enregistrement et stockée avec la version du catalogue utilisée: une
+génération par identifiant ({"saved_profile": "<id>"} sur /api/generate) n'a
+plus d'étape de transformation, sauf si le catalogue a changé depuis (la
+configuration est alors recalculée et mise à jour).
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from flask import Blueprint, jsonify, request
+
+from admin import require_admin_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_LENGTH = 10
+PROFILE_ID_PATTERN = re.compile(rf'^[a-z2-7]{{{PROFILE_ID_LENGTH}}}$')
+MAX_NAME_LENGTH = 100
+MAX_LIST_LIMIT = 200
+SCRIPT_TYPES = ('installation', 'optimizations', 'diagnostic')
+# Listes d'identifiants dont l'ordre n'a pas d'effet sur le script généré
+APP_LIST_KEYS = ('master_apps', 'profile_apps', 'optional_apps')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_profiles (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    catalog_version TEXT NOT NULL,
+    script_types TEXT NOT NULL,
+    user_config TEXT NOT NULL,
+    api_config TEXT NOT NULL
+);
+"""
+
+
+class SavedProfileError(ValueError):
+    """Profil personnalisé invalide."""
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+def normalize_user_config(user_config: dict) -> dict:
+    """Copie de la configuration avec les listes d'applications dédupliquées et triées."""
+    if not isinstance(user_config, dict):
+        raise SavedProfileError("config doit être un objet")
+    normalized = dict(user_config)
+    for key in APP_LIST_KEYS:
+        values = normalized.get(key) or []
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise SavedProfileError(f"{key} doit être une liste d'identifiants")
+        normalized[key] = sorted(set(values))
+    return normalized
+
+
+def normalize_script_types(script_types) -> List[str]:
+    if not isinstance(script_types, list) or not script_types:
+        raise SavedProfileError("scriptTypes doit être une liste non vide")
+    unknown = [value for value in script_types if value not in SCRIPT_TYPES]
+    if unknown:
+        raise SavedProfileError(f"scriptTypes doit être parmi {', '.join(SCRIPT_TYPES)}")
+    return [value for value in SCRIPT_TYPES if value in script_types]
+
+
+def compute_profile_id(name: str, script_types: List[str], api_config: dict) -> str:
+    """Identifiant court dérivé du script produit (hors date de génération)."""
+    content = {key: value for key, value in api_config.items() if key != 'description'}
+    digest = hashlib.sha256(_canonical([name, script_types, content]).encode('utf-8')).digest()
+    return base64.b32encode(digest).decode('ascii').lower()[:PROFILE_ID_LENGTH]
+
+
+class SavedProfileStore:
+    """Stockage SQLite des profils personnalisés enregistrés."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Une connexion par opération (sûr entre threads et entre workers), validée puis fermée
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, name: str, user_config: dict, script_types: List[str], api_config: dict,
+             catalog_version: str) -> Tuple[str, bool]:
+        """
+        Enregistre un profil (sans effet s'il existe déjà).
+
+        Returns:
+            (identifiant, True si le profil vient d'être créé)
+        """
+        profile_id = compute_profile_id(name, script_types, api_config)
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO saved_profiles '
+                '(id, name, created_at, catalog_version, script_types, user_config, api_config) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (profile_id, name, time.time(), catalog_version, _canonical(script_types),
+                 _canonical(user_config), _canonical(api_config))
+            )
+        return profile_id, cursor.rowcount == 1
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        if not PROFILE_ID_PATTERN.match(profile_id or ''):
+            return None
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM saved_profiles WHERE id = ?', (profile_id,)).fetchone()
+        if row is None:
+            return None
+        profile = dict(row)
+        for key in ('script_types', 'user_config', 'api_config'):
+            profile[key] = json.loads(profile[key])
+        return profile
+
+    def mark_used(self, profile_id: str):
+        with self._connect() as conn:
+            conn.execute('UPDATE saved_profiles SET use_count = use_count + 1, last_used_at = ? WHERE id = ?',
+                         (time.time(), profile_id))
+
+    def update_api_config(self, profile_id: str, api_config: dict, catalog_version: str):
+        """Remplace la configuration normalisée après un changement de catalogue."""
+        with self._lock, self._connect() as conn:
+            conn.execute('UPDATE saved_profiles SET api_config = ?, catalog_version = ? WHERE id = ?',
+                         (_canonical(api_config), catalog_version, profile_id))
+
+    def list_profiles(self, limit: int = 50) -> List[dict]:
+        """Profils les plus récemment utilisés (ou créés)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT id, name, created_at, last_used_at, use_count, catalog_version, script_types '
+                'FROM saved_profiles ORDER BY COALESCE(last_used_at, created_at) DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [{**dict(row), 'script_types': json.loads(row['script_types'])} for row in rows]
+
+    def delete(self, profile_id: str) -> bool:
+        with self._lock, self._connect() as conn:
+            return conn.execute('DELETE FROM saved_profiles WHERE id = ?', (profile_id,)).rowcount == 1
+
+
+def create_saved_profiles_blueprint(store: SavedProfileStore, prepare: Callable[[dict, list], dict],
+                                    get_catalog_version: Callable[[], str]) -> Blueprint:
+    """
+    Crée le blueprint Flask des profils enregistrés (/api/saved-profiles).
+
+    Args:
+        store: Stockage des profils
+        prepare: (user_config, script_types) -> api_config validée (ValueError si invalide)
+        get_catalog_version: Version courante du catalogue
+    """
+    bp = Blueprint('saved_profiles', __name__)
+
+    @bp.route('/api/saved-profiles', methods=['POST'])
+    def save_profile():
+        """Enregistre une configuration: {"config": {...}, "scriptTypes": [...], "name": "..."}."""
+        data = request.get_json(silent=True) or {}
+        try:
+            user_config = normalize_user_config(data.get('config', {}))
+            script_types = normalize_script_types(data.get('scriptTypes', ['installation', 'optimizations']))
+            name = str(data.get('name') or user_config.get('custom_name') or user_config.get('profile')
+                       or 'Custom').strip()[:MAX_NAME_LENGTH]
+            api_config = prepare(user_config, script_types)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        profile_id, created = store.save(name, user_config, script_types, api_config, get_catalog_version())
+        if created:
+            logger.info(f"[PROFILS] Profil enregistré {profile_id} ({name}) - IP: {request.remote_addr}")
+        apps = api_config.get('apps', {})
+        return jsonify({
+            'success': True,
+            'id': profile_id,
+            'name': name,
+            'created': created,
+            'apps_count': len(apps.get('master', [])) + len(apps.get('profile', [])),
+            'modules': api_config.get('modules', []),
+        }), 201 if created else 200
+
+    @bp.route('/api/saved-profiles', methods=['GET'])
+    def list_saved_profiles():
+        limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_LIST_LIMIT)
+        return jsonify({'success': True, 'profiles': store.list_profiles(limit)})
+
+    @bp.route('/api/saved-profiles/<profile_id>', methods=['GET'])
+    def get_saved_profile(profile_id):
+        """Configuration enregistrée (pour la recharger dans l'interface)."""
+        profile = store.get(profile_id)
+        if profile is None:
+            return jsonify({'success': False, 'error': 'Profil enregistré introuvable'}), 404
+        profile.pop('api_config')
+        return jsonify({'success': True, 'profile': profile})
+
+    @bp.route('/api/saved-profiles/<profile_id>', methods=['DELETE'])
+    @require_admin_token
+    def delete_saved_profile(profile_id):
+        if not store.delete(profile_id):
+            return jsonify({'success': False, 'error': 'Profil enregistré introuvable'}), 404
+        logger.info(f"[PROFILS] Profil supprimé {profile_id}")
+        return jsonify({'success': True})
+
+    return bp
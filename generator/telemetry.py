@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Télémétrie d'exécution des scripts
+
+Les scripts générés peuvent envoyer, en fin d'exécution, la durée de chaque étape
+(téléchargement, installation, vérification de chaque application, modules
+d'optimisation). Les mesures sont stockées dans une base SQLite locale et agrégées
+en percentiles par application et par module, pour l'estimation des durées (ETA)
+et la planification des déploiements.
+
+Aucune donnée d'identification du poste n'est transmise: chaque exécution est
+identifiée par un GUID aléatoire.
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from flask import Blueprint, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+STEP_KINDS = ('app', 'module')
+STEP_PHASES = ('download', 'verify', 'install', 'total')
+MAX_STEPS_PER_RUN = 500
+MAX_NAME_LENGTH = 200
+MAX_STEP_SECONDS = 24 * 3600
+# Échantillons les plus récents retenus par étape pour les percentiles
+STATS_WINDOW = 500
+MEDIAN_CACHE_SECONDS = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    received_at REAL NOT NULL,
+    profile TEXT,
+    version TEXT,
+    total_seconds REAL,
+    success INTEGER
+);
+CREATE TABLE IF NOT EXISTS step_timings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    received_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    success INTEGER NOT NULL,
+    measured INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_step_timings_key ON step_timings(kind, name, phase, id);
+"""
+
+
+class TelemetryError(ValueError):
+    """Rapport de télémétrie invalide."""
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Percentile par interpolation linéaire sur une liste triée."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _parse_step(step) -> tuple:
+    if not isinstance(step, dict):
+        raise TelemetryError("Étape invalide (objet attendu)")
+
+    kind = step.get('kind')
+    phase = step.get('phase')
+    name = step.get('name')
+    seconds = step.get('seconds')
+
+    if kind not in STEP_KINDS:
+        raise TelemetryError(f"Type d'étape inconnu: {kind!r}")
+    if phase not in STEP_PHASES:
+        raise TelemetryError(f"Phase inconnue: {phase!r}")
+    if not isinstance(name, str) or not name.strip() or len(name) > MAX_NAME_LENGTH:
+        raise TelemetryError("Nom d'étape invalide")
+    if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) \
+            or not math.isfinite(seconds) or not 0 <= seconds <= MAX_STEP_SECONDS:
+        raise TelemetryError(f"Durée invalide pour {name}: {seconds!r}")
+
+    return (kind, name.strip(), phase, float(seconds),
+            int(step.get('success', True) is not False), int(step.get('measured', True) is not False))
+
+
+class TelemetryStore:
+    """Stockage SQLite des durées d'étapes et calcul des percentiles."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._median_cache: Dict[str, float] = {}
+        self._median_cache_time = 0.0
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Une connexion par opération (sûr entre threads et entre workers), validée puis fermée
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_run(self, report: dict) -> str:
+        """
+        Enregistre le rapport d'une exécution.
+
+        Args:
+            report: {"runId", "profile", "version", "totalSeconds", "success",
+                     "steps": [{"kind", "name", "phase", "seconds", "success", "measured"}]}
+
+        Returns:
+            Identifiant de l'exécution
+
+        Raises:
+            TelemetryError: rapport invalide
+        """
+        if not isinstance(report, dict):
+            raise TelemetryError("Rapport invalide (objet JSON attendu)")
+
+        steps = report.get('steps')
+        if not isinstance(steps, list) or not steps:
+            raise TelemetryError("Aucune étape dans le rapport")
+        if len(steps) > MAX_STEPS_PER_RUN:
+            raise TelemetryError(f"Trop d'étapes ({len(steps)} > {MAX_STEPS_PER_RUN})")
+        rows = [_parse_step(step) for step in steps]
+
+        run_id = str(report.get('runId') or uuid.uuid4())
+        try:
+            run_id = str(uuid.UUID(run_id))
+        except ValueError:
+            raise TelemetryError("runId invalide (GUID attendu)")
+
+        total = report.get('totalSeconds')
+        total = float(total) if isinstance(total, (int, float)) and not isinstance(total, bool) else None
+        now = time.time()
+
+        with self._lock, self._connect() as conn:
+            try:
+                conn.execute(
+                    'INSERT INTO runs (run_id, received_at, profile, version, total_seconds, success) VALUES (?, ?, ?, ?, ?, ?)',
+                    (run_id, now, str(report.get('profile', ''))[:MAX_NAME_LENGTH],
+                     str(report.get('version', ''))[:20], total, int(report.get('success', True) is not False))
+                )
+            except sqlite3.IntegrityError:
+                raise TelemetryError(f"Exécution déjà reçue: {run_id}")
+            conn.executemany(
+                'INSERT INTO step_timings (run_id, received_at, kind, name, phase, seconds, success, measured) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, now) + row for row in rows]
+            )
+
+        self._median_cache_time = 0.0
+        return run_id
+
+    def get_stats(self, kind: Optional[str] = None, name: Optional[str] = None,
+                  phase: Optional[str] = None) -> List[dict]:
+        """
+        Percentiles de durée par (type, nom, phase), sur les STATS_WINDOW mesures
+        réussies les plus récentes.
+        """
+        clauses = ['success = 1', 'measured = 1']
+        params = []
+        for column, value in (('kind', kind), ('name', name), ('phase', phase)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+
+        query = f"""
+            SELECT kind, name, phase, seconds FROM (
+                SELECT kind, name, phase, seconds,
+                       ROW_NUMBER() OVER (PARTITION BY kind, name, phase ORDER BY id DESC) AS recent
+                FROM step_timings WHERE {' AND '.join(clauses)}
+            ) WHERE recent <= ? ORDER BY kind, name, phase, seconds
+        """
+        with self._connect() as conn:
+            rows = conn.execute(query, params + [STATS_WINDOW]).fetchall()
+
+        grouped: Dict[tuple, List[float]] = {}
+        for row_kind, row_name, row_phase, seconds in rows:
+            grouped.setdefault((row_kind, row_name, row_phase), []).append(seconds)
+
+        stats = []
+        for (row_kind, row_name, row_phase), values in grouped.items():
+            stats.append({
+                'kind': row_kind,
+                'name': row_name,
+                'phase': row_phase,
+                'count': len(values),
+                'mean': round(sum(values) / len(values), 1),
+                'p50': round(percentile(values, 0.50), 1),
+                'p90': round(percentile(values, 0.90), 1),
+                'p95': round(percentile(values, 0.95), 1),
+                'max': round(values[-1], 1),
+            })
+        return stats
+
+    def get_app_medians(self, min_samples: int = 3) -> Dict[str, float]:
+        """Durée médiane d'installation complète par application (cache de quelques minutes)."""
+        if time.time() - self._median_cache_time > MEDIAN_CACHE_SECONDS:
+            self._median_cache = {
+                entry['name']: entry['p50']
+                for entry in self.get_stats(kind='app', phase='total')
+                if entry['count'] >= min_samples
+            }
+            self._median_cache_time = time.time()
+        return self._median_cache
+
+    def get_summary(self) -> dict:
+        """Nombre d'exécutions reçues et durée totale médiane."""
+        with self._connect() as conn:
+            runs, failed = conn.execute('SELECT COUNT(*), COALESCE(SUM(success = 0), 0) FROM runs').fetchone()
+            totals = [row[0] for row in conn.execute(
+                'SELECT total_seconds FROM runs WHERE success = 1 AND total_seconds IS NOT NULL ORDER BY total_seconds'
+            )]
+        return {
+            'runs': runs,
+            'failed_runs': failed,
+            'total_p50': round(percentile(totals, 0.50), 1) if totals else None,
+            'total_p95': round(percentile(totals, 0.95), 1) if totals else None,
+        }
+
+
+def create_telemetry_blueprint(store: TelemetryStore) -> Blueprint:
+    """Crée le blueprint Flask de la télémétrie (/api/telemetry)."""
+    bp = Blueprint('telemetry', __name__)
+
+    @bp.route('/api/telemetry', methods=['POST'])
+    def ingest_report():
+        """Reçoit le rapport de durées d'une exécution de script."""
+        report = request.get_json(silent=True)
+        try:
+            run_id = store.record_run(report)
+        except TelemetryError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        logger.info(f"[TELEMETRIE] Exécution {run_id} ({len(report['steps'])} étapes) - IP: {request.remote_addr}")
+        return jsonify({'success': True, 'run_id': run_id}), 201
+
+    @bp.route('/api/telemetry/stats', methods=['GET'])
+    def telemetry_stats():
+        """Percentiles par étape: GET /api/telemetry/stats?kind=app&name=...&phase=total."""
+        kind = request.args.get('kind')
+        phase = request.args.get('phase')
+        if kind and kind not in STEP_KINDS:
+            return jsonify({'success': False, 'error': f"kind doit être parmi {', '.join(STEP_KINDS)}"}), 400
+        if phase and phase not in STEP_PHASES:
+            return jsonify({'success': False, 'error': f"phase doit être parmi {', '.join(STEP_PHASES)}"}), 400
+
+        return jsonify({
+            'success': True,
+            'summary': store.get_summary(),
+            'steps': store.get_stats(kind=kind, name=request.args.get('name'), phase=phase)
+        })
+
+    return bp
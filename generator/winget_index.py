@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostBootSetup - Validation hors ligne des identifiants winget
+
+Un identifiant winget erroné ou retiré de la source n'apparaît aujourd'hui
+que sur le poste cible, après plusieurs tentatives d'installation. Le
+générateur charge une copie locale de l'index de la source winget (base
+SQLite index.db, extraite de source.msix) dans un dictionnaire
+(identifiant en minuscules -> identifiant exact) et vérifie:
+- au chargement du catalogue: toutes les entrées winget de apps.json
+- à la génération: les applications du script (avertissements dans la réponse)
+
+Schémas pris en charge: table "ids" (source.msix, index v1) ou "packages"
+(source2.msix, index v2). Sans index local, la validation est désactivée.
+L'index est remplacé via l'endpoint d'administration (fichier index.db ou
+source.msix); les autres workers le rechargent au prochain accès (date de
+modification du fichier).
+"""
+
+import difflib
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Blueprint, jsonify, request
+
+from admin import require_admin_token
+from catalog_sync import flatten_catalog
+
+logger = logging.getLogger(__name__)
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+ZIP_MAGIC = b'PK\x03\x04'
+MSIX_INDEX_MEMBER = 'Public/index.db'
+MAX_INDEX_UPLOAD_BYTES = 512 * 1024 * 1024
+SUGGESTION_CUTOFF = 0.8
+# Intervalle minimal entre deux vérifications de la date du fichier (rechargement par un autre worker)
+RELOAD_CHECK_SECONDS = 5
+
+
+class WingetIndexError(ValueError):
+    """Index winget illisible ou dans un format non pris en charge."""
+
+
+def read_winget_ids(db_path: Path) -> Dict[str, str]:
+    """Identifiants de l'index: {identifiant en minuscules: identifiant exact}."""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        raise WingetIndexError(f"Index winget illisible: {e}")
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        table = 'packages' if 'packages' in tables else 'ids' if 'ids' in tables else None
+        if table is None:
+            raise WingetIndexError("Index winget: table 'ids' ou 'packages' absente")
+        return {row[0].casefold(): row[0] for row in conn.execute(f'SELECT id FROM {table}') if row[0]}
+    except sqlite3.Error as e:
+        raise WingetIndexError(f"Index winget illisible: {e}")
+    finally:
+        conn.close()
+
+
+def extract_index_db(data: bytes) -> bytes:
+    """Base index.db à partir d'un fichier index.db ou d'un paquet source.msix."""
+    if data.startswith(SQLITE_MAGIC):
+        return data
+    if data.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as package:
+                return package.read(MSIX_INDEX_MEMBER)
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise WingetIndexError(f"Paquet source winget sans {MSIX_INDEX_MEMBER}: {e}")
+    raise WingetIndexError("Fichier attendu: index.db (SQLite) ou source.msix")
+
+
+def catalog_winget_entries(apps_config: dict) -> List[Tuple[str, str, str]]:
+    """(emplacement, nom, identifiant winget) de chaque application du catalogue."""
+    flat = flatten_catalog(apps_config)
+    entries = [(location, app.get('name', ''), app['winget'])
+               for location, app in flat['apps'].items() if isinstance(app, dict) and app.get('winget')]
+    # Applications définies directement dans un profil (hors références à common_apps)
+    for profile_key, profile in flat['profiles'].items():
+        for app in profile.get('apps', []):
+            if isinstance(app, dict) and 'ref' not in app and app.get('winget'):
+                entries.append((f"profile:{profile_key}", app.get('name', ''), app['winget']))
+    return entries
+
+
+class WingetIndex:
+    """Index local des identifiants winget (dictionnaire en mémoire, rechargé si le fichier change)."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._ids: Dict[str, str] = {}
+        self._by_publisher: Dict[str, List[str]] = {}
+        self._suggestions: Dict[str, Optional[str]] = {}
+        self._mtime_ns: Optional[int] = None
+        self._checked_at = 0.0
+        self._loaded_at: Optional[float] = None
+        self._catalog_source = None
+        self._catalog_warnings: List[dict] = []
+        self._reload_if_changed(force=True)
+
+    def _reload_if_changed(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            mtime_ns = self.db_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns and not force:
+            return
+
+        with self._lock:
+            ids = {}
+            if mtime_ns is not None:
+                try:
+                    ids = read_winget_ids(self.db_path)
+                except WingetIndexError as e:
+                    logger.error(f"[WINGET] {e} ({self.db_path})")
+            by_publisher: Dict[str, List[str]] = {}
+            for key in ids:
+                by_publisher.setdefault(key.split('.', 1)[0], []).append(key)
+            self._ids = ids
+            self._by_publisher = by_publisher
+            self._suggestions = {}
+            self._catalog_source = None
+            self._mtime_ns = mtime_ns
+            self._loaded_at = time.time() if ids else None
+        if ids:
+            logger.info(f"[WINGET] Index chargé: {len(ids)} paquets ({self.db_path})")
+
+    @property
+    def available(self) -> bool:
+        return bool(self._ids)
+
+    def contains(self, winget_id: str) -> bool:
+        return winget_id.casefold() in self._ids
+
+    def suggest(self, winget_id: str) -> Optional[str]:
+        """Identifiant le plus proche (faute de frappe): même éditeur d'abord, puis tout l'index."""
+        key = winget_id.casefold()
+        if key not in self._suggestions:
+            candidates = self._by_publisher.get(key.split('.', 1)[0]) or list(self._ids)
+            matches = difflib.get_close_matches(key, candidates, n=1, cutoff=SUGGESTION_CUTOFF)
+            self._suggestions[key] = self._ids[matches[0]] if matches else None
+        return self._suggestions[key]
+
+    def check(self, entries: Iterable[Tuple[str, str]]) -> List[dict]:
+        """Avertissements pour les (nom, identifiant winget) absents de l'index (aucun sans index)."""
+        self._reload_if_changed()
+        if not self.available:
+            return []
+        warnings = []
+        for name, winget_id in entries:
+            if winget_id and not self.contains(winget_id):
+                warnings.append({'name': name, 'winget': winget_id, 'suggestion': self.suggest(winget_id)})
+        return warnings
+
+    def check_catalog(self, apps_config: dict) -> List[dict]:
+        """Avertissements du catalogue complet (recalculés si le catalogue ou l'index change)."""
+        self._reload_if_changed()
+        if apps_config is self._catalog_source:
+            return self._catalog_warnings
+        entries = catalog_winget_entries(apps_config)
+        warnings = self.check((name, winget_id) for _, name, winget_id in entries)
+        locations = {(name, winget_id): location for location, name, winget_id in entries}
+        for warning in warnings:
+            warning['location'] = locations[(warning['name'], warning['winget'])]
+            logger.warning(f"[WINGET] Identifiant inconnu de l'index: {warning['winget']} ({warning['location']})"
+                           + (f", vouliez-vous dire {warning['suggestion']} ?" if warning['suggestion'] else ''))
+        self._catalog_source = apps_config
+        self._catalog_warnings = warnings
+        return warnings
+
+    def refresh(self, data: bytes) -> dict:
+        """Remplace l'index local (index.db ou source.msix) après vérification de son contenu."""
+        index_db = extract_index_db(data)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.db_path.with_name(f'.{self.db_path.name}.{uuid.uuid4().hex[:8]}.tmp')
+        try:
+            tmp_path.write_bytes(index_db)
+            if not read_winget_ids(tmp_path):
+                raise WingetIndexError("Index winget vide")
+            os.replace(tmp_path, self.db_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._reload_if_changed(force=True)
+        return self.status()
+
+    def status(self) -> dict:
+        self._reload_if_changed()
+        return {
+            'available': self.available,
+            'path': str(self.db_path),
+            'packages': len(self._ids),
+            'loaded_at': self._loaded_at,
+        }
+
+
+def create_winget_index_blueprint(index: WingetIndex, get_catalog: Callable[[], dict]) -> Blueprint:
+    """Crée le blueprint Flask d'administration de l'index winget (/api/admin/winget-index)."""
+    bp = Blueprint('winget_index', __name__)
+
+    @bp.route('/api/admin/winget-index', methods=['GET'])
+    @require_admin_token
+    def winget_index_status():
+        """État de l'index local et identifiants du catalogue absents de l'index."""
+        warnings = index.check_catalog(get_catalog())
+        return jsonify({'success': True, **index.status(), 'catalog_warnings': warnings})
+
+    @bp.route('/api/admin/winget-index', methods=['POST'])
+    @require_admin_token
+    def winget_index_refresh():
+        """
+        Remplace l'index: fichier envoyé (corps brut ou champ multipart "file"),
+        ou {"path": "..."} pour un fichier déjà déposé dans le répertoire de l'index.
+        """
+        if request.content_length and request.content_length > MAX_INDEX_UPLOAD_BYTES:
+            return jsonify({'success': False, 'error': 'Fichier trop volumineux'}), 413
+        try:
+            if 'file' in request.files:
+                data = request.files['file'].read()
+            elif request.is_json:
+                source = Path(str((request.get_json(silent=True) or {}).get('path', '')))
+                # Lecture limitée au répertoire de l'index (pas d'accès aux autres fichiers du serveur)
+                source = (index.db_path.parent / source).resolve()
+                if not source.is_relative_to(index.db_path.parent.resolve()):
+                    return jsonify({'success': False,
+                                    'error': f"Chemin hors du répertoire de l'index ({index.db_path.parent})"}), 403
+                data = source.read_bytes()
+            else:
+                data = request.get_data()
+            status = index.refresh(data)
+        except (OSError, WingetIndexError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        warnings = index.check_catalog(get_catalog())
+        logger.info(f"[WINGET] Index remplacé: {status['packages']} paquets, {len(warnings)} avertissement(s) "
+                    f"- IP: {request.remote_addr}")
+        return jsonify({'success': True, **status, 'catalog_warnings': warnings})
+
+    return bp
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de charge de l'API du générateur (dimensionnement des conteneurs).
+
+Démarre une instance gunicorn locale (ou cible une URL existante avec --url), puis
+rejoue un mélange pondéré de requêtes à concurrence fixe:
+- apps / profiles / modules : endpoints catalogue
+- generate : génération d'un profil standard (profil tiré au hasard)
+- generate_custom : profil personnalisé (apps optionnelles, modules et options)
+- download : téléchargement d'un script déjà généré (/api/download)
+
+Rapport: débit, latences p50/p95/p99, taux d'erreur par type de requête, CPU et RSS
+des workers (processus gunicorn et enfants, lus dans /proc ou via psutil si installé).
+Les résultats JSON permettent de comparer deux exécutions (avant/après).
+
+Usage:
+    python loadtest.py --workers 4 --concurrency 16 --duration 30
+    python loadtest.py --url http://localhost:5000 --mix apps=5,generate=3,download=2
+    python loadtest.py --output apres.json --compare avant.json
+"""
+
+import sys
+import os
+import io
+import argparse
+import http.client
+import importlib.util
+import json
+import random
+import signal
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Mesure CPU/RSS (dépendance optionnelle, repli sur /proc)
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+BASE_DIR = Path(__file__).parent
+DEFAULT_MIX = 'apps=3,profiles=2,modules=1,generate=2,generate_custom=1,download=1'
+REQUEST_TIMEOUT = 60
+MODULES_CONFIG = {
+    'debloat': {'enabled': True},
+    'performance': {'enabled': True, 'PowerPlan': True, 'StartupPrograms': True, 'Network': False},
+    'ui': {'enabled': True, 'DarkMode': True, 'ShowFileExtensions': True, 'TaskbarAlignLeft': True}
+}
+
+
+#region Requêtes
+
+def _generate_body(profile: str, optional_apps: Optional[List[str]] = None) -> dict:
+    return {
+        'config': {
+            'profile': profile,
+            'custom_name': profile,
+            'master_apps': [],
+            'profile_apps': [],
+            'optional_apps': optional_apps or [],
+            'modules': MODULES_CONFIG
+        },
+        'scriptTypes': ['installation', 'optimizations']
+    }
+
+
+class RequestMix:
+    """Construit les requêtes (méthode, chemin, corps) de chaque type."""
+
+    def __init__(self, weights: Dict[str, int], profiles: List[str], optional_apps: List[str], seed: int):
+        unknown = set(weights) - set(self.builders())
+        if unknown:
+            raise ValueError(f"Types de requête inconnus: {', '.join(sorted(unknown))}")
+        self.kinds = [kind for kind, weight in weights.items() if weight > 0]
+        self.weights = [weights[kind] for kind in self.kinds]
+        self.profiles = profiles
+        self.optional_apps = optional_apps
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def builders() -> dict:
+        return {
+            'apps': lambda mix, rng: ('GET', '/api/apps', None),
+            'profiles': lambda mix, rng: ('GET', '/api/profiles', None),
+            'modules': lambda mix, rng: ('GET', '/api/modules', None),
+            'generate': lambda mix, rng: ('POST', '/api/generate', _generate_body(rng.choice(mix.profiles))),
+            'generate_custom': lambda mix, rng: ('POST', '/api/generate', _generate_body(
+                'Custom', rng.sample(mix.optional_apps, k=rng.randint(0, len(mix.optional_apps))))),
+            # /api/download recherche un fichier de generated/ contenant l'identifiant:
+            # les scripts des profils standards sont générés pendant le préchauffage
+            'download': lambda mix, rng: ('GET', f"/api/download/{rng.choice(mix.profiles).replace('_', '-')}", None),
+        }
+
+    def next(self):
+        with self.lock:
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            request = self.builders()[kind](self, self.random)
+        return (kind,) + request
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.strip().partition('=')
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+def send(base_url: str, method: str, path: str, body: Optional[dict]) -> tuple:
+    """Envoie une requête; retourne (statut HTTP ou 0, octets reçus)."""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            return response.status, len(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, len(e.read() or b'')
+    except (urllib.error.URLError, http.client.HTTPException, OSError):
+        # Connexion refusée, réponse tronquée, délai dépassé
+        return 0, 0
+
+#endregion
+
+
+#region Ressources des workers
+
+class ProcessSampler(threading.Thread):
+    """Échantillonne CPU (%) et RSS (Mo) du processus serveur et de ses enfants."""
+
+    def __init__(self, root_pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.root_pid = root_pid
+        self.interval = interval
+        self.samples: List[dict] = []
+        self.stopped = threading.Event()
+        self.clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    def _tree(self) -> List[int]:
+        if HAS_PSUTIL:
+            try:
+                root = psutil.Process(self.root_pid)
+                return [self.root_pid] + [child.pid for child in root.children(recursive=True)]
+            except psutil.Error:
+                return []
+        children = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    stat = Path(f'/proc/{entry}/stat').read_text().rsplit(')', 1)[1].split()
+                    children.setdefault(int(stat[1]), []).append(int(entry))
+                except (OSError, IndexError):
+                    continue
+        pids, pending = [], [self.root_pid]
+        while pending:
+            pid = pending.pop()
+            pids.append(pid)
+            pending.extend(children.get(pid, []))
+        return pids
+
+    def _usage(self, pid: int) -> Optional[tuple]:
+        """(secondes CPU cumulées, RSS en octets)."""
+        try:
+            if HAS_PSUTIL:
+                process = psutil.Process(pid)
+                times = process.cpu_times()
+                return times.user + times.system, process.memory_info().rss
+            stat = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()
+            cpu = (int(stat[11]) + int(stat[12])) / self.clock_ticks
+            rss = int(stat[21]) * os.sysconf('SC_PAGE_SIZE')
+            return cpu, rss
+        except Exception:
+            return None
+
+    def run(self):
+        previous_cpu, previous_time = None, None
+        while not self.stopped.wait(self.interval):
+            usages = [usage for usage in (self._usage(pid) for pid in self._tree()) if usage]
+            if not usages:
+                continue
+            now = time.monotonic()
+            cpu = sum(usage[0] for usage in usages)
+            if previous_cpu is not None:
+                self.samples.append({
+                    'cpu_percent': round(max(0.0, cpu - previous_cpu) / (now - previous_time) * 100, 1),
+                    'rss_mb': round(sum(usage[1] for usage in usages) / 1024 ** 2, 1),
+                    'processes': len(usages),
+                })
+            previous_cpu, previous_time = cpu, now
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {}
+        cpu = [sample['cpu_percent'] for sample in self.samples]
+        rss = [sample['rss_mb'] for sample in self.samples]
+        return {
+            'cpu_percent_mean': round(sum(cpu) / len(cpu), 1),
+            'cpu_percent_max': max(cpu),
+            'rss_mb_mean': round(sum(rss) / len(rss), 1),
+            'rss_mb_max': max(rss),
+            'processes': self.samples[-1]['processes'],
+        }
+
+#endregion
+
+
+#region Serveur gunicorn
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers: int, threads: int, port: int) -> subprocess.Popen:
+    """Démarre gunicorn sur generator/app.py (module app, objet app)."""
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--chdir', str(BASE_DIR / 'generator'),
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--bind', f'127.0.0.1:{port}',
+        '--log-level', 'warning',
+        'app:app'
+    ]
+    return subprocess.Popen(command, start_new_session=True)
+
+
+def wait_ready(base_url: str, process: Optional[subprocess.Popen], timeout: float = 30) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process and process.poll() is not None:
+            return False
+        if send(base_url, 'GET', '/api/health', None)[0] == 200:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def stop_server(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        process.kill()
+
+#endregion
+
+
+#region Charge et rapport
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round((len(sorted_values) - 1) * fraction)))]
+
+
+def run_load(base_url: str, mix: RequestMix, concurrency: int, duration: float, max_requests: int) -> tuple:
+    """Boucle fermée: chaque client enchaîne les requêtes jusqu'à la durée ou au nombre demandé."""
+    records = []
+    records_lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    counter = iter(range(max_requests)) if max_requests else None
+
+    def client():
+        while time.monotonic() < deadline:
+            if counter is not None:
+                with records_lock:
+                    if next(counter, None) is None:
+                        return
+            kind, method, path, body = mix.next()
+            start = time.perf_counter()
+            status, size = send(base_url, method, path, body)
+            elapsed = (time.perf_counter() - start) * 1000
+            with records_lock:
+                records.append((kind, status, elapsed, size))
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.monotonic() - started
+
+
+def summarize(records: list, elapsed: float) -> dict:
+    def stats(subset):
+        latencies = sorted(record[2] for record in subset)
+        errors = sum(1 for record in subset if not 200 <= record[1] < 400)
+        return {
+            'requests': len(subset),
+            'errors': errors,
+            'error_rate': round(errors / len(subset), 4) if subset else 0.0,
+            'throughput_rps': round(len(subset) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) or 0, 1),
+            'p95_ms': round(percentile(latencies, 0.95) or 0, 1),
+            'p99_ms': round(percentile(latencies, 0.99) or 0, 1),
+            'max_ms': round(latencies[-1], 1) if latencies else 0.0,
+            'bytes': sum(record[3] for record in subset),
+        }
+
+    by_kind = {}
+    for record in records:
+        by_kind.setdefault(record[0], []).append(record)
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'overall': stats(records),
+        'by_kind': {kind: stats(subset) for kind, subset in sorted(by_kind.items())},
+    }
+
+
+def print_report(report: dict):
+    header = f"  {'Type':<16} {'Req.':>7} {'Err.':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print('  ' + '-' * (len(header) - 2))
+    rows = list(report['by_kind'].items()) + [('TOTAL', report['overall'])]
+    for kind, stats in rows:
+        print(f"  {kind:<16} {stats['requests']:>7} {stats['errors']:>6} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+    server = report.get('server')
+    if server:
+        print(f"\n  Serveur ({server['processes']} processus): CPU moyen {server['cpu_percent_mean']} % "
+              f"(max {server['cpu_percent_max']} %), RSS moyen {server['rss_mb_mean']} Mo (max {server['rss_mb_max']} Mo)")
+
+
+def print_comparison(current: dict, previous: dict):
+    """Écarts avant/après sur le débit, les percentiles et les ressources."""
+    print(f"\n  Comparaison avec la référence ({previous.get('config', {})})")
+    metrics = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate')
+    kinds = ['TOTAL'] + sorted(set(current['by_kind']) & set(previous.get('by_kind', {})))
+    for kind in kinds:
+        after = current['overall'] if kind == 'TOTAL' else current['by_kind'][kind]
+        before = previous['overall'] if kind == 'TOTAL' else previous['by_kind'][kind]
+        deltas = []
+        for metric in metrics:
+            if before.get(metric):
+                deltas.append(f"{metric} {before[metric]} -> {after[metric]} ({(after[metric] / before[metric] - 1) * 100:+.0f} %)")
+        print(f"  {kind:<16} " + ', '.join(deltas))
+    if current.get('server') and previous.get('server'):
+        print(f"  {'serveur':<16} RSS max {previous['server']['rss_mb_max']} -> {current['server']['rss_mb_max']} Mo, "
+              f"CPU moyen {previous['server']['cpu_percent_mean']} -> {current['server']['cpu_percent_mean']} %")
+
+#endregion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API PostBootSetup")
+    parser.add_argument('--url', help="API existante (sinon gunicorn est démarré localement)")
+    parser.add_argument('--workers', type=int, default=2, help="Workers gunicorn")
+    parser.add_argument('--threads', type=int, default=1, help="Threads par worker gunicorn")
+    parser.add_argument('--pid', type=int, help="PID du serveur à mesurer avec --url (CPU/RSS)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Clients simultanés")
+    parser.add_argument('--duration', type=float, default=20, help="Durée de la charge (s)")
+    parser.add_argument('--requests', type=int, default=0, help="Nombre total de requêtes (0 = selon la durée)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Pondération des requêtes (défaut: {DEFAULT_MIX})")
+    parser.add_argument('--seed', type=int, default=1, help="Graine du tirage des requêtes")
+    parser.add_argument('--output', type=Path, help="Écrire le rapport JSON")
+    parser.add_argument('--compare', type=Path, help="Rapport JSON de référence (avant/après)")
+    args = parser.parse_args()
+
+    server = None
+    base_url = (args.url or '').rstrip('/')
+    if not base_url:
+        if importlib.util.find_spec('gunicorn') is None:
+            print("[ERREUR] gunicorn n'est pas installé (pip install -r generator/requirements.txt) - utiliser --url")
+            return 2
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = start_gunicorn(args.workers, args.threads, port)
+
+    try:
+        if not wait_ready(base_url, server):
+            print(f"[ERREUR] API injoignable: {base_url}")
+            return 2
+
+        # Catalogue et préchauffage: scripts des profils standards (cibles des téléchargements)
+        catalog = json.loads(urllib.request.urlopen(base_url + '/api/apps', timeout=REQUEST_TIMEOUT).read())
+        profiles = [profile for profile in catalog['apps'].get('profiles', {}) if profile.upper() != 'CUSTOM']
+        optional_apps = [app.get('winget') or app.get('url') or app.get('name')
+                         for app in catalog['apps'].get('optional', [])]
+        for profile in profiles:
+            send(base_url, 'POST', '/api/generate', _generate_body(profile))
+
+        mix = RequestMix(parse_mix(args.mix), profiles, optional_apps, args.seed)
+        sampler_pid = server.pid if server else args.pid
+        sampler = ProcessSampler(sampler_pid) if sampler_pid else None
+        if sampler:
+            sampler.start()
+
+        print("="*60)
+        print(f"TEST DE CHARGE - {base_url}")
+        print(f"  {args.concurrency} clients, {args.requests or f'{args.duration:g} s'}, mélange: {args.mix}")
+        print("="*60)
+
+        records, elapsed = run_load(base_url, mix, args.concurrency, args.duration, args.requests)
+        if sampler:
+            sampler.stopped.set()
+            sampler.join()
+
+        report = summarize(records, elapsed)
+        report['config'] = {
+            'url': args.url, 'workers': None if args.url else args.workers, 'threads': None if args.url else args.threads,
+            'concurrency': args.concurrency, 'mix': args.mix, 'seed': args.seed
+        }
+        if sampler:
+            report['server'] = sampler.summary()
+
+        print_report(report)
+        if args.compare:
+            print_comparison(report, json.loads(args.compare.read_text(encoding='utf-8')))
+        if args.output:
+            args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+            print(f"\n  Rapport: {args.output}")
+
+        return 0 if report['overall']['errors'] == 0 else 1
+
+    finally:
+        if server:
+            stop_server(server)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Générateur de catalogues apps.json synthétiques (tests de montée en charge).
+
+Produit un catalogue valide de taille arbitraire, au format de config/apps.json:
+- master: applications obligatoires (12 par défaut, comme le catalogue réel)
+- common_apps: applications partagées, référencées par les profils ({"ref": ...})
+  avec surcharges (preselected, category, description)
+- profiles: profils métiers, chacun référençant des common_apps
+- optional: applications optionnelles
+
+Les types d'applications reprennent ceux du catalogue: winget, url (installArgs,
+sha256), customInstall (installScript) et webApp. Le tirage est déterministe
+(--seed): deux exécutions identiques produisent le même fichier.
+
+Usage:
+    python synthetic_catalog.py --apps 5000 --profiles 50 --output cache/apps-5000.json
+"""
+
+import sys
+import os
+import io
+import argparse
+import hashlib
+import json
+import random
+from pathlib import Path
+
+DEFAULT_MASTER_APPS = 12
+DEFAULT_REFS_PER_PROFILE = 20
+# Répartition des applications hors master: partagées / optionnelles
+COMMON_SHARE = 0.75
+# Répartition des types d'application (winget, url, customInstall, webApp)
+KIND_WEIGHTS = (70, 10, 10, 10)
+
+INSTALL_SCRIPT_TEMPLATE = """# Installation {name} (script personnalisé)
+$installerUrl = '{url}'
+$installerPath = "$env:TEMP\\{slug}.exe"
+
+Write-Host "  Téléchargement {name}..." -ForegroundColor Gray
+try {{
+    Invoke-WebRequest -Uri $installerUrl -OutFile $installerPath -UseBasicParsing -TimeoutSec 300 -ErrorAction Stop
+    $installProc = Start-Process -FilePath $installerPath -ArgumentList '/S' -NoNewWindow -PassThru
+    $watch = Wait-InstallProcess -Process $installProc -Name '{name}'
+    if ($watch.TimedOut) {{
+        throw "Installation {name} interrompue: $($watch.Reason)"
+    }}
+    Write-Host "    [OK] {name} installé" -ForegroundColor Green
+    Remove-Item -Path $installerPath -Force -ErrorAction SilentlyContinue
+}} catch {{
+    Write-Host "    [ERREUR] Impossible d'installer {name}: $_" -ForegroundColor Red
+    throw
+}}
+"""
+
+
+def _app(index: int, rng: random.Random, categories: list) -> dict:
+    """Application synthétique d'un des quatre types du catalogue."""
+    name = f"Application {index:05d}"
+    slug = f"app{index:05d}"
+    app = {
+        'name': name,
+        'size': f"{rng.choice([5, 20, 45, 80, 150, 300, 600, 1200])} MB",
+        'category': rng.choice(categories),
+        'description': f"Application synthétique {index}",
+    }
+    kind = rng.choices(('winget', 'url', 'custom', 'web'), KIND_WEIGHTS)[0]
+    if kind == 'winget':
+        app['winget'] = f"Synthetic.App{index:05d}"
+    elif kind == 'url':
+        app['url'] = f"https://downloads.example.com/{slug}/setup.exe"
+        app['installArgs'] = '/S /norestart'
+        app['sha256'] = hashlib.sha256(slug.encode('utf-8')).hexdigest()
+    elif kind == 'custom':
+        url = f"https://downloads.example.com/{slug}/installer.exe"
+        app['customInstall'] = True
+        app['installScript'] = INSTALL_SCRIPT_TEMPLATE.format(name=name, url=url, slug=slug)
+        app['size'] = 'Variable'
+    else:
+        app['url'] = f"https://{slug}.example.com"
+        app['webApp'] = True
+        app['size'] = '0 MB'
+    return app
+
+
+def build_catalog(apps: int, profiles: int, seed: int = 0, categories: int = 0,
+                  master_apps: int = DEFAULT_MASTER_APPS, refs_per_profile: int = DEFAULT_REFS_PER_PROFILE) -> dict:
+    """
+    Construit un catalogue synthétique.
+
+    Args:
+        apps: Nombre total d'applications (master + common_apps + optional)
+        profiles: Nombre de profils
+        seed: Graine du tirage
+        categories: Nombre de catégories (0 = environ une pour 25 applications, au moins 8)
+        master_apps: Applications obligatoires
+        refs_per_profile: Références vers common_apps par profil
+
+    Returns:
+        Catalogue au format apps.json
+    """
+    if apps < master_apps + 2:
+        raise ValueError(f"Au moins {master_apps + 2} applications requises")
+    rng = random.Random(seed)
+    category_names = [f"Catégorie {i:03d}" for i in range(categories or max(8, apps // 25))]
+
+    generated = [_app(i, rng, category_names) for i in range(apps)]
+    master = generated[:master_apps]
+    for app in master:
+        app.update({'required': True, 'preselected': True})
+
+    remaining = generated[master_apps:]
+    common_count = max(1, int(len(remaining) * COMMON_SHARE))
+    common_apps = {f"app{i:05d}": app for i, app in enumerate(remaining[:common_count], start=master_apps)}
+    optional = [{**app, 'preselected': False} for app in remaining[common_count:]]
+
+    common_keys = list(common_apps)
+    profile_entries = {}
+    for p in range(profiles):
+        refs = []
+        for key in rng.sample(common_keys, min(refs_per_profile, len(common_keys))):
+            ref = {'ref': key, 'preselected': rng.random() < 0.7}
+            # Surcharges du profil (appliquées par _resolve_app_references)
+            if rng.random() < 0.2:
+                ref['category'] = rng.choice(category_names)
+            if rng.random() < 0.1:
+                ref['description'] = f"Surcharge du profil {p}"
+            refs.append(ref)
+        suggestions = [app.get('winget') or app.get('url') or app['name']
+                       for app in rng.sample(optional, min(4, len(optional)))]
+        profile_entries[f"PROFILE_{p:03d}"] = {
+            'name': f"Profil synthétique {p}",
+            'description': f"Profil métier synthétique {p}",
+            'icon': 'code',
+            'color': rng.choice(['blue', 'green', 'purple', 'orange']),
+            'suggestions': suggestions,
+            'apps': refs,
+        }
+
+    return {
+        'version': 'synthetic',
+        'lastUpdate': '2000-01-01',
+        'company': {'name': 'Synthetic', 'domain': 'example.com', 'email': 'si@example.com'},
+        'master': master,
+        'common_apps': common_apps,
+        'profiles': profile_entries,
+        'optional': optional,
+    }
+
+
+def catalog_summary(catalog: dict) -> dict:
+    return {
+        'master': len(catalog['master']),
+        'common_apps': len(catalog['common_apps']),
+        'profiles': len(catalog['profiles']),
+        'refs': sum(len(profile['apps']) for profile in catalog['profiles'].values()),
+        'optional': len(catalog['optional']),
+    }
+
+
+def main():
+    # Forcer UTF-8 pour stdout
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Génère un catalogue apps.json synthétique")
+    parser.add_argument('--apps', type=int, default=1000, help="Nombre total d'applications")
+    parser.add_argument('--profiles', type=int, default=20, help="Nombre de profils")
+    parser.add_argument('--refs-per-profile', type=int, default=DEFAULT_REFS_PER_PROFILE, help="Références par profil")
+    parser.add_argument('--categories', type=int, default=0, help="Nombre de catégories (0 = automatique)")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du tirage")
+    parser.add_argument('--output', type=Path, required=True, help="Fichier JSON à écrire")
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.apps, args.profiles, args.seed, args.categories,
+                            refs_per_profile=args.refs_per_profile)
+
+    # Validation: les références doivent se résoudre comme dans le générateur
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+    import copy
+    from app import ScriptGenerator
+    ScriptGenerator._resolve_app_references(copy.deepcopy(catalog))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(catalog, indent=2, ensure_ascii=False), encoding='utf-8')
+    summary = catalog_summary(catalog)
+    print(f"Catalogue écrit: {args.output} ({args.output.stat().st_size / 1024:.0f} Ko)")
+    print('  ' + ', '.join(f"{key}: {value}" for key, value in summary.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
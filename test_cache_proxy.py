@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test du proxy cache LAN des installeurs, contre un serveur d'origine local.
+"""
+
+import sys
+import os
+import io
+import tempfile
+import threading
+import time
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from flask import Flask
+from cache_proxy import InstallerCacheProxy, create_proxy_blueprint
+
+# Faux installeurs servis par l'origine (en-tete MZ + contenu deterministe)
+ORIGIN_FILES = {
+    '/setup.exe': b'MZ' + bytes(range(256)) * 4096,
+    '/tools/other.msi': b'MZ' + b'\x42' * 300000,
+    '/tools/slow.msi': b'MZ' + b'\x17' * 1000000,
+}
+# Version publiee par l'origine (ETag), modifiee pour simuler une republication sous la meme URL
+ORIGIN_ETAGS = {}
+SLOW_CHUNKS = 10
+origin_requests = []
+revalidation_requests = []
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """Serveur d'origine simulant un site editeur."""
+
+    def do_GET(self):
+        content = ORIGIN_FILES.get(self.path)
+        etag = ORIGIN_ETAGS.get(self.path, '"v1"')
+        if self.headers.get('If-None-Match'):
+            revalidation_requests.append(self.path)
+            if self.headers['If-None-Match'] == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+        else:
+            origin_requests.append(self.path)
+        if content is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if self.headers.get('If-None-Match'):
+            return  # Revalidation: le proxy ne lit pas le corps
+        if self.path == '/tools/slow.msi':
+            # Origine lente: le telechargement reste en cours pendant le test multi-workers
+            step = len(content) // SLOW_CHUNKS + 1
+            for offset in range(0, len(content), step):
+                self.wfile.write(content[offset:offset + step])
+                self.wfile.flush()
+                time.sleep(0.1)
+            return
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def wait_downloads(proxy, timeout=10):
+    """Attend la fin des telechargements en arriere-plan (metadonnees + eviction)."""
+    deadline = time.time() + timeout
+    while proxy.get_stats()['in_progress'] and time.time() < deadline:
+        time.sleep(0.05)
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def main():
+    print("="*60)
+    print("TEST DU PROXY CACHE LAN DES INSTALLEURS")
+    print("="*60)
+
+    origin = ThreadingHTTPServer(('127.0.0.1', 0), OriginHandler)
+    threading.Thread(target=origin.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{origin.server_address[1]}"
+    setup_url = base_url + '/setup.exe'
+    other_url = base_url + '/tools/other.msi'
+    setup_content = ORIGIN_FILES['/setup.exe']
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Cache limite a un seul installeur pour tester l'eviction
+        proxy = InstallerCacheProxy(cache_dir, len(setup_content) + 1000, {setup_url, base_url + '/tools/'})
+        app = Flask(__name__)
+        app.register_blueprint(create_proxy_blueprint(proxy))
+        client = app.test_client()
+
+        # Premier telechargement: MISS, recupere depuis l'origine
+        response = client.get('/api/proxy', query_string={'url': setup_url})
+        results.append(check("MISS servi depuis l'origine",
+                             response.status_code == 200 and response.data == setup_content
+                             and response.headers['X-Cache'] == 'MISS'))
+
+        wait_downloads(proxy)
+
+        # Second telechargement: HIT, sans nouvel appel a l'origine
+        response = client.get('/api/proxy', query_string={'url': setup_url})
+        results.append(check("HIT revalide (304) puis servi depuis le disque, ETag transmis",
+                             response.data == setup_content and response.headers['X-Cache'] == 'HIT'
+                             and response.headers.get('ETag') == '"v1"'
+                             and origin_requests.count('/setup.exe') == 1
+                             and revalidation_requests == ['/setup.exe']))
+
+        # Installeur republie sous la meme URL: nouvelle version telechargee au lieu de l'ancienne
+        new_setup = b'MZ' + bytes(reversed(range(256))) * 4096
+        ORIGIN_FILES['/setup.exe'], ORIGIN_ETAGS['/setup.exe'] = new_setup, '"v2"'
+        response = client.get('/api/proxy', query_string={'url': setup_url})
+        wait_downloads(proxy)
+        results.append(check("Nouvelle version a l'origine: entree remplacee",
+                             response.data == new_setup and response.headers['X-Cache'] == 'MISS'
+                             and response.headers.get('ETag') == '"v2"'
+                             and proxy.lookup(setup_url)['etag'] == '"v2"'))
+
+        # Entree recente (max_age): servie sans requete vers l'origine
+        proxy.max_age_seconds = 3600
+        revalidation_requests.clear()
+        response = client.get('/api/proxy', query_string={'url': setup_url})
+        proxy.max_age_seconds = 0
+        results.append(check("Entree plus recente que max_age servie sans revalidation",
+                             response.data == new_setup and response.headers['X-Cache'] == 'HIT'
+                             and not revalidation_requests))
+        setup_content = new_setup
+
+        # Requete Range (reprise de telechargement)
+        response = client.get('/api/proxy', query_string={'url': setup_url}, headers={'Range': 'bytes=100-199'})
+        results.append(check("Range 206 avec Content-Range",
+                             response.status_code == 206 and response.data == setup_content[100:200]
+                             and response.headers['Content-Range'] == f"bytes 100-199/{len(setup_content)}"))
+
+        response = client.get('/api/proxy', query_string={'url': setup_url}, headers={'Range': 'bytes=-10'})
+        results.append(check("Range suffixe", response.data == setup_content[-10:]))
+
+        response = client.get('/api/proxy', query_string={'url': setup_url},
+                              headers={'Range': f"bytes={len(setup_content)}-"})
+        results.append(check("Range non satisfiable (416)", response.status_code == 416))
+
+        # Telechargements concurrents: une seule requete vers l'origine
+        origin_requests.clear()
+        bodies = []
+
+        def fetch():
+            with app.test_client() as concurrent_client:
+                bodies.append(concurrent_client.get('/api/proxy', query_string={'url': other_url}).data)
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wait_downloads(proxy)
+        results.append(check("Telechargement unique pour 5 clients concurrents",
+                             origin_requests.count('/tools/other.msi') == 1
+                             and all(body == ORIGIN_FILES['/tools/other.msi'] for body in bodies)))
+
+        # Eviction LRU: setup.exe (le plus ancien) a ete evince au profit de other.msi
+        stats = proxy.get_stats()
+        results.append(check("Eviction LRU au-dela de la taille maximale",
+                             stats['entries'] == 1 and stats['evictions'] >= 1
+                             and proxy.lookup(setup_url) is None))
+
+        # Securite: URLs hors catalogue refusees
+        response = client.get('/api/proxy', query_string={'url': 'http://example.com/malware.exe'})
+        results.append(check("URL hors catalogue refusee (403)", response.status_code == 403))
+
+        traversal = [client.get('/api/proxy', query_string={'url': base_url + path}).status_code
+                     for path in ('/tools/../setup2.exe', '/tools/%2e%2e/setup2.exe', '/tools/./../x.exe')]
+        results.append(check("Sortie du repertoire autorise par '..' refusee (403)",
+                             traversal == [403, 403, 403] and proxy.is_allowed(base_url + '/tools/./sub/a.exe')))
+
+        # Origine en erreur
+        response = client.get('/api/proxy', query_string={'url': base_url + '/tools/absent.exe'})
+        results.append(check("Origine en erreur (502)", response.status_code == 502))
+
+        # Deux workers partageant le repertoire de cache: un seul telechargement, pas de nettoyage abusif
+        slow_url = base_url + '/tools/slow.msi'
+        slow_content = ORIGIN_FILES['/tools/slow.msi']
+        origin_requests.clear()
+        first_worker = {}
+
+        def fetch_first_worker():
+            with app.test_client() as worker_client:
+                response = worker_client.get('/api/proxy', query_string={'url': slow_url})
+                first_worker.update(cache=response.headers['X-Cache'], data=response.data)
+
+        thread = threading.Thread(target=fetch_first_worker)
+        thread.start()
+        deadline = time.time() + 5
+        while not list(Path(cache_dir).glob('*.part')) and time.time() < deadline:
+            time.sleep(0.02)
+        second_proxy = InstallerCacheProxy(cache_dir, len(slow_content) * 4, {base_url + '/tools/'})
+        part_kept = bool(list(Path(cache_dir).glob('*.part')))
+        second_app = Flask(__name__)
+        second_app.register_blueprint(create_proxy_blueprint(second_proxy))
+        second = second_app.test_client().get('/api/proxy', query_string={'url': slow_url})
+        thread.join()
+        wait_downloads(proxy)
+        results.append(check("Nouveau worker: telechargement en cours conserve",
+                             part_kept and first_worker.get('cache') == 'MISS'
+                             and first_worker.get('data') == slow_content))
+        results.append(check("Autre worker: suit le telechargement sans appel a l'origine",
+                             second.headers['X-Cache'] == 'SHARED' and second.data == slow_content
+                             and origin_requests.count('/tools/slow.msi') == 1
+                             and not list(Path(cache_dir).glob('*.part'))
+                             and not list(Path(cache_dir).glob('*.lock'))))
+
+        # Restes d'un worker arrete: supprimes au demarrage seulement s'ils sont anciens
+        stale_part = Path(cache_dir) / 'deadbeef.1.0000.part'
+        stale_lock = Path(cache_dir) / 'deadbeef.lock'
+        fresh_part = Path(cache_dir) / 'cafe.1.0000.part'
+        for path in (stale_part, stale_lock, fresh_part):
+            path.write_bytes(b'MZ')
+        old = time.time() - 3600
+        os.utime(stale_part, (old, old))
+        os.utime(stale_lock, (old, old))
+        InstallerCacheProxy(cache_dir, len(slow_content) * 4, set())
+        results.append(check("Demarrage: seuls les fichiers temporaires abandonnes sont supprimes",
+                             not stale_part.exists() and not stale_lock.exists() and fresh_part.exists()))
+
+    origin.shutdown()
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
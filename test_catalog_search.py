@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test de la recherche indexee dans le catalogue (/api/apps/search).
+"""
+
+import sys
+import os
+import io
+import logging
+import statistics
+import time
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import app, generator, catalog_search
+from synthetic_catalog import build_catalog
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def search(client, **params):
+    return client.get('/api/apps/search', query_string=params)
+
+
+def names(response):
+    return [item['name'] for item in response.get_json()['items']]
+
+
+def main():
+    print("="*60)
+    print("TEST DE LA RECHERCHE INDEXEE DANS LE CATALOGUE")
+    print("="*60)
+
+    logging.getLogger('catalog_search').setLevel(logging.WARNING)
+    client = app.test_client()
+    results = []
+
+    # Catalogue reel
+    results.append(check("Prefixe au fil de la frappe", 'Visual Studio Code' in names(search(client, q='visu'))))
+    results.append(check("Faute de frappe tolere", names(search(client, q='crome'))[:1] == ['Google Chrome']))
+    results.append(check("Identifiant winget complet",
+                         names(search(client, q='Microsoft.VisualStudioCode'))[:1] == ['Visual Studio Code']))
+    results.append(check("Tous les termes requis", names(search(client, q='google chrome')) == ['Google Chrome']))
+
+    data = search(client, q='', fields='name,category').get_json()
+    first = data['items'][0]
+    results.append(check("Projection des champs", set(first) == {'id', 'name', 'category'}))
+
+    facets = {facet['name']: facet['count'] for facet in data['facets']['categories']}
+    category = data['facets']['categories'][0]['name']
+    filtered = search(client, category=category, limit=100).get_json()
+    results.append(check("Facettes et filtre de categorie",
+                         sum(facets.values()) == data['total'] and filtered['total'] == facets[category]
+                         and all(item['category'] == category for item in filtered['items'])
+                         and len(filtered['facets']['categories']) == len(facets)))
+
+    # Pagination par curseur: toutes les apps, une seule fois
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = search(client, limit=7, **({'cursor': cursor} if cursor else {})).get_json()
+        seen.extend(item['id'] for item in page['items'])
+        pages += 1
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    results.append(check("Pagination par curseur complete",
+                         len(seen) == len(set(seen)) == data['total'] and pages == -(-data['total'] // 7)))
+
+    results.append(check("Parametres invalides refuses",
+                         search(client, cursor='abc').status_code == 400
+                         and search(client, source='inconnue').status_code == 400))
+
+    # Catalogue synthetique: index reconstruit une fois, recherches en quelques millisecondes
+    stale_cursor = search(client, limit=5).get_json()['next_cursor']
+    original_catalog = generator.apps_config
+    generator.apps_config = build_catalog(10000, 100, seed=3)
+    try:
+        results.append(check("Curseur perime apres changement du catalogue",
+                             search(client, limit=5, cursor=stale_cursor).status_code == 400))
+        index = catalog_search.index()
+        timings = []
+        for query in ['application 0421', 'appli', 'aplication 07', 'categorie 012', 'synthetic.app0999']:
+            start = time.perf_counter()
+            response = search(client, q=query)
+            timings.append(time.perf_counter() - start)
+        results.append(check(f"Recherche rapide sur 10 000 apps (mediane {statistics.median(timings) * 1000:.1f} ms)",
+                             catalog_search.index() is index and len(index.apps) == 10000
+                             and statistics.median(timings) < 0.1 and response.get_json()['total'] > 0))
+    finally:
+        generator.apps_config = original_catalog
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
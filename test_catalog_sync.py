@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test des versions du catalogue et de la synchronisation differentielle (/api/catalog).
+"""
+
+import sys
+import os
+import io
+import copy
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from flask import Flask
+from catalog_sync import CatalogHistory, create_catalog_blueprint
+
+CONFIG_DIR = Path(__file__).parent / 'config'
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def apply_delta(cache, delta):
+    """Application cote client: ajout/remplacement puis suppression des entrees."""
+    for section in ('apps', 'profiles'):
+        entries = cache[section]
+        entries.update(delta[section]['added'])
+        entries.update(delta[section]['changed'])
+        for key in delta[section]['removed']:
+            del entries[key]
+    cache['meta'] = delta['meta']
+    cache['version'] = delta['version']
+
+
+def main():
+    print("="*60)
+    print("TEST DE LA SYNCHRONISATION DIFFERENTIELLE DU CATALOGUE")
+    print("="*60)
+
+    logging.getLogger('catalog_sync').setLevel(logging.WARNING)
+    results = []
+    catalog = json.loads((CONFIG_DIR / 'apps.json').read_text(encoding='utf-8'))
+    current = {'catalog': catalog}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = CatalogHistory(Path(tmp), max_versions=3)
+        app = Flask(__name__)
+        app.register_blueprint(create_catalog_blueprint(history, lambda: current['catalog']))
+        client = app.test_client()
+
+        response = client.get('/api/catalog')
+        full = response.get_json()
+        v1 = full['version']
+        expected_apps = len(catalog['master']) + len(catalog['common_apps']) + len(catalog['optional'])
+        results.append(check("Catalogue complet avec ETag",
+                             full['full'] and len(full['apps']) == expected_apps
+                             and len(full['profiles']) == len(catalog['profiles'])
+                             and response.headers['ETag'] == f'"{v1}"'))
+
+        results.append(check("304 si la version n'a pas change",
+                             client.get('/api/catalog', headers={'If-None-Match': f'"{v1}"'}).status_code == 304))
+        unchanged = client.get(f'/api/catalog?since={v1}')
+        results.append(check("Client a jour: reponse minimale",
+                             unchanged.get_json()['unchanged'] and len(unchanged.data) < 200))
+
+        # Nouvelle version: une description modifiee, une app ajoutee, une supprimee, un profil modifie
+        updated = copy.deepcopy(catalog)
+        updated['version'] = '5.3'
+        updated['common_apps']['git']['description'] = 'Gestion de versions distribuée'
+        updated['optional'].append({'name': 'Nouvelle app', 'winget': 'Example.NewApp', 'size': '10 MB',
+                                    'category': 'Utilitaire'})
+        removed_key = next(key for key in updated['common_apps'] if key != 'git')
+        del updated['common_apps'][removed_key]
+        for profile in updated['profiles'].values():
+            profile['apps'] = [ref for ref in profile['apps'] if ref.get('ref') != removed_key]
+        current['catalog'] = updated
+
+        response = client.get(f'/api/catalog?since={v1}')
+        delta = response.get_json()
+        results.append(check("Delta limite aux entrees modifiees",
+                             not delta['full'] and delta['version'] != v1
+                             and list(delta['apps']['added']) == ['optional:Example.NewApp']
+                             and list(delta['apps']['changed']) == ['common:git']
+                             and delta['apps']['removed'] == [f'common:{removed_key}']
+                             and delta['meta']['version'] == '5.3'))
+        results.append(check(f"Delta compact ({len(response.data)} octets, catalogue {len(json.dumps(full))})",
+                             len(response.data) < len(json.dumps(full)) // 4))
+
+        cache = {'apps': dict(full['apps']), 'profiles': dict(full['profiles'])}
+        apply_delta(cache, delta)
+        v2_full = client.get('/api/catalog').get_json()
+        results.append(check("Cache client synchronise identique au catalogue",
+                             cache['apps'] == v2_full['apps'] and cache['profiles'] == v2_full['profiles']
+                             and cache['version'] == v2_full['version']))
+
+        results.append(check("Version inconnue: catalogue complet",
+                             client.get('/api/catalog?since=0123456789abcdef').get_json()['full']
+                             and client.get('/api/catalog?since=../../etc').get_json()['full']))
+
+        # Historique court: les plus anciennes versions sont elaguees
+        for i in range(4):
+            newer = copy.deepcopy(updated)
+            newer['lastUpdate'] = f'2030-01-0{i + 1}'
+            current['catalog'] = newer
+            client.get('/api/catalog')
+        versions = client.get('/api/catalog/versions').get_json()
+        results.append(check("Historique borne, version courante en tete",
+                             len(versions['versions']) == 3 and versions['versions'][0] == versions['current']
+                             and v1 not in versions['versions']
+                             and client.get(f'/api/catalog?since={v1}').get_json()['full']))
+
+        # Retour arriere vers une version connue: redevient la plus recente
+        current['catalog'] = catalog
+        rollback = client.get('/api/catalog').get_json()['version']
+        results.append(check("Retour arriere vers la version d'origine",
+                             rollback == v1 and history.versions()[0] == v1))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
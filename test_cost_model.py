@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test du modele de cout statique (garde-fou de regression des modules).
+
+Les valeurs attendues decrivent les modules actuels: une modification qui ajoute
+un chargement de ruche, une enumeration AppX ou un redemarrage de l'explorateur
+fait echouer ce test et doit etre justifiee.
+"""
+
+import sys
+import os
+import io
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import MAX_APPS_PER_SCRIPT, app, generator
+from cost_model import analyze_cost, parse_size_bytes
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def preview(client, modules):
+    config = {
+        'profile': 'DEV',
+        'master_apps': [],
+        'profile_apps': [],
+        'optional_apps': [],
+        'modules': modules
+    }
+    response = client.post('/api/generate/preview', json={'config': config})
+    return response.status_code, response.get_json()
+
+
+def main():
+    print("="*60)
+    print("TEST DU MODELE DE COUT STATIQUE")
+    print("="*60)
+
+    results = []
+    client = app.test_client()
+
+    full_modules = {
+        'debloat': {'enabled': True},
+        'performance': {'enabled': True, 'PowerPlan': True, 'StartupPrograms': True, 'Network': True, 'VisualEffects': True},
+        'ui': {'enabled': True, 'DarkMode': True, 'ShowFileExtensions': True, 'Windows10ContextMenu': True}
+    }
+    status, body = preview(client, full_modules)
+    results.append(check("Apercu sans generation (200)", status == 200 and body['success']))
+    totals = body['cost']['totals']
+    modules = body['cost']['modules']
+
+    # Garde-fous: un chargement de NTUSER.DAT par module (lot registre), un inventaire AppX
+    results.append(check("Un chargement de ruche par module",
+                         all(detail['registry_hive_loads'] == 1 for detail in modules.values())
+                         and totals['registry_hive_loads'] == 3))
+    results.append(check("Inventaire AppX enumere une seule fois", totals['appx_enumerations'] == 2))
+    results.append(check("Un seul redemarrage de l'explorateur", totals['explorer_restarts'] == 1))
+    results.append(check("Services de telemetrie deplies (liste litterale)",
+                         modules['debloat']['service_changes'] >= 7))
+    results.append(check("Valeurs registre comptees par module",
+                         all(modules[name]['registry_values'] > 0 for name in ('debloat', 'performance', 'ui'))))
+
+    # Options desactivees: fonctions non atteignables
+    status, body = preview(client, {'performance': {'enabled': True, 'PowerPlan': True}})
+    performance = body['cost']['modules']['performance']
+    results.append(check("Options desactivees ignorees",
+                         'Set-PowerPlan' in performance['functions']
+                         and 'Optimize-NetworkSettings' not in performance['functions']
+                         and 'ui' not in body['cost']['modules']
+                         and body['cost']['totals']['explorer_restarts'] == 0))
+
+    # Applications: winget (verification + installation), volume d'apres le catalogue
+    apps = [
+        {'name': 'A', 'winget': 'Vendor.A', 'size': '150 MB'},
+        {'name': 'B', 'url': 'https://example.com/b.exe', 'size': '1.5 GB'},
+        {'name': 'C', 'webApp': True, 'url': 'https://example.com', 'size': '0 MB'},
+        {'name': 'D', 'customInstall': True, 'installScript': "Invoke-WebRequest -Uri $u -OutFile $f\nwinget install X", 'size': 'Variable'},
+    ]
+    cost = analyze_cost({'apps': {'master': apps, 'profile': []}, 'modules': []}, {})
+    totals = cost['totals']
+    results.append(check("Couts par type d'application",
+                         totals['winget_invocations'] == 1 + 2 + 1 and totals['downloads'] == 3
+                         and totals['download_bytes'] == parse_size_bytes('150 MB') + parse_size_bytes('1.5 GB')
+                         and totals['unknown_size_apps'] == ['D']))
+
+    # Configuration invalide: memes limites que la generation
+    too_many = [{'name': str(i)} for i in range(MAX_APPS_PER_SCRIPT + 1)]
+    try:
+        generator.analyze_cost({'apps': {'master': too_many, 'profile': []}})
+        results.append(check("Trop d'applications refuse", False))
+    except ValueError:
+        results.append(check("Trop d'applications refuse", True))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
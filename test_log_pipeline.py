@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test de la journalisation non bloquante (file, lignes JSON, rotation).
+"""
+
+import sys
+import os
+import io
+import json
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from flask import Flask
+from log_pipeline import LogPipeline
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+class SlowHandler(logging.Handler):
+    """Simule un disque lent et note le thread qui ecrit."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def emit(self, record):
+        time.sleep(0.05)
+        self.threads.add(threading.current_thread().name)
+
+
+class CountingArg:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'valeur'
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def main():
+    print("="*60)
+    print("TEST DE LA JOURNALISATION NON BLOQUANTE")
+    print("="*60)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / 'api.log'
+        logger = logging.getLogger('test_log_pipeline')
+        logger.propagate = False
+        pipeline = LogPipeline(log_file, console=False, logger=logger)
+
+        logger.info("Génération %s terminée", 'Dev', extra={'profile': 'DEV', 'duration_ms': 12.5})
+        try:
+            raise ValueError("entrée invalide")
+        except ValueError:
+            logger.exception("Erreur de génération")
+        app = Flask(__name__)
+        with app.test_request_context('/api/generate', method='POST'):
+            logger.warning("Requête refusée")
+        pipeline.stop()
+        pipeline.stop()
+
+        lines = read_lines(log_file)
+        results.append(check("Lignes JSON avec champs extra",
+                             len(lines) == 3 and lines[0]['message'] == "Génération Dev terminée"
+                             and lines[0]['profile'] == 'DEV' and lines[0]['level'] == 'INFO'))
+        results.append(check("Trace d'exception serialisee",
+                             'ValueError: entrée invalide' in lines[1].get('exception', '')))
+        results.append(check("Contexte de la requete Flask",
+                             lines[2].get('http', {}).get('path') == '/api/generate'
+                             and lines[2]['http']['method'] == 'POST'))
+
+        # Debug paresseux: arguments jamais formates lorsque DEBUG est desactive
+        pipeline = LogPipeline(log_file, console=False, logger=logger)
+        arg = CountingArg()
+        logger.debug("Config: %s", arg)
+        results.append(check("Debug non formate au niveau INFO", arg.calls == 0))
+
+        # Ecriture lente: le thread appelant ne l'attend pas
+        slow = SlowHandler()
+        pipeline.listener.handlers += (slow,)
+        start = time.perf_counter()
+        for i in range(20):
+            logger.info("Message %d", i)
+        elapsed = time.perf_counter() - start
+        pipeline.stop()
+        results.append(check("Emission sans attente des entrees/sorties", elapsed < 0.05 and len(slow.threads) == 1
+                             and threading.current_thread().name not in slow.threads))
+        results.append(check("File videe a l'arret", len(read_lines(log_file)) == 3 + 20))
+
+        # Rotation par taille
+        rotated = Path(tmp) / 'rotated.log'
+        pipeline = LogPipeline(rotated, console=False, logger=logger, max_bytes=2000, backup_count=3)
+        for i in range(200):
+            logger.info("Ligne de remplissage %d %s", i, 'x' * 40)
+        pipeline.stop()
+        backups = sorted(p.name for p in Path(tmp).glob('rotated.log.*'))
+        results.append(check("Rotation par taille bornee", backups == ['rotated.log.1', 'rotated.log.2', 'rotated.log.3']
+                             and rotated.stat().st_size <= 2000))
+
+        # Fichier par worker
+        per_worker = LogPipeline(Path(tmp) / 'api-{pid}.log', console=False, logger=logger)
+        logger.info("Worker")
+        per_worker.stop()
+        results.append(check("Fichier par processus (motif {pid})", (Path(tmp) / f'api-{os.getpid()}.log').exists()))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
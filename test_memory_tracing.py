@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test du mode diagnostic memoire (tracemalloc) et des budgets par requete.
+"""
+
+import sys
+import os
+import io
+import logging
+import tracemalloc
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from flask import Flask
+from admin import ADMIN_TOKEN_ENV, ADMIN_TOKEN_HEADER
+from memory_tracing import MemoryTracer, create_memory_blueprint
+from metrics import MetricsRegistry
+
+MB = 1024 * 1024
+retained = []
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+class WarningCollector(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def traced_request(tracer, endpoint, func):
+    start = tracer.begin()
+    func()
+    return tracer.end(endpoint, start)
+
+
+def main():
+    print("="*60)
+    print("TEST DU DIAGNOSTIC MEMOIRE PAR REQUETE")
+    print("="*60)
+
+    results = []
+
+    # Mode desactive: aucun suivi, reinitialisation refusee
+    disabled = MemoryTracer(enabled=False)
+    app = Flask(__name__)
+    app.register_blueprint(create_memory_blueprint(disabled))
+    client = app.test_client()
+    results.append(check("Mode desactive par defaut",
+                         disabled.begin() is None and client.get('/api/admin/memory').get_json()['enabled'] is False
+                         and client.post('/api/admin/memory/reset').status_code == 409))
+
+    metrics = MetricsRegistry()
+    tracer = MemoryTracer(enabled=True, budget_kb=2048, metrics=metrics)
+    collector = WarningCollector()
+    logging.getLogger('memory_tracing').addHandler(collector)
+    tracer.reset()
+
+    try:
+        # Allocation transitoire: pic eleve, rien de retenu
+        transient = traced_request(tracer, '/transient', lambda: bytearray(3 * MB))
+        results.append(check("Pic d'une allocation transitoire",
+                             transient['peak_bytes'] >= 3 * MB and transient['retained_bytes'] < 64 * 1024))
+
+        # Allocation retenue (cache qui grossit): comptee comme retenue
+        kept = traced_request(tracer, '/retained', lambda: retained.append(bytearray(MB)))
+        results.append(check("Memoire retenue par la requete",
+                             kept['retained_bytes'] >= MB and not kept['over_budget']))
+
+        results.append(check("Budget depasse: avertissement et compteur",
+                             transient['over_budget'] and any('/transient' in m for m in collector.messages)
+                             and 'postboot_memory_budget_exceeded_total{endpoint="/transient"} 1' in metrics.render()))
+
+        traced_request(tracer, '/retained', lambda: retained.append(bytearray(MB)))
+        stats = {entry['endpoint']: entry for entry in tracer.endpoint_stats()}
+        results.append(check("Statistiques agregees par endpoint",
+                             stats['/retained']['requests'] == 2 and stats['/retained']['retained_kb_total'] >= 2048
+                             and stats['/transient']['over_budget'] == 1
+                             and tracer.endpoint_stats()[0]['endpoint'] == '/transient'))
+
+        sites = tracer.top_allocations(5)
+        results.append(check("Site d'allocation principal identifie",
+                             sites[0]['file'].endswith('test_memory_tracing.py') and sites[0]['size_kb'] >= 1024))
+        growth = tracer.growth(5)
+        results.append(check("Croissance depuis la reference",
+                             growth[0]['file'].endswith('test_memory_tracing.py') and growth[0]['size_diff_kb'] >= 1024))
+
+        # Endpoint d'administration, protege par ADMIN_TOKEN lorsqu'il est defini
+        app = Flask(__name__)
+        app.register_blueprint(create_memory_blueprint(tracer))
+        client = app.test_client()
+        report = client.get('/api/admin/memory?limit=3').get_json()
+        results.append(check("Rapport d'administration",
+                             report['enabled'] and len(report['top_allocations']) == 3 and report['budget_kb'] == 2048))
+
+        os.environ[ADMIN_TOKEN_ENV] = 'secret'
+        try:
+            denied = client.get('/api/admin/memory').status_code
+            allowed = client.get('/api/admin/memory', headers={ADMIN_TOKEN_HEADER: 'secret'}).status_code
+        finally:
+            del os.environ[ADMIN_TOKEN_ENV]
+        results.append(check("Jeton d'administration exige", denied == 401 and allowed == 200))
+
+        client.post('/api/admin/memory/reset')
+        results.append(check("Reinitialisation des statistiques", tracer.endpoint_stats() == []))
+    finally:
+        tracemalloc.stop()
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
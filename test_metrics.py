@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test des metriques Prometheus (/api/metrics) et de leur agregation
+entre plusieurs processus (workers gunicorn).
+"""
+
+import sys
+import os
+import io
+import json
+import multiprocessing
+import tempfile
+import threading
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import app
+from metrics import MetricsRegistry
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def parse(text):
+    """Series exposees: {'nom{labels}': valeur}."""
+    series = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            series[name] = float(value)
+    return series
+
+
+def scrape(client):
+    return parse(client.get('/api/metrics').get_data(as_text=True))
+
+
+def worker(directory, requests, stop_event=None):
+    """Processus simulant un worker: compteurs, latences et une compilation en cours."""
+    registry = MetricsRegistry(directory)
+    for _ in range(requests):
+        registry.inc('postboot_http_requests_total', endpoint='/api/apps', method='GET', status=200)
+        registry.observe('postboot_http_request_duration_seconds', 0.02, endpoint='/api/apps', method='GET')
+    registry.add('postboot_compile_queue_depth', 1)
+    registry.flush()
+    if stop_event is not None:
+        stop_event.wait(30)
+
+
+def main():
+    print("="*60)
+    print("TEST DES METRIQUES PROMETHEUS")
+    print("="*60)
+
+    results = []
+    client = app.test_client()
+
+    # Valeurs de reference: le registre de l'application est partage (cache/metrics)
+    before = scrape(client)
+    response = client.get('/api/metrics')
+    results.append(check("Format texte Prometheus 0.0.4",
+                         response.status_code == 200 and 'version=0.0.4' in response.headers['Content-Type']))
+
+    client.get('/api/apps')
+    client.get('/api/inexistant')
+    config = {
+        'profile': 'DEV_DOTNET',
+        'master_apps': [],
+        'profile_apps': [],
+        'optional_apps': [],
+        'modules': {'performance': {'enabled': True, 'PowerPlan': True}}
+    }
+    client.post('/api/generate', json={'config': config, 'scriptTypes': ['installation', 'optimizations']})
+    after = scrape(client)
+
+    def delta(series):
+        return after.get(series, 0) - before.get(series, 0)
+
+    results.append(check("Requete comptee par endpoint (regle de routage)",
+                         delta('postboot_http_requests_total{endpoint="/api/apps",method="GET",status="200"}') == 1
+                         and delta('postboot_http_requests_total{endpoint="unmatched",method="GET",status="404"}') == 1))
+
+    stages = ['transform', 'generate.cost_estimates', 'generate.header', 'generate.embedded_config',
+              'generate.utilities', 'generate.modules', 'generate.orchestrator', 'generate.assemble', 'file_write']
+    results.append(check("Histogramme par etape de generation",
+                         all(delta(f'postboot_stage_duration_seconds_count{{stage="{stage}"}}') == 1 for stage in stages)))
+    results.append(check("Distribution des tailles de script",
+                         delta('postboot_output_size_bytes_count{kind="ps1"}') == 1
+                         and delta('postboot_output_size_bytes_bucket{kind="ps1",le="+Inf"}') == 1))
+
+    buckets = [value for name, value in after.items()
+               if name.startswith('postboot_http_request_duration_seconds_bucket{endpoint="/api/apps",method="GET"')]
+    results.append(check("Seuils cumulatifs, +Inf = count",
+                         buckets == sorted(buckets)
+                         and buckets[-1] == after['postboot_http_request_duration_seconds_count{endpoint="/api/apps",method="GET"}']))
+
+    # Agregation entre processus: un worker termine, un worker actif
+    context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        finished = context.Process(target=worker, args=(directory, 3))
+        finished.start()
+        finished.join()
+
+        stop_event = context.Event()
+        running = context.Process(target=worker, args=(directory, 2, stop_event))
+        running.start()
+        while len(list(directory.glob('*-*.json'))) < 2:
+            running.join(0.05)
+
+        registry = MetricsRegistry(directory)
+        registry.inc('postboot_http_requests_total', endpoint='/api/apps', method='GET', status=200)
+        series = parse(registry.render())
+        results.append(check("Compteurs additionnes entre processus",
+                             series['postboot_http_requests_total{endpoint="/api/apps",method="GET",status="200"}'] == 6
+                             and series['postboot_http_request_duration_seconds_count{endpoint="/api/apps",method="GET"}'] == 5))
+        results.append(check("Jauge des workers termines ignoree",
+                             series['postboot_compile_queue_depth'] == 1 and series['postboot_metrics_processes'] == 2))
+
+        stop_event.set()
+        running.join()
+        series = parse(registry.render())
+        results.append(check("Workers termines archives (compteurs monotones)",
+                             series['postboot_http_requests_total{endpoint="/api/apps",method="GET",status="200"}'] == 6
+                             and (directory / 'archive.json').exists()
+                             and len(list(directory.glob('*-*.json'))) == 1))
+
+        # Redemarrage du conteneur: fichier de l'ancien processus portant le meme pid (pid 1)
+        previous_boot = {'pid': os.getpid(), 'identity': 'ancien-boot:1',
+                         'counters': {'postboot_http_requests_total':
+                                      {'endpoint="/api/apps",method="GET",status="200"': 4}},
+                         'gauges': {'postboot_compile_queue_depth': {'': 5}}, 'histograms': {}}
+        (directory / f'{os.getpid()}-ancien.json').write_text(json.dumps(previous_boot), encoding='utf-8')
+        legacy = dict(previous_boot, counters={}, gauges={'postboot_compile_queue_depth': {'': 7}})
+        del legacy['identity']
+        (directory / f'{os.getpid()}-legacy.json').write_text(json.dumps(legacy), encoding='utf-8')
+        first, second = parse(registry.render()), parse(registry.render())
+        results.append(check("Meme pid apres redemarrage: ancien fichier archive une seule fois",
+                             first['postboot_metrics_processes'] == 1
+                             and first.get('postboot_compile_queue_depth', 0) == 0
+                             and first['postboot_http_requests_total{endpoint="/api/apps",method="GET",status="200"}'] == 10
+                             and second == first and len(list(directory.glob('*-*.json'))) == 1))
+
+        # Ecritures concurrentes (thread d'ecriture et scrape): fichier temporaire propre a chaque ecriture
+        writers = [threading.Thread(target=lambda: [registry.flush() for _ in range(50)]) for _ in range(4)]
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        results.append(check("Ecritures concurrentes sans conflit de fichier temporaire",
+                             not list(directory.glob('*.tmp'))
+                             and json.loads(registry._file.read_text(encoding='utf-8'))['pid'] == os.getpid()))
+
+    # Taux de hit du cache et metrique inconnue
+    registry = MetricsRegistry()
+    for result in ('hit', 'hit', 'shared', 'miss'):
+        registry.inc('postboot_cache_requests_total', cache='installer_proxy', result=result)
+    results.append(check("Taux de hit du cache",
+                         parse(registry.render())['postboot_cache_hit_ratio{cache="installer_proxy"}'] == 0.75))
+    try:
+        registry.inc('postboot_inconnue_total')
+        results.append(check("Metrique inconnue refusee", False))
+    except KeyError:
+        results.append(check("Metrique inconnue refusee", True))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
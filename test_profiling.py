@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test des en-tetes Server-Timing et du profilage des requetes lentes.
+"""
+
+import sys
+import os
+import io
+import tempfile
+import time
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from flask import Flask, g
+from app import app
+from profiling import SlowRequestProfiler, create_profiling_blueprint, record_stage, server_timing_header
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def stage_names(header):
+    return [part.split(';')[0].strip() for part in header.split(',')]
+
+
+def busy_wait(seconds):
+    """Attente active (visible par l'echantillonneur, contrairement a time.sleep)."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def make_profiling_app(profiler):
+    """Application minimale avec le cablage de app.py (debut/fin de suivi par requete)."""
+    test_app = Flask(__name__)
+    test_app.register_blueprint(create_profiling_blueprint(profiler))
+
+    @test_app.before_request
+    def begin():
+        g.start = time.perf_counter()
+        g.profiled = profiler.begin()
+
+    @test_app.after_request
+    def end(response):
+        if g.get('profiled'):
+            profiler.end('GET', '/slow', response.status_code, time.perf_counter() - g.start, g.get('server_timing'))
+        return response
+
+    @test_app.route('/slow')
+    def slow_view():
+        busy_wait(0.15)
+        record_stage('busy', 0.15)
+        return 'ok'
+
+    @test_app.route('/fast')
+    def fast_view():
+        return 'ok'
+
+    return test_app
+
+
+def main():
+    print("="*60)
+    print("TEST SERVER-TIMING ET PROFILAGE DES REQUETES LENTES")
+    print("="*60)
+
+    results = []
+    client = app.test_client()
+
+    # Server-Timing sur les reponses catalogue et generation
+    response = client.get('/api/apps')
+    names = stage_names(response.headers.get('Server-Timing', ''))
+    results.append(check("Server-Timing catalogue (resolution + total)", names[:1] == ['catalog.resolve'] and names[-1] == 'total'))
+
+    config = {
+        'profile': 'TENOR',
+        'master_apps': [],
+        'profile_apps': [],
+        'optional_apps': [],
+        'modules': {'ui': {'enabled': True, 'DarkMode': True}}
+    }
+    response = client.post('/api/generate', json={'config': config})
+    names = stage_names(response.headers.get('Server-Timing', ''))
+    expected = {'transform', 'generate.header', 'generate.modules', 'module_load', 'generate.orchestrator', 'file_write', 'total'}
+    results.append(check("Server-Timing generation (etapes detaillees)", response.status_code == 200 and expected <= set(names)))
+    results.append(check("Format de l'en-tete",
+                         server_timing_header({'a.b': 0.0015}, 0.01) == 'a.b;dur=1.50, total;dur=10.00'))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        profiler = SlowRequestProfiler(Path(temp_dir), threshold_ms=100, interval_ms=2, max_profiles=2)
+        test_client = make_profiling_app(profiler).test_client()
+
+        test_client.get('/fast')
+        results.append(check("Requete rapide non enregistree", profiler.list_profiles() == []))
+
+        test_client.get('/slow')
+        profiles = test_client.get('/api/debug/profiles').get_json()['profiles']
+        results.append(check("Requete lente profilee",
+                             len(profiles) == 1 and profiles[0]['duration_ms'] >= 100 and profiles[0]['samples'] > 0
+                             and profiles[0]['stages_ms'] == {'busy': 150.0}))
+
+        folded = test_client.get(f"/api/debug/profiles/{profiles[0]['id']}").get_data(as_text=True)
+        results.append(check("Profil folded telechargeable (pile de la vue)",
+                             'slow_view (test_profiling.py' in folded and 'busy_wait' in folded))
+        results.append(check("Identifiant invalide refuse",
+                             test_client.get('/api/debug/profiles/..%2Fsecret').status_code == 404))
+
+        test_client.get('/slow')
+        test_client.get('/slow')
+        results.append(check("Rotation des profils (max_profiles)", len(profiler.list_profiles()) == 2))
+
+        profiler.sample_rate = 0
+        test_client.get('/slow')
+        results.append(check("Taux d'echantillonnage respecte", len(list(Path(temp_dir).glob('*.folded'))) == 2))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test des durees estimees par application (progression ponderee et ETA
+du script genere).
+"""
+
+import sys
+import os
+import io
+import copy
+import json
+import uuid
+import logging
+import tempfile
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import ScriptGenerator
+from telemetry import TelemetryStore
+
+PROGRESS = {'baseSeconds': 10, 'downloadMBps': 20, 'installSecondsPerMB': 0.5, 'defaultSeconds': 42}
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def record_runs(store, app_seconds, runs=3):
+    """Executions mesurees (mediane exploitable a partir de trois echantillons)."""
+    for _ in range(runs):
+        store.record_run({
+            'runId': str(uuid.uuid4()), 'profile': 'DEV', 'success': True,
+            'steps': [{'kind': 'app', 'name': name, 'phase': 'total', 'seconds': seconds, 'measured': True}
+                      for name, seconds in app_seconds.items()],
+        })
+
+
+def main():
+    print("="*60)
+    print("TEST DES DUREES ESTIMEES PAR APPLICATION")
+    print("="*60)
+
+    logging.getLogger('app').setLevel(logging.ERROR)
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        generator = ScriptGenerator()
+        generator.settings_config = dict(generator.settings_config, progress=dict(PROGRESS))
+        generator.duration_history = {}
+
+        # Modele par taille: base + telechargement + installation
+        results.append(check("Modele par taille (settings.progress)",
+                             generator._estimate_app_seconds({'name': 'A', 'size': '100 MB'}) == 10 + 5 + 50
+                             and generator._estimate_app_seconds({'name': 'B', 'size': '1 GB'})
+                             == int(10 + 1024 / 20 + 1024 * 0.5)))
+        results.append(check("Taille absente ou illisible: defaultSeconds",
+                             [generator._estimate_app_seconds(app) for app in
+                              ({'name': 'C', 'size': 'Variable'}, {'name': 'D'}, {'name': 'E', 'size': ''})]
+                             == [42, 42, 42]))
+
+        # Precedence: mediane de telemetrie > fichier d'historique > modele par taille
+        history_path = work_dir / 'install_durations.json'
+        history_path.write_text(json.dumps({'apps': {'A': 300, 'B': 200}}), encoding='utf-8')
+        generator.settings_config['progress']['historyFile'] = str(history_path)
+        generator.duration_history = generator._load_duration_history()
+        store = TelemetryStore(work_dir / 'telemetry.db')
+        record_runs(store, {'A': 120})
+        record_runs(store, {'B': 999}, runs=2)
+        generator.telemetry_store = store
+        estimates = [generator._estimate_app_seconds({'name': name, 'size': '100 MB'}) for name in 'ABC']
+        results.append(check("Telemetrie > historique > taille",
+                             estimates == [120, 200, 65]))
+
+        broken = TelemetryStore(work_dir / 'broken' / 'telemetry.db')
+        broken.db_path = work_dir  # Base illisible (repertoire): sqlite3.OperationalError
+        generator.telemetry_store = broken
+        results.append(check("Telemetrie indisponible: repli sur l'historique",
+                             generator._estimate_app_seconds({'name': 'A', 'size': '100 MB'}) == 300))
+        generator.telemetry_store = store
+
+        # Configuration embarquee: estimatedSeconds ajoute a une copie de la configuration
+        config = {
+            'apps': {
+                'master': [{'name': 'A', 'winget': 'Vendor.A', 'size': '100 MB'}],
+                'profile': [{'name': 'C', 'winget': 'Vendor.C', 'size': 'Variable'}],
+            },
+            'modules': [],
+        }
+        original = copy.deepcopy(config)
+        attached = generator._attach_cost_estimates(config)
+        results.append(check("estimatedSeconds sur chaque application, configuration appelante intacte",
+                             [app['estimatedSeconds'] for app in attached['apps']['master'] + attached['apps']['profile']]
+                             == [120, 42] and config == original))
+
+        script = generator.generate_script(config, 'Estimations')
+        embedded = script.split('$Global:EmbeddedConfig = ', 1)[-1]
+        results.append(check("Script: estimatedSeconds dans la configuration embarquee",
+                             'estimatedSeconds = 120' in embedded and 'estimatedSeconds = 42' in embedded
+                             and config == original))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test de la serialisation en litteraux PowerShell (configuration embarquee).
+"""
+
+import sys
+import os
+import io
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from ps_literals import PowerShellLiteralError, quote_string, to_ps_literal
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def raises(value):
+    try:
+        to_ps_literal(value)
+    except PowerShellLiteralError:
+        return True
+    return False
+
+
+def main():
+    print("="*60)
+    print("TEST DES LITTERAUX POWERSHELL")
+    print("="*60)
+
+    results = []
+
+    results.append(check("Scalaires: $null, booleens, nombres",
+                         [to_ps_literal(v) for v in (None, True, False, 42, -1.5)]
+                         == ['$null', '$true', '$false', '42', '-1.5']))
+
+    # Apostrophes typographiques: l'analyseur PowerShell les traite comme des apostrophes droites
+    results.append(check("Apostrophes droites et typographiques doublees",
+                         quote_string("l'outil") == "'l''outil'"
+                         and to_ps_literal('l’outil ‘v2’ ‚‛')
+                         == "'l’’outil ‘‘v2’’ ‚‚‛‛'"))
+
+    results.append(check("Texte multiligne en here-string litterale",
+                         to_ps_literal("ligne 1\n$env:TEMP\nligne 3") == "@'\nligne 1\n$env:TEMP\nligne 3\n'@"))
+
+    # Contenu qui fermerait la here-string ou retours chariot: chaine entre apostrophes
+    closing = "debut\n'@\nfin"
+    typographic = "debut\n’@ suite"
+    carriage = "ligne 1\r\nligne 2"
+    results.append(check("Repli sur une chaine entre apostrophes ('@ en debut de ligne, \\r)",
+                         to_ps_literal(closing) == "'debut\n''@\nfin'"
+                         and to_ps_literal(typographic) == "'debut\n’’@ suite'"
+                         and to_ps_literal(carriage) == "'ligne 1\r\nligne 2'"
+                         and to_ps_literal("a '@ au milieu\nb").startswith("@'\n")))
+
+    results.append(check("Tableau imbrique unique: virgule unaire",
+                         to_ps_literal([[1, 2]]) == '@(\n    ,@(1, 2)\n)'
+                         and to_ps_literal([[1], [2]]) == '@(\n    @(1),\n    @(2)\n)'
+                         and to_ps_literal([]) == '@()' and to_ps_literal(['a', 1]) == "@('a', 1)"))
+
+    results.append(check("Cles nues ou entre apostrophes",
+                         to_ps_literal({'Name': 'Git', 'Microsoft.Teams': 1, "l'app": {}})
+                         == "@{\n    Name = 'Git'\n    'Microsoft.Teams' = 1\n    'l''app' = @{}\n}"))
+
+    results.append(check("Cles en double a la casse pres refusees",
+                         raises({'Name': 'a', 'name': 'b'}) and raises({'apps': [{'Id': 1, 'ID': 2}]})
+                         and not raises({'Name': 'a', 'Name2': 'b'})))
+
+    results.append(check("NaN et infinis en constantes [double]",
+                         to_ps_literal([float('nan'), float('inf'), float('-inf')])
+                         == '@([double]::NaN, [double]::PositiveInfinity, [double]::NegativeInfinity)'))
+
+    results.append(check("Types non supportes et cles non textuelles refuses",
+                         raises({1: 'a'}) and raises({'a': {1, 2}}) and raises(b'octets')))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
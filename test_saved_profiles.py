@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test des profils personnalises enregistres et du cache de scripts par identifiant.
+"""
+
+import sys
+import os
+import io
+import copy
+import logging
+import tempfile
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+TEMP_DIR = tempfile.TemporaryDirectory()
+os.environ['SAVED_PROFILES_DB'] = str(Path(TEMP_DIR.name) / 'saved_profiles.db')
+os.environ['ARTIFACT_DIR'] = str(Path(TEMP_DIR.name) / 'artifacts')
+
+import app as app_module
+from admin import ADMIN_TOKEN_ENV, ADMIN_TOKEN_HEADER
+from saved_profiles import PROFILE_ID_PATTERN
+
+CUSTOM_CONFIG = {
+    'profile': 'Custom',
+    'custom_name': 'Equipe Data',
+    'master_apps': [],
+    'profile_apps': ['Git.Git', 'Python.Python.3.12'],
+    'optional_apps': ['VideoLAN.VLC'],
+    'modules': {'ui': {'enabled': True, 'DarkMode': True}}
+}
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def main():
+    print("="*60)
+    print("TEST DES PROFILS PERSONNALISES ENREGISTRES")
+    print("="*60)
+
+    logging.getLogger('app').setLevel(logging.WARNING)
+    client = app_module.app.test_client()
+    results = []
+
+    response = client.post('/api/saved-profiles', json={'config': CUSTOM_CONFIG})
+    saved = response.get_json()
+    profile_id = saved['id']
+    results.append(check("Enregistrement avec identifiant court",
+                         response.status_code == 201 and PROFILE_ID_PATTERN.match(profile_id) is not None))
+
+    reordered = dict(CUSTOM_CONFIG, profile_apps=['Python.Python.3.12', 'Git.Git', 'Git.Git'])
+    again = client.post('/api/saved-profiles', json={'config': reordered})
+    other = client.post('/api/saved-profiles', json={'config': dict(CUSTOM_CONFIG, optional_apps=[])})
+    results.append(check("Identifiant derive du contenu",
+                         again.status_code == 200 and again.get_json()['id'] == profile_id
+                         and other.get_json()['id'] != profile_id))
+
+    empty = dict(CUSTOM_CONFIG, profile_apps=[], optional_apps=[], master_apps=[], preselect_master=False)
+    results.append(check("Configurations invalides refusees",
+                         client.post('/api/saved-profiles', json={'config': empty}).status_code == 400
+                         and client.post('/api/saved-profiles', json={'config': CUSTOM_CONFIG,
+                                                                      'scriptTypes': ['inconnu']}).status_code == 400))
+
+    # Generation par identifiant: aucune transformation, script servi depuis le cache
+    transform_calls = []
+    original_transform = app_module.transform_user_config_to_api_config
+
+    def counting_transform(*args, **kwargs):
+        transform_calls.append(args)
+        return original_transform(*args, **kwargs)
+
+    app_module.transform_user_config_to_api_config = counting_transform
+    original_catalog = app_module.generator.apps_config
+    try:
+        first = client.post('/api/generate', json={'saved_profile': profile_id})
+        second = client.post('/api/generate', json={'saved_profile': profile_id})
+        results.append(check("Generation sans transformation, puis cache",
+                             first.status_code == 200 and first.headers['X-Script-Cache'] == 'MISS'
+                             and second.headers['X-Script-Cache'] == 'HIT' and first.data == second.data
+                             and not transform_calls))
+        results.append(check("Nom de fichier du profil",
+                             'PostBootSetup-Equipe-Data.ps1' in second.headers['Content-Disposition']
+                             and b'Git' in second.data))
+
+        # Catalogue modifie: config recalculee une seule fois, nouveau script
+        updated_catalog = copy.deepcopy(original_catalog)
+        updated_catalog['version'] = 'test-refresh'
+        app_module.generator.apps_config = updated_catalog
+        refreshed = client.post('/api/generate', json={'saved_profile': profile_id})
+        cached = client.post('/api/generate', json={'saved_profile': profile_id})
+        stored = app_module.saved_profile_store.get(profile_id)
+        results.append(check("Recalcul apres changement de catalogue",
+                             refreshed.headers['X-Script-Cache'] == 'MISS' and cached.headers['X-Script-Cache'] == 'HIT'
+                             and len(transform_calls) == 1
+                             and stored['catalog_version'] == app_module.catalog_history.record(updated_catalog)))
+    finally:
+        app_module.transform_user_config_to_api_config = original_transform
+        app_module.generator.apps_config = original_catalog
+
+    results.append(check("Profil inconnu",
+                         client.post('/api/generate', json={'saved_profile': 'aaaaaaaaaa'}).status_code == 404
+                         and client.get('/api/saved-profiles/../etc').status_code == 404))
+
+    detail = client.get(f'/api/saved-profiles/{profile_id}').get_json()['profile']
+    listing = client.get('/api/saved-profiles').get_json()['profiles']
+    results.append(check("Consultation et compteur d'utilisation",
+                         detail['user_config']['profile_apps'] == ['Git.Git', 'Python.Python.3.12']
+                         and 'api_config' not in detail and listing[0]['id'] == profile_id
+                         and listing[0]['use_count'] == 4))
+
+    cache_counters = app_module.metrics_registry.snapshot()['counters']['postboot_cache_requests_total']
+    results.append(check("Hits du cache dans les metriques",
+                         cache_counters.get('cache="saved_script",result="hit"') == 2
+                         and cache_counters.get('cache="saved_script",result="miss"') == 2))
+
+    os.environ[ADMIN_TOKEN_ENV] = 'secret'
+    try:
+        denied = client.delete(f'/api/saved-profiles/{profile_id}').status_code
+        deleted = client.delete(f'/api/saved-profiles/{profile_id}', headers={ADMIN_TOKEN_HEADER: 'secret'}).status_code
+    finally:
+        del os.environ[ADMIN_TOKEN_ENV]
+    results.append(check("Suppression reservee a l'administration",
+                         denied == 401 and deleted == 200
+                         and client.post('/api/generate', json={'saved_profile': profile_id}).status_code == 404))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test du generateur de catalogues synthetiques (validite et determinisme).
+"""
+
+import sys
+import os
+import io
+import logging
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from app import app, generator, transform_user_config_to_api_config
+from synthetic_catalog import build_catalog, catalog_summary
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def main():
+    print("="*60)
+    print("TEST DU GENERATEUR DE CATALOGUES SYNTHETIQUES")
+    print("="*60)
+
+    logging.getLogger('app').setLevel(logging.WARNING)
+    results = []
+
+    catalog = build_catalog(2000, 25, seed=7)
+    summary = catalog_summary(catalog)
+    results.append(check("Tailles demandees",
+                         summary['master'] + summary['common_apps'] + summary['optional'] == 2000
+                         and summary['profiles'] == 25 and summary['refs'] == 25 * 20))
+    results.append(check("Deterministe pour une graine", build_catalog(2000, 25, seed=7) == catalog
+                         and build_catalog(2000, 25, seed=8) != catalog))
+
+    every_app = catalog['master'] + list(catalog['common_apps'].values()) + catalog['optional']
+    results.append(check("Types d'applications du catalogue reel",
+                         any(a.get('winget') for a in every_app)
+                         and any(a.get('url') and a.get('sha256') for a in every_app)
+                         and any(a.get('customInstall') and a.get('installScript') for a in every_app)
+                         and any(a.get('webApp') for a in every_app)))
+    results.append(check("Identifiants uniques",
+                         len({a.get('winget') or a.get('url') or a['name'] for a in every_app}) == len(every_app)))
+
+    original_catalog = generator.apps_config
+    generator.apps_config = catalog
+    try:
+        resolved = generator.get_resolved_apps_config()
+        profile = resolved['profiles']['PROFILE_003']
+        results.append(check("References resolues avec surcharges",
+                             all('name' in a and 'ref' not in a for a in profile['apps'])))
+
+        categories = app.test_client().get('/api/apps/all-with-categories').get_json()
+        results.append(check("Catalogue servi par categories", categories['total_apps'] == 2000))
+
+        config = {'profile': 'PROFILE_003', 'master_apps': [], 'profile_apps': [], 'optional_apps': [],
+                  'modules': {'ui': {'enabled': True}}}
+        api_config = transform_user_config_to_api_config(config, ['installation', 'optimizations'])
+        script = generator.generate_script(api_config, 'PROFILE_003')
+        results.append(check("Script genere pour un profil synthetique",
+                             len(api_config['apps']['master']) == 12 and len(api_config['apps']['profile']) == 20
+                             and profile['apps'][0]['name'] in script))
+    finally:
+        generator.apps_config = original_catalog
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
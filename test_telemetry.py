@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test de l'ingestion de telemetrie et des percentiles par etape.
+"""
+
+import sys
+import os
+import io
+import tempfile
+import uuid
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+from flask import Flask
+from telemetry import TelemetryStore, create_telemetry_blueprint, percentile
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def make_report(app_seconds, success=True):
+    return {
+        'runId': str(uuid.uuid4()),
+        'profile': 'DEV',
+        'version': '5.0',
+        'totalSeconds': sum(app_seconds.values()) + 60,
+        'success': success,
+        'steps': [
+            {'kind': 'app', 'name': name, 'phase': 'total', 'seconds': seconds, 'success': True, 'measured': True}
+            for name, seconds in app_seconds.items()
+        ] + [
+            {'kind': 'module', 'name': 'module:debloat', 'phase': 'total', 'seconds': 42.5},
+            {'kind': 'app', 'name': 'Git', 'phase': 'total', 'seconds': 1.0, 'measured': False},
+        ]
+    }
+
+
+def main():
+    print("="*60)
+    print("TEST DE LA TELEMETRIE D'EXECUTION")
+    print("="*60)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = TelemetryStore(Path(temp_dir) / 'telemetry.db')
+        app = Flask(__name__)
+        app.register_blueprint(create_telemetry_blueprint(store))
+        client = app.test_client()
+
+        # Dix executions: Office de 600 a 1500 s
+        for i in range(10):
+            response = client.post('/api/telemetry', json=make_report({'Office': 600 + i * 100, 'Git': 40 + i}))
+            if response.status_code != 201:
+                break
+        results.append(check("Ingestion de 10 rapports (201)", response.status_code == 201))
+
+        response = client.get('/api/telemetry/stats', query_string={'kind': 'app', 'phase': 'total'})
+        steps = {entry['name']: entry for entry in response.get_json()['steps']}
+        office = steps.get('Office', {})
+        results.append(check("Percentiles par application",
+                             office.get('count') == 10 and office.get('p50') == 1050.0
+                             and office.get('p95') == percentile([600.0 + i * 100 for i in range(10)], 0.95)))
+
+        results.append(check("Mesures non representatives exclues",
+                             steps.get('Git', {}).get('count') == 10 and steps['Git']['p50'] == 44.5))
+
+        response = client.get('/api/telemetry/stats', query_string={'kind': 'module'})
+        modules = response.get_json()['steps']
+        results.append(check("Statistiques par module",
+                             len(modules) == 1 and modules[0]['name'] == 'module:debloat' and modules[0]['p50'] == 42.5))
+
+        results.append(check("Medianes pour l'estimation des durees",
+                             store.get_app_medians() == {'Office': 1050.0, 'Git': 44.5}))
+
+        summary = client.get('/api/telemetry/stats').get_json()['summary']
+        results.append(check("Resume des executions", summary['runs'] == 10 and summary['failed_runs'] == 0))
+
+        # Rapports invalides
+        report = make_report({'Office': 600})
+        report['steps'][0]['seconds'] = -5
+        response = client.post('/api/telemetry', json=report)
+        results.append(check("Duree negative refusee (400)", response.status_code == 400))
+
+        report = make_report({'Office': 600})
+        report['steps'][0]['phase'] = 'unknown'
+        response = client.post('/api/telemetry', json=report)
+        results.append(check("Phase inconnue refusee (400)", response.status_code == 400))
+
+        report = make_report({'Office': 600})
+        client.post('/api/telemetry', json=report)
+        response = client.post('/api/telemetry', json=report)
+        results.append(check("Rapport en double refuse (400)", response.status_code == 400))
+
+        response = client.post('/api/telemetry', data='pas du json', content_type='application/json')
+        results.append(check("Corps non JSON refuse (400)", response.status_code == 400))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
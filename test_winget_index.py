@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test de la validation hors ligne des identifiants winget (index.db local).
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import sqlite3
+import logging
+import zipfile
+import tempfile
+from pathlib import Path
+
+# Forcer UTF-8 pour stdout
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# Ajouter le repertoire generator au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'generator'))
+
+TEMP_DIR = tempfile.TemporaryDirectory()
+WORK_DIR = Path(TEMP_DIR.name)
+os.environ.update({
+    'WINGET_INDEX_DB': str(WORK_DIR / 'winget' / 'index.db'),
+    'SAVED_PROFILES_DB': str(WORK_DIR / 'saved_profiles.db'),
+    'ARTIFACT_DIR': str(WORK_DIR / 'artifacts'),
+})
+
+import app as app_module
+import winget_index as winget_index_module
+from admin import ADMIN_TOKEN_ENV, ADMIN_TOKEN_HEADER
+from winget_index import WingetIndex, catalog_winget_entries, read_winget_ids
+
+CONFIG_DIR = Path(__file__).parent / 'config'
+RETIRED_ID = 'VideoLAN.VLC'
+
+
+def check(name, condition):
+    print(f"  {'[OK]' if condition else '[ECHEC]'} {name}")
+    return condition
+
+
+def build_index(path: Path, ids, table='ids'):
+    """Base au format de la source winget (table ids en v1, packages en v2)."""
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    with conn:
+        if table == 'ids':
+            conn.execute('CREATE TABLE ids (rowid INTEGER PRIMARY KEY, id TEXT NOT NULL)')
+        else:
+            conn.execute('CREATE TABLE packages (rowid INTEGER PRIMARY KEY, id TEXT NOT NULL, name TEXT)')
+        conn.executemany(f'INSERT INTO {table} (id) VALUES (?)', [(value,) for value in ids])
+    conn.close()
+    return path
+
+
+def build_msix(path: Path, index_path: Path):
+    with zipfile.ZipFile(path, 'w') as package:
+        package.write(index_path, 'Public/index.db')
+        package.writestr('AppxManifest.xml', '<Package/>')
+    return path
+
+
+def main():
+    print("="*60)
+    print("TEST DE LA VALIDATION HORS LIGNE DES IDENTIFIANTS WINGET")
+    print("="*60)
+
+    logging.getLogger('app').setLevel(logging.ERROR)
+    logging.getLogger('winget_index').setLevel(logging.ERROR)
+    winget_index_module.RELOAD_CHECK_SECONDS = 0
+    results = []
+    client = app_module.app.test_client()
+    catalog = json.loads((CONFIG_DIR / 'apps.json').read_text(encoding='utf-8'))
+    catalog_ids = sorted({winget_id for _, _, winget_id in catalog_winget_entries(catalog)})
+
+    results.append(check("Sans index: validation desactivee, aucun avertissement",
+                         not app_module.winget_index.available
+                         and app_module.winget_index.check_catalog(catalog) == []))
+
+    # Index de la source: catalogue sans l'identifiant retire, plus de nombreux paquets
+    known_ids = [winget_id for winget_id in catalog_ids if winget_id != RETIRED_ID]
+    known_ids += [f"Publisher{i}.Package{i}" for i in range(20000)]
+    v1_path = build_index(WORK_DIR / 'v1.db', known_ids)
+    v2_path = build_index(WORK_DIR / 'v2.db', ['Git.Git', 'Microsoft.PowerToys'], table='packages')
+    results.append(check("Schemas v1 (ids) et v2 (packages), identifiants insensibles a la casse",
+                         len(read_winget_ids(v1_path)) == len(known_ids)
+                         and read_winget_ids(v2_path)['git.git'] == 'Git.Git'))
+
+    msix_path = build_msix(WORK_DIR / 'source.msix', v1_path)
+    os.environ[ADMIN_TOKEN_ENV] = 'secret'
+    try:
+        denied = client.post('/api/admin/winget-index', data=msix_path.read_bytes()).status_code
+        refreshed = client.post('/api/admin/winget-index', data=msix_path.read_bytes(),
+                                headers={ADMIN_TOKEN_HEADER: 'secret', 'Content-Type': 'application/octet-stream'})
+        invalid = client.post('/api/admin/winget-index', data=b'pas un index',
+                              headers={ADMIN_TOKEN_HEADER: 'secret'}).status_code
+        status = client.get('/api/admin/winget-index', headers={ADMIN_TOKEN_HEADER: 'secret'}).get_json()
+        outside = [client.post('/api/admin/winget-index', json={'path': path},
+                               headers={ADMIN_TOKEN_HEADER: 'secret'}).status_code
+                   for path in (str(msix_path), '../source.msix', '/etc/passwd')]
+        build_msix(app_module.winget_index.db_path.parent / 'source.msix', v1_path)
+        inside = client.post('/api/admin/winget-index', json={'path': 'source.msix'},
+                             headers={ADMIN_TOKEN_HEADER: 'secret'}).status_code
+    finally:
+        del os.environ[ADMIN_TOKEN_ENV]
+    body = refreshed.get_json()
+    results.append(check("Rafraichissement admin depuis source.msix",
+                         denied == 401 and refreshed.status_code == 200 and body['packages'] == len(known_ids)
+                         and invalid == 400 and status['available']))
+    results.append(check("Catalogue: identifiant retire signale avec son emplacement",
+                         [(w['winget'], w['location']) for w in body['catalog_warnings']]
+                         == [(RETIRED_ID, f'optional:{RETIRED_ID}')]
+                         and status['catalog_warnings'] == body['catalog_warnings']))
+    results.append(check("Chemin serveur limite au repertoire de l'index",
+                         outside == [403, 403, 403] and inside == 200))
+
+    index = app_module.winget_index
+    typo = index.check([('Git', 'Git.Gti'), ('VS Code', 'microsoft.visualstudiocode')])
+    results.append(check("Faute de frappe: suggestion, casse ignoree",
+                         typo == [{'name': 'Git', 'winget': 'Git.Gti', 'suggestion': 'Git.Git'}]))
+
+    entries = [(f'App {i}', f'Publisher{i}.Package{i}') for i in range(0, 20000, 400)]
+    start = time.perf_counter()
+    for _ in range(100):
+        index.check(entries)
+    per_check_ms = (time.perf_counter() - start) * 10
+    results.append(check(f"Validation de 50 identifiants: {per_check_ms:.3f} ms", per_check_ms < 5))
+
+    # Generation: avertissements dans la reponse, script genere malgre tout
+    config = {'profile': 'Custom', 'custom_name': 'Winget', 'master_apps': [],
+              'profile_apps': ['Git.Git'], 'optional_apps': [RETIRED_ID], 'modules': {}}
+    generated = client.post('/api/generate', json={'config': config})
+    preview = client.post('/api/generate/preview', json={'config': config}).get_json()
+    clean = client.post('/api/generate', json={'config': dict(config, optional_apps=[])})
+    results.append(check("Generation: en-tete X-Winget-Warnings et apercu",
+                         generated.status_code == 200 and generated.headers.get('X-Winget-Warnings') == RETIRED_ID
+                         and [w['winget'] for w in preview['winget_warnings']] == [RETIRED_ID]
+                         and 'X-Winget-Warnings' not in clean.headers))
+    results.append(check("Script: pas de nouvelle tentative pour un identifiant introuvable",
+                         b'-1978335212' in generated.data))
+
+    # Autre worker: index remplace sur disque, recharge au prochain acces
+    other_worker = WingetIndex(index.db_path)
+    build_index(WORK_DIR / 'v1.db', catalog_ids)
+    os.replace(WORK_DIR / 'v1.db', index.db_path)
+    results.append(check("Rechargement par un autre worker",
+                         other_worker.check_catalog(catalog) == [] and other_worker.status()['packages'] == len(catalog_ids)))
+
+    success_count = sum(1 for r in results if r)
+    print(f"\nResultat: {success_count}/{len(results)} verifications OK")
+
+    return 0 if success_count == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,12 @@
 import React, { useState, useMemo, useRef, useEffect } from 'react';
 import { Check, Search, ChevronDown, ChevronUp, Sparkles, Package, Plus, X } from 'lucide-react';
+import { apiService } from '../services/api';
+
+const SEARCH_LIMIT = 10;
+const SEARCH_DEBOUNCE_MS = 150;
+const SEARCH_FIELDS = 'name,description,category,size,winget,url';
+// Applications proposées à l'ajout: les applications master sont toujours installées
+const SEARCH_SOURCES = 'common,profile,optional';
 
 const AppItem = ({ app, isSelected, onToggle, variant = 'default', compact = false }) => {
   const appId = app.winget || app.url || app.name;
@@ -56,6 +63,7 @@ const AppSelector = ({
   onToggleApp,
 }) => {
   const [searchQuery, setSearchQuery] = useState('');
+  const [serverResults, setServerResults] = useState(null);
   const [showSearch, setShowSearch] = useState(false);
   const [showCatalog, setShowCatalog] = useState(false);
   const [expandedCategories, setExpandedCategories] = useState({});
@@ -146,16 +154,41 @@ const AppSelector = ({
     return result;
   }, [apps]);
 
-  // Filtrer par recherche
+  // Recherche côté serveur (index du catalogue: préfixes, fautes de frappe), avec anti-rebond
+  useEffect(() => {
+    const query = searchQuery.trim();
+    setServerResults(null);
+    if (!query) return undefined;
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await apiService.searchApps({
+          q: query, source: SEARCH_SOURCES, limit: SEARCH_LIMIT, fields: SEARCH_FIELDS
+        });
+        if (!cancelled && data.success) setServerResults(data.items);
+      } catch (error) {
+        // API indisponible: le filtre local ci-dessous reste utilisé
+      }
+    }, SEARCH_DEBOUNCE_MS);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
+
+  // Filtre local en attendant la réponse du serveur (ou s'il ne répond pas)
   const searchResults = useMemo(() => {
     if (!searchQuery.trim()) return [];
+    if (serverResults) return serverResults;
     const query = searchQuery.toLowerCase();
     return allAvailableApps.filter(app =>
       app.name?.toLowerCase().includes(query) ||
       app.description?.toLowerCase().includes(query) ||
       app.winget?.toLowerCase().includes(query)
-    ).slice(0, 10); // Limiter à 10 résultats
-  }, [allAvailableApps, searchQuery]);
+    ).slice(0, SEARCH_LIMIT);
+  }, [allAvailableApps, searchQuery, serverResults]);
 
   // Grouper par catégorie pour le catalogue
   const catalogByCategory = useMemo(() => {
@@ -63,6 +63,14 @@ export const apiService = {
     return response.data;
   },
 
+  // Search applications (index serveur, pagination par curseur)
+  async searchApps({ q = '', category, source, limit = 20, cursor, fields } = {}) {
+    const response = await api.get('/api/apps/search', {
+      params: { q, category, source, limit, cursor, fields },
+    });
+    return response.data;
+  },
+
   // Get all modules
   async getModules() {
     const response = await api.get('/api/modules');